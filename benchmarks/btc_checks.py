@@ -0,0 +1,118 @@
+"""
+Offline correctness checks of the btccli HD wallet, address index and Electrum client.
+
+Prints a ✅ or ❌ line per check and exits with 1 if any failed.
+
+    python -m benchmarks.btc_checks [--only hd_scan ...]
+"""
+import os
+import sys
+import tempfile
+
+from benchmarks.checks import CheckFailed, expect, run_checks
+from btccli.address_index import AddressIndex, AddressType, build_address_index
+from btccli.btc_keys import BitcoinKeys, KeyValidationError, keyset_row
+from btccli.electrum_client import ElectrumClient, parse_server
+from btccli.hd import PURPOSES, HDWallet, format_path
+
+MNEMONIC = " ".join(["abandon"] * 11 + ["about"])
+
+FIRST_ADDRESSES = {
+    # m/purpose'/0'/0'/0/0 of MNEMONIC, from the BIP44/49/84/86 test vectors
+    44: "1LqBGSKuX5yYUonjxT5qGfpUsXKYYWeabA",
+    49: "37VucYSaXLCAsxYyAPfbSi9eh4iEcbShgf",
+    84: "bc1qcr8te4kr609gcawutmrza0j4xv80jy8z306fyu",
+    86: "bc1p5cyxnuxmeuwuvkwfem96lqzszd02n6xdcjrs20cac6yqjjwudpxqkedrcr",
+}
+
+def check_hd_addresses():
+    """The first receive address of each purpose matches its BIP's test vector"""
+    wallet = HDWallet.from_mnemonic(MNEMONIC)
+    for purpose, expected in FIRST_ADDRESSES.items():
+        address = wallet.addresses(wallet.account_path(purpose) + (0,), [0], purpose)[0]
+        expect(address == expected, f"BIP{purpose} m/{purpose}'/0'/0'/0/0 is {address}, expected {expected}")
+
+def check_index_append():
+    """Re-indexing the same keys finds each keyset once, and append() merges once there are too many segments"""
+    keysets = HDWallet.from_mnemonic(MNEMONIC).keys("m/84'/0'/0'/0", range(10))
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "keys.idx")
+        build_address_index(path, keysets).close()
+        with AddressIndex(path) as index:
+            for _ in range(3):
+                index.append(keysets, max_segments=3)
+            found = index.lookup_address(keysets[7].addr_segwit)
+            expect(len(found) == 1, f"{len(found)} entries for one keyset indexed 4 times")
+            index.append(keysets[:1], max_segments=3)
+            expect(os.listdir(directory) == ["keys.idx"], f"4 appends with max_segments=3 left {sorted(os.listdir(directory))}")
+            expect(len(index) == len(keysets) * len(AddressType), f"{len(index)} records after merging")
+
+def check_keyset_hex():
+    """Keysets built from the old hex/string fields match the derived ones, and equality ignores the WIF prefix"""
+    keys = HDWallet.from_mnemonic(MNEMONIC).keys("m/84'/0'/0'/0", [1])[0]
+    from_hex = BitcoinKeys.from_hex(*keyset_row(keys))
+    expect(from_hex == keys and keyset_row(from_hex.validate()) == keyset_row(keys), "from_hex differs from the keyset")
+    expect(BitcoinKeys(keys.comp_pub_key, priv_key=keys.priv_key_raw) == keys, "hex keys in the constructor differ")
+    expect(BitcoinKeys.from_hex("p2wpkh:" + keys.wif_key) == keys, "the p2wpkh: prefixed WIF changes equality")
+    try:
+        BitcoinKeys.from_hex(*keyset_row(keys)[:6], addr_segwit=FIRST_ADDRESSES[84]).validate()
+        raise CheckFailed("from_hex kept a wrong address without validate() noticing")
+    except KeyValidationError:
+        pass
+
+def check_hd_scan():
+    """A gap limit scan finds every used key of every purpose in an index built from those keys"""
+    wallet = HDWallet.from_mnemonic(MNEMONIC)
+    used = {(0, 0), (0, 3), (0, 24), (1, 2)}  # (chain, index); 24 is past the first batch of 20
+    with tempfile.TemporaryDirectory() as directory:
+        for purpose in PURPOSES:
+            account = wallet.account_path(purpose)
+            keysets = [keys for chain, index in sorted(used) for keys in wallet.keys(account + (chain,), [index])]
+            with build_address_index(os.path.join(directory, f"{purpose}.idx"), keysets) as index:
+                result = wallet.scan(index, purpose=purpose)
+            found = {hit.path for hit in result.hits}
+            expected = {format_path(account + (chain, index)) for chain, index in used}
+            expect(found == expected, f"BIP{purpose} scan found {sorted(found)}, expected {sorted(expected)}")
+
+def check_electrum_client():
+    """Lookups are batched, cached, matched to their answers out of order, and one failing address fails alone"""
+    from btccli.mock_electrum import MockElectrum
+
+    wallet = HDWallet.from_mnemonic(MNEMONIC)
+    keysets = wallet.keys(wallet.account_path(84) + (0,), range(50))
+    funded = {keysets[3].addr_segwit: 50_000, keysets[41].addr_legacy: 7_000}
+    failing = keysets[10].addr_taproot
+    with MockElectrum(funded, {failing}) as server:
+        host, port, tls = parse_server(server.server)
+        with ElectrumClient(host, port, tls=tls, batch_size=25, pipeline=3) as client:
+            balances = client.lookup(keysets, history=True)
+            lookups = len(keysets) * len(AddressType) * 2
+            # balances and histories share the batches
+            expect(server.lines == 1 + lookups // 25, f"{lookups} lookups took {server.lines} lines, expected batches of 25")
+
+            found = {address.address: address.confirmed for balance in balances for address in balance.addresses if address.used}
+            expect(found == funded, f"found {found}, expected {funded}")
+            errors = [address.address for balance in balances for address in balance.errors]
+            expect(errors == [failing], f"errors for {errors}, expected only {failing}")
+
+            lines = server.lines
+            again = client.lookup(keysets, history=True)
+            # only the failed address's balance and history are asked again, in one batch
+            expect(server.lines == lines + 1, f"a cached lookup took {server.lines - lines} lines, expected 1")
+            expect([b.addresses for b in again] == [b.addresses for b in balances], "the cached lookup differs")
+
+            server.failing.clear()
+            retried = client.lookup([keysets[10]])[0]
+            expect(not retried.errors, f"a failed lookup was cached: {retried.errors}")
+        expect(parse_server("[::1]:50001:t") == ("::1", 50001, False), "bracketed IPv6 servers don't parse")
+
+CHECKS = {
+    "hd_addresses": check_hd_addresses,
+    "hd_scan": check_hd_scan,
+    "keyset_hex": check_keyset_hex,
+    "index_append": check_index_append,
+    "electrum_client": check_electrum_client,
+}
+
+if __name__ == "__main__":
+    sys.exit(run_checks(__doc__.strip().splitlines()[0], CHECKS))
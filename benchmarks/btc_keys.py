@@ -0,0 +1,166 @@
+"""
+Throughput and memory benchmark for the btccli key primitives.
+
+Every operation runs over a deterministic corpus of private keys (the same keys on
+every machine and run) at each requested size. Per-op benchmarks call the single key
+function once per key; batch benchmarks hand the whole corpus to the batch function.
+Throughput is the best of --repeat timings, each looping the benchmark for at least
+--min-time seconds after a warm-up; peak memory is measured in a separate
+tracemalloc run so tracing doesn't skew the timings.
+
+Runs are compared against the JSON baseline committed next to this file and fail if
+any throughput drops by more than --threshold, or if a benchmark has no baseline.
+--no-baseline only measures; --save records the results in the baseline, keeping the
+entries of other sizes. The committed baseline covers the default sizes; --full adds
+the 100k corpus, which takes minutes per operation in pure Python. Runs fully offline.
+
+    python -m benchmarks.btc_keys [--full | --sizes 1 1000] [--save | --no-baseline] [--baseline PATH]
+"""
+import argparse
+import hashlib
+import json
+import os
+import platform
+import sys
+import time
+import tracemalloc
+from typing import Callable
+
+from btccli import keys
+from btccli.btc_keys import ValidationLevel, make_bitcoin_keyset, make_bitcoin_keysets
+from btccli.secp256k1 import N
+
+DEFAULT_SIZES = (1, 1000)
+
+FULL_SIZES = (1, 1000, 100_000)
+"""--full: the default sizes plus a corpus large enough to show memory and cache effects"""
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(__file__), "btc_keys.baseline.json")
+
+def corpus(size: int) -> dict[str, list[str]]:
+    """`size` private keys derived from a counter, with their WIF and public key forms"""
+    private_keys = []
+    counter = 0
+    while len(private_keys) < size:
+        k = int.from_bytes(hashlib.sha256(b"btccli-benchmark" + counter.to_bytes(8, 'big')).digest(), 'big')
+        counter += 1
+        if 0 < k < N:
+            private_keys.append(f"{k:064x}")
+    uncomp_pub_keys = keys.private_keys_to_public_keys(private_keys)
+    return {
+        "private_keys": private_keys,
+        "wif_keys": [keys.private_key_to_wif(key) for key in private_keys],
+        "uncomp_pub_keys": uncomp_pub_keys,
+        "comp_pub_keys": [keys.uncompressed_to_compressed_pubkey(key) for key in uncomp_pub_keys],
+    }
+
+def _each(func: Callable, field: str):
+    def run(data):
+        for value in data[field]:
+            func(value)
+    return run
+
+# name -> function run over a corpus
+OPERATIONS = {
+    "private_key_to_public_key": _each(keys.private_key_to_public_key, "private_keys"),
+    "compressed_to_uncompressed_pubkey": _each(keys.compressed_to_uncompressed_pubkey, "comp_pub_keys"),
+    "uncompressed_to_compressed_pubkey": _each(keys.uncompressed_to_compressed_pubkey, "uncomp_pub_keys"),
+    "wif_to_raw_private_key": _each(keys.wif_to_raw_private_key, "wif_keys"),
+    "uncomp_public_key_to_legacy_address": _each(keys.uncomp_public_key_to_legacy_address, "uncomp_pub_keys"),
+    "comp_public_key_to_wrapped_segwit_address": _each(keys.comp_public_key_to_wrapped_segwit_address, "comp_pub_keys"),
+    "comp_public_key_to_segwit_address": _each(keys.comp_public_key_to_segwit_address, "comp_pub_keys"),
+    "comp_public_key_to_taproot_address": _each(keys.comp_public_key_to_taproot_address, "comp_pub_keys"),
+    "make_bitcoin_keyset": _each(make_bitcoin_keyset, "wif_keys"),
+    "batch:private_keys_to_public_keys": lambda data: keys.private_keys_to_public_keys(data["private_keys"]),
+    "batch:compressed_to_uncompressed_pubkeys": lambda data: keys.compressed_to_uncompressed_pubkeys(data["comp_pub_keys"]),
+    "batch:comp_public_keys_to_taproot_addresses": lambda data: keys.comp_public_keys_to_taproot_addresses(data["comp_pub_keys"]),
+    "batch:make_bitcoin_keysets": lambda data: list(make_bitcoin_keysets(data["wif_keys"], workers=1)),
+    "batch:make_bitcoin_keysets(structural)": lambda data: list(make_bitcoin_keysets(
+        data["wif_keys"], workers=1, validation=ValidationLevel.STRUCTURAL)),
+}
+
+def measure(run: Callable, data: dict, size: int, repeat: int, min_time: float) -> dict:
+    # warm up lazily built tables and caches, and find how many loops make a timing at least min_time long
+    loops = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(loops):
+            run(data)
+        if time.perf_counter() - start >= min_time:
+            break
+        loops *= 2
+
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(loops):
+            run(data)
+        best = min(best, (time.perf_counter() - start) / loops)
+
+    tracemalloc.start()
+    run(data)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {"seconds": best, "ops_per_second": size / best, "peak_bytes": peak}
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    sizes = parser.add_mutually_exclusive_group()
+    sizes.add_argument("--sizes", type=int, nargs="+", default=list(DEFAULT_SIZES), help="corpus sizes (default: 1 1000)")
+    sizes.add_argument("--full", action="store_const", dest="sizes", const=list(FULL_SIZES),
+                       help="corpus sizes 1, 1000 and 100000")
+    parser.add_argument("--ops", nargs="+", choices=sorted(OPERATIONS), help="only run these operations")
+    parser.add_argument("--repeat", type=int, default=3, help="timed runs per benchmark, the best is kept (default: 3)")
+    parser.add_argument("--min-time", type=float, default=0.2,
+                        help="shortest timing in seconds, short benchmarks are looped (default: 0.2)")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help=f"baseline JSON file (default: {DEFAULT_BASELINE})")
+    compare = parser.add_mutually_exclusive_group()
+    compare.add_argument("--save", action="store_true", help="record the results in the baseline instead of comparing")
+    compare.add_argument("--no-baseline", action="store_true", help="only measure, don't compare against a baseline")
+    parser.add_argument("--threshold", type=float, default=0.20,
+                        help="fail if throughput drops by more than this fraction of the baseline (default: 0.20)")
+    args = parser.parse_args()
+
+    baseline = {}
+    if os.path.exists(args.baseline) and not args.no_baseline:
+        with open(args.baseline, "r", encoding="utf-8") as file:
+            baseline = json.load(file)["results"]
+    elif not (args.save or args.no_baseline):
+        print(f"❌ No baseline at {args.baseline}. Run with --save to create one or --no-baseline to only measure")
+        return 1
+    compare = not (args.save or args.no_baseline)
+
+    results = {}
+    regressions = 0
+    missing = []
+    for size in args.sizes:
+        data = corpus(size)
+        for name in args.ops or OPERATIONS:
+            key = f"{name}[{size}]"
+            result = results[key] = measure(OPERATIONS[name], data, size, args.repeat, args.min_time)
+
+            line = (f"{key:<52} {result['ops_per_second']:>12,.0f} ops/s {result['seconds'] * 1000:>10.1f} ms"
+                    f" {result['peak_bytes'] / 1024:>10,.0f} KiB peak")
+            if compare and key in baseline:
+                change = result["ops_per_second"] / baseline[key]["ops_per_second"] - 1
+                regressed = change < -args.threshold
+                regressions += regressed
+                line = f"{'❌' if regressed else '✅'} {line} {change:+7.1%}"
+            elif compare:
+                missing.append(key)
+                line = f"❌ {line}  no baseline"
+            print(line)
+
+    if args.save:
+        with open(args.baseline, "w", encoding="utf-8") as file:
+            json.dump({"python": platform.python_version(), "machine": platform.machine(),
+                       "results": {**baseline, **results}}, file, indent=2, sort_keys=True)
+        print(f"Saved baseline to {args.baseline}")
+    if regressions:
+        print(f"❌ {regressions} benchmarks regressed by more than {args.threshold:.0%}")
+    if missing:
+        print(f"❌ {len(missing)} benchmarks have no baseline. Record them with --save or pass --no-baseline")
+    return 1 if regressions or missing else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,34 @@
+"""
+Shared runner for the offline correctness checks (btc_checks, xrpl_checks).
+
+A check is a function that returns if it passed and raises (CheckFailed from
+expect(), or anything else) if it didn't.
+"""
+import argparse
+import time
+from typing import Callable
+
+class CheckFailed(Exception):
+    pass
+
+def expect(condition: bool, message: str):
+    if not condition:
+        raise CheckFailed(message)
+
+def run_checks(description: str, checks: dict[str, Callable[[], None]]) -> int:
+    """Run the checks named with --only (default: all), print a ✅ or ❌ line for each and return the exit status"""
+    parser = argparse.ArgumentParser(description=description)
+    parser.add_argument("--only", nargs="+", choices=checks, help="run just these checks")
+    args = parser.parse_args()
+
+    failed = False
+    for name in args.only or checks:
+        start = time.perf_counter()
+        try:
+            checks[name]()
+            print(f"✅ {name:<32} {time.perf_counter() - start:6.2f} s")
+        except Exception as e:
+            failed = True
+            detail = e if isinstance(e, CheckFailed) else f"{type(e).__name__}: {e}"
+            print(f"❌ {name:<32} {time.perf_counter() - start:6.2f} s  {detail}")
+    return 1 if failed else 0
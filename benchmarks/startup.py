@@ -0,0 +1,63 @@
+"""
+Cold start benchmark for the btccli and xrpcli packages.
+
+Imports each target in a fresh interpreter with `python -X importtime`, takes the
+median cumulative import time over several runs and fails if it is over budget or
+if a module that should only be loaded on demand (yfinance, pandas, xrpl, ...) was
+imported.
+
+    python -m benchmarks.startup [--runs 5] [--budget-ms 100]
+"""
+import argparse
+import statistics
+import subprocess
+import sys
+
+# module -> cold import budget in milliseconds
+TARGETS = {
+    "btccli.btc_keys": 100,
+    "btccli.electrum": 100,
+    "xrpcli.config": 100,
+    "xrpcli.account": 100,
+    "xrpcli.transactions": 100,
+    "xrpcli.utils": 100,
+}
+
+# Heavy modules none of the targets may import until they are actually used
+LAZY_MODULES = ("yfinance", "pandas", "numpy", "xrpl", "ecdsa", "bitcoinutils")
+
+def import_profile(module: str) -> dict[str, int]:
+    """Cumulative import time in microseconds of every module loaded by importing `module`"""
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                            capture_output=True, text=True, check=True)
+    profile = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        profile[name.strip()] = int(cumulative)
+    return profile
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5, help="interpreter starts per target (default: 5)")
+    parser.add_argument("--budget-ms", type=float, help="override the budget for every target")
+    args = parser.parse_args()
+
+    failures = 0
+    for module, budget_ms in TARGETS.items():
+        budget_ms = args.budget_ms if args.budget_ms is not None else budget_ms
+        profiles = [import_profile(module) for _ in range(args.runs)]
+        median_ms = statistics.median(profile[module] for profile in profiles) / 1000
+        eager = sorted({name for profile in profiles for name in profile if name.split(".")[0] in LAZY_MODULES})
+
+        ok = median_ms <= budget_ms and not eager
+        failures += not ok
+        print(f"{'✅' if ok else '❌'} {module:<22} {median_ms:8.1f} ms (budget {budget_ms:.0f} ms)")
+        if eager:
+            print(f"   imported eagerly: {', '.join(eager)}")
+
+    return 1 if failures else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
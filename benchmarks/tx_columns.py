@@ -0,0 +1,59 @@
+"""
+Columnar transaction summary benchmark.
+
+Builds a synthetic account history, converts it to columns and times each
+aggregate. Runs offline; no rippled connection is needed.
+
+    python -m benchmarks.tx_columns [--count 100000]
+"""
+import argparse
+import random
+import time
+
+from xrpcli.tx_columns import to_columns
+
+ACCOUNT = "rAccountUnderTestXXXXXXXXXXXXXXXXX"
+
+def synthetic_history(count: int, seed: int = 1) -> list[dict]:
+    rng = random.Random(seed)
+    peers = [f"rPeer{i:030d}" for i in range(200)]
+    types = ["Payment"] * 8 + ["OfferCreate", "TrustSet"]
+    history = []
+    for i in range(count):
+        outgoing = rng.random() < 0.5
+        peer = rng.choice(peers)
+        tx_json = {
+            "TransactionType": rng.choice(types),
+            "Account": ACCOUNT if outgoing else peer,
+            "Destination": peer if outgoing else ACCOUNT,
+            "DeliverMax": str(rng.randrange(1, 10**10)),
+            "Fee": str(rng.randrange(10, 100)),
+            "date": 700_000_000 + i * 600,
+        }
+        meta = {"TransactionResult": "tesSUCCESS", "delivered_amount": tx_json["DeliverMax"]}
+        if rng.random() >= 0.95:
+            meta = {"TransactionResult": "tecPATH_DRY"}
+        history.append({"tx_json": tx_json, "meta": meta, "ledger_index": 80_000_000 + i})
+    return history
+
+def timed(label: str, func):
+    start = time.perf_counter()
+    result = func()
+    print(f"{label:<26}: {(time.perf_counter() - start) * 1000:8.2f} ms")
+    return result
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--count", type=int, default=100_000)
+    args = parser.parse_args()
+
+    history = synthetic_history(args.count)
+    print(f"{args.count} transactions")
+    columns = timed("to_columns", lambda: to_columns(ACCOUNT, history))
+    timed("total_fees", columns.total_fees)
+    timed("net_flow_by_counterparty", columns.net_flow_by_counterparty)
+    timed("volume_by_month", columns.volume_by_month)
+    timed("count_by_type", columns.count_by_type)
+
+if __name__ == "__main__":
+    main()
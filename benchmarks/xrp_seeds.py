@@ -0,0 +1,50 @@
+"""
+Throughput of bulk XRP seed to config derivation.
+
+Derives configs for a deterministic set of secp256k1 seeds with calculate_configs()
+at each worker count and reports seeds per second and the speedup over one worker.
+Runs fully offline.
+
+    python -m benchmarks.xrp_seeds [--count 1000] [--workers 1 2 4] [--check]
+"""
+import argparse
+import hashlib
+import os
+import sys
+import time
+
+from xrpcli.config import calculate_configs
+
+def seeds(count: int) -> list[str]:
+    """`count` family seeds with entropy derived from a counter, the same on every run"""
+    from xrpl import CryptoAlgorithm
+    from xrpl.core.addresscodec import encode_seed
+
+    return [encode_seed(hashlib.sha256(b"xrpcli-benchmark" + i.to_bytes(8, 'big')).digest()[:16], CryptoAlgorithm.SECP256K1)
+            for i in range(count)]
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--count", type=int, default=1000, help="number of seeds (default: 1000)")
+    parser.add_argument("--workers", type=int, nargs="+", help="worker counts to time (default: 1 and one per CPU)")
+    parser.add_argument("--chunksize", type=int, default=64, help="seeds per chunk sent to a worker (default: 64)")
+    parser.add_argument("--check", action="store_true", help="also fully validate each config")
+    args = parser.parse_args()
+
+    corpus = seeds(args.count)
+    single = None
+    for workers in args.workers or sorted({1, os.cpu_count() or 1}):
+        start = time.perf_counter()
+        failures = sum(not result.ok for result in calculate_configs(corpus, workers=workers, chunksize=args.chunksize,
+                                                                     check=args.check))
+        elapsed = time.perf_counter() - start
+        single = single or (elapsed if workers == 1 else None)
+        speedup = f" {single / elapsed:>5.2f}x" if single else ""
+        print(f"workers={workers:<3} {args.count / elapsed:>10,.1f} seeds/s {elapsed:>8.2f} s{speedup}")
+        if failures:
+            print(f"❌ {failures} of {args.count} seeds failed")
+            return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,306 @@
+"""
+Offline correctness checks of the xrpcli request functions against MockRippled.
+
+Each check starts its own mock node(s), so they run in any order and need no
+network. Prints a ✅ or ❌ line per check and exits with 1 if any failed.
+
+    python -m benchmarks.xrpl_checks [--only iter_transactions ...]
+"""
+import io
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+from contextlib import redirect_stdout
+from datetime import date, timedelta
+from itertools import islice
+
+from benchmarks.checks import CheckFailed, expect, run_checks
+from xrpcli.account import get_xrp_balance, get_xrp_balances
+from xrpcli.config import Config
+from xrpcli.mock_rippled import MockRippled
+from xrpcli.subscribe import TransactionStream
+from xrpcli.transactions import (SHARD_BUFFER_PAGES, TransactionFetchError, extract_transaction,
+                                 get_all_transactions, iter_transactions)
+
+ACCOUNT = "rMockAccount000000000000000000000"
+
+def config_for(*nodes: MockRippled) -> Config:
+    urls = [node.url for node in nodes]
+    return Config("", "", ACCOUNT, client_url=urls[0], client_urls=urls if len(urls) > 1 else None)
+
+def hashes(transactions) -> list[str]:
+    return [tx["hash"] for tx in transactions]
+
+def check_iter_transactions():
+    """Pages, shards, ledger ranges and direction all give the mock's history in ledger order"""
+    count = 2000
+    with MockRippled({ACCOUNT: count}) as node:
+        account = node.accounts[ACCOUNT]
+        expected = [account.transaction(position)["hash"] for position in range(count)]
+        config = config_for(node)
+        for shards in (1, 4):
+            for limit in (400, 37):
+                forward = hashes(iter_transactions(config, limit=limit, shards=shards))
+                expect(forward == expected, f"forward, {shards} shard(s), limit {limit}: wrong order or count ({len(forward)})")
+                backward = hashes(iter_transactions(config, forward=False, limit=limit, shards=shards))
+                expect(backward == expected[::-1],
+                       f"backward, {shards} shard(s), limit {limit}: wrong order or count ({len(backward)})")
+
+        ledger_min, ledger_max = account.ledger_of(500), account.ledger_of(999)
+        for shards in (1, 3):
+            ranged = hashes(iter_transactions(config, ledger_min, ledger_max, shards=shards))
+            expect(ranged == expected[500:1000], f"ledgers {ledger_min}-{ledger_max}, {shards} shard(s): got {len(ranged)}")
+
+        expect(hashes(get_all_transactions(config)) == expected[::-1],
+               "get_all_transactions is not the whole history newest first")
+
+def check_iter_transactions_early_close():
+    """Closing a sharded stream early stops the shard threads fetching"""
+    with MockRippled({ACCOUNT: 20_000}) as node:
+        stream = iter_transactions(config_for(node), limit=20, shards=4)
+        expect(len(list(islice(stream, 10))) == 10, "fewer than 10 transactions")
+        stream.close()
+        time.sleep(0.2)  # let any request already in flight land
+        after_close = node.requests["account_tx"]
+        time.sleep(0.5)
+        expect(node.requests["account_tx"] == after_close,
+               f"shards kept fetching after close: {after_close} -> {node.requests['account_tx']} requests")
+        expect(after_close < 20_000 // 20, f"{after_close} requests, the whole history was fetched")
+
+def check_iter_transactions_backpressure():
+    """Shards ahead of the caller stop fetching after SHARD_BUFFER_PAGES pages instead of buffering their whole slice"""
+    shards = 4
+    with MockRippled({ACCOUNT: 20_000}) as node:
+        stream = iter_transactions(config_for(node), limit=20, shards=shards)
+        expect(len(list(islice(stream, 10))) == 10, "fewer than 10 transactions")
+        time.sleep(0.5)
+        # one page in each shard's hands and one being put, on top of the queued ones, plus the ledger range request
+        bound = shards * (SHARD_BUFFER_PAGES + 2) + 1
+        expect(node.requests["account_tx"] <= bound,
+               f"{node.requests['account_tx']} requests while the caller read 10 transactions, expected at most {bound}")
+        stream.close()
+
+def check_iter_transactions_errors():
+    """A failing node raises TransactionFetchError; get_all_transactions reports it and returns what it has"""
+    with MockRippled({ACCOUNT: 100}, error_rate=1.0) as node:
+        config = config_for(node)
+        try:
+            list(iter_transactions(config))
+            raise CheckFailed("no TransactionFetchError from a node answering tooBusy")
+        except TransactionFetchError:
+            pass
+        output = io.StringIO()
+        with redirect_stdout(output):
+            transactions = get_all_transactions(config)
+        expect(transactions == [], f"get_all_transactions returned {len(transactions)} transactions")
+        expect("Failed to retrieve transactions" in output.getvalue(), "get_all_transactions did not report the error")
+
+def check_failover():
+    """Reads, single and batched, succeed across dead, busy and slow nodes, are hedged off the slow one, and submits are sent once"""
+    from xrpl.models.requests import SubmitOnly
+
+    slow_latency = 0.5
+    with (MockRippled({ACCOUNT: 1000}, http_error_rate=1.0) as dead,
+          MockRippled({ACCOUNT: 1000}, error_rate=1.0) as busy,
+          MockRippled({ACCOUNT: 1000}, latency=slow_latency) as slow,
+          MockRippled({ACCOUNT: 1000}) as healthy):
+        config = config_for(dead, busy, slow, healthy)
+        expected = hashes(iter_transactions(config_for(healthy)))
+        expect(hashes(iter_transactions(config, limit=100)) == expected, "history through the pool differs")
+
+        latencies = []
+        with redirect_stdout(io.StringIO()):
+            for _ in range(40):
+                start = time.perf_counter()
+                balance = get_xrp_balance(config)
+                latencies.append(time.perf_counter() - start)
+                expect(balance is not None, "get_xrp_balance failed through the pool")
+        latencies.sort()
+        expect(latencies[len(latencies) // 2] < slow_latency,
+               f"median read took {latencies[len(latencies) // 2]:.2f} s, the slow node was not hedged around")
+
+        missing = "rMockMissing00000000000000000000"
+        batch = get_xrp_balances([ACCOUNT, missing], client=config.client())
+        expect(batch.balances == {ACCOUNT: balance} and list(batch.errors) == [missing],
+               f"the batch API through the pool gave {batch.balances} and errors for {list(batch.errors)}")
+
+        status = {entry["url"]: entry for entry in config.client().pool.status()}
+        expect(status[dead.url]["failures"] > 0 and status[busy.url]["failures"] > 0,
+               "failing nodes were not put in cooldown")
+
+        submits = config_for(busy, healthy)
+        for _ in range(10):
+            submits.client().request(SubmitOnly(tx_blob="00"))
+        sent = busy.requests.get("submit", 0) + healthy.requests.get("submit", 0)
+        expect(sent == 10, f"10 submits reached the nodes {sent} times")
+
+def check_transaction_stream():
+    """Following an account shows each new transaction once: live, and caught up after a dropped connection"""
+    with MockRippled({ACCOUNT: 50}, ws_port=0) as node:
+        config = config_for(node)
+        shown = get_all_transactions(config)
+        last_ledger = max(tx["ledger_index"] for tx in shown)
+        # what xrpl_keys.py --follow does after showing the history
+        stream = TransactionStream([config], url=node.ws_url, since_ledger=last_ledger, idle_timeout=1.0,
+                                   reconnect_delay=0.1, known_hashes=[tx["hash"] for tx in shown])
+        finished = threading.Event()
+        received = []
+        expected = 9
+
+        def drive():
+            while not stream.connects and not finished.wait(0.05):
+                pass
+            for _ in range(3):
+                node.close_ledger({ACCOUNT: 1})
+            while len(received) < 3 and not finished.wait(0.05):
+                pass
+            # the stream only notices after idle_timeout, so these are caught up after the reconnect
+            node.drop_connections()
+            node.close_ledger({ACCOUNT: 3})
+            node.close_ledger({ACCOUNT: 1})
+            while stream.connects < 2 and not finished.wait(0.05):
+                pass
+            node.close_ledger({ACCOUNT: 2})
+            # keep the stream yielding so the check below can give up if something went missing
+            while not finished.wait(0.5):
+                node.close_ledger({ACCOUNT: 1})
+
+        driver = threading.Thread(target=drive, daemon=True)
+        driver.start()
+        deadline = time.monotonic() + 20
+        try:
+            for tx in stream:
+                received.append(tx)
+                if len(received) >= expected or time.monotonic() > deadline:
+                    break
+        finally:
+            finished.set()
+            driver.join()
+
+        added = node.accounts[ACCOUNT].added
+        expect(stream.connects >= 2, f"{stream.connects} connection(s), the drop was not noticed")
+        expect(hashes(received) == hashes(added[:expected]),
+               f"stream gave {len(received)} transactions, {len(set(hashes(received)) & set(hashes(shown)))} of them "
+               f"already shown, {len(set(hashes(added[:expected])) - set(hashes(received)))} missed")
+        # more can come from catch-up if they land while it runs, but the 4 sent while down can't come live
+        expect(stream.caught_up >= 4, f"{stream.caught_up} transactions came from catch-up, expected at least 4")
+
+def check_fee_monitor():
+    """The fee windows keep only the latest samples, their statistics match them, and the recommended fee follows"""
+    from xrpcli.fees import FeeMonitor, RollingWindow, fetch_fee_sample
+
+    window = RollingWindow(4)
+    for value in (50, 10, 40, 30, 20, 60):
+        window.append(value)
+    expect((len(window), window.mean(), window.min(), window.max(), window.percentile(50), window.percentile(100))
+           == (4, 37.5, 20, 60, 40, 60), "RollingWindow didn't evict the oldest values")
+
+    size = 5
+    with MockRippled({ACCOUNT: 1}) as node:
+        config = config_for(node)
+        monitor = FeeMonitor(config, window=size)
+        samples = []
+        for _ in range(12):
+            samples.append(monitor.sample())
+        kept = sorted(sample.open_ledger_fee for sample in samples[-size:])
+        stats = monitor.stats()["open_ledger_fee"]
+        expect(stats == {"latest": samples[-1].open_ledger_fee, "mean": sum(kept) / size, "p50": kept[size // 2],
+                         "p90": kept[-1], "min": kept[0], "max": kept[-1]},
+               f"open_ledger_fee stats {stats} over the last {size} samples {kept}")
+
+        expected = max(samples[-1].open_ledger_fee, samples[-1].minimum_fee, kept[int(0.75 * size)])
+        expect(monitor.recommended_fee() == expected, f"recommended fee {monitor.recommended_fee()}, expected {expected}")
+        expect(monitor.recommended_fee(max_fee=15) == 15, "recommended_fee ignored max_fee")
+
+        before = node.requests["fee"]
+        expect(monitor.sample_many(3, interval=0) == 3 and node.requests["fee"] == before + 3, "sample_many didn't take 3 samples")
+        with monitor:
+            time.sleep(0.3)
+        expect(monitor.errors == 0 and node.requests["fee"] > before + 3, "polling took no samples")
+
+    with MockRippled({ACCOUNT: 1}, error_rate=1.0) as busy:
+        monitor = FeeMonitor(config_for(busy))
+        expect(monitor.sample_many(2, interval=0) == 0 and monitor.errors == 2, "failed samples weren't counted")
+        try:
+            fetch_fee_sample(config_for(busy))
+            raise CheckFailed("no RuntimeError from a node answering tooBusy")
+        except RuntimeError:
+            pass
+
+def partial_payment(amount: str, delivered: str, date: int = 700_000_000) -> dict:
+    """An incoming XRP Payment with tfPartialPayment that delivered less than its Amount"""
+    return {"hash": "PARTIAL", "ledger_index": 80_000_000,
+            "tx_json": {"TransactionType": "Payment", "Account": "rSender", "Destination": ACCOUNT, "DeliverMax": amount,
+                        "Flags": 0x00020000, "Fee": "12", "date": date},
+            "meta": {"TransactionResult": "tesSUCCESS", "delivered_amount": delivered}}
+
+def check_delivered_amount():
+    """Partial payments count, and are exported, for what they delivered, not their Amount"""
+    from xrpcli.tx_columns import to_columns
+
+    partial = partial_payment("1000000000", "1500000")
+    without_meta = {**partial, "meta": None}
+    unavailable = {**partial, "meta": {"TransactionResult": "tesSUCCESS", "delivered_amount": "unavailable"}}
+    columns = to_columns(ACCOUNT, [partial, without_meta, unavailable])
+    expect(columns.amount.tolist() == [1_500_000, 1_000_000_000, 1_000_000_000],
+           f"to_columns amounts {columns.amount.tolist()}, expected delivered_amount unless there is no metadata")
+    net_flow = to_columns(ACCOUNT, [partial]).net_flow_by_counterparty()
+    expect(net_flow == {"rSender": 1_500_000}, f"net flow {net_flow}")
+    fields = extract_transaction(partial)
+    expect((fields["amount"], fields["ledger_index"]) == ("1500000", 80_000_000),
+           f"exported amount {fields['amount']} and ledger {fields['ledger_index']}, expected 1500000 in 80000000")
+
+def check_price_cache():
+    """A failed price fetch is not cached as missing days; partial payments are valued at what they delivered"""
+    from xrpcli.prices import (CachedPriceProvider, FixturePriceProvider, PriceFetchError, PriceProvider,
+                               transaction_date, value_transactions)
+
+    class FlakyProvider(FixturePriceProvider):
+        failures = 1
+
+        def daily_prices(self, start: date, end: date) -> dict[date, float]:
+            if self.failures:
+                self.failures -= 1
+                raise PriceFetchError("network blip")
+            return super().daily_prices(start, end)
+
+    try:
+        PriceProvider()
+        raise CheckFailed("PriceProvider can be instantiated without its abstract methods")
+    except TypeError:
+        pass
+
+    tx = partial_payment("1000000000", "1500000")
+    day = transaction_date(tx)
+    source = FlakyProvider({day - timedelta(days=i): 2.0 for i in range(10)})
+    with tempfile.TemporaryDirectory() as directory:
+        cache_path = os.path.join(directory, "prices.json")
+        provider = CachedPriceProvider(source, cache_path=cache_path)
+        with redirect_stdout(io.StringIO()):
+            failed = value_transactions([tx], provider)
+        expect(failed == [None], f"values {failed} after a failed fetch")
+        expect(not os.path.exists(cache_path), "a failed fetch was written to the cache")
+
+        values = value_transactions([tx], provider)
+        expect(values == [3.0], f"values {values}, expected 1.5 XRP delivered at $2")
+        with open(cache_path, "r", encoding="utf-8") as file:
+            cached = json.load(file)["XRP-USD"]["daily"]
+        expect(cached.get(day.isoformat()) == 2.0 and None not in cached.values(), f"cache {cached}")
+
+CHECKS = {
+    "iter_transactions": check_iter_transactions,
+    "iter_transactions_early_close": check_iter_transactions_early_close,
+    "iter_transactions_backpressure": check_iter_transactions_backpressure,
+    "iter_transactions_errors": check_iter_transactions_errors,
+    "failover": check_failover,
+    "transaction_stream": check_transaction_stream,
+    "fee_monitor": check_fee_monitor,
+    "delivered_amount": check_delivered_amount,
+    "price_cache": check_price_cache,
+}
+
+if __name__ == "__main__":
+    sys.exit(run_checks(__doc__.strip().splitlines()[0], CHECKS))
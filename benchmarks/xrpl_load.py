@@ -0,0 +1,119 @@
+"""
+Load test of the xrpcli request functions against a mock rippled.
+
+Starts MockRippled (or uses --url) with one account of --transactions transactions,
+then runs each scenario from --concurrency threads for --duration seconds and
+reports throughput, latency percentiles and failures. The history walk instead runs
+--walks times in total, from min(--concurrency, --walks) threads. --latency, --jitter, --error-rate and --http-error-rate make the node slow
+or flaky; --nodes N starts N such nodes and uses the failover client across them.
+Runs fully offline.
+
+    python -m benchmarks.xrpl_load [--transactions 1000000] [--latency 0.02 --error-rate 0.01] [--nodes 3]
+"""
+import argparse
+import io
+import sys
+import threading
+import time
+from contextlib import ExitStack, redirect_stdout
+
+from xrpcli.account import get_xrp_balance
+from xrpcli.config import Config
+from xrpcli.mock_rippled import MockRippled
+from xrpcli.transactions import get_all_transactions
+from xrpcli.utils import get_xrp_fees
+
+ACCOUNT = "rMockAccount000000000000000000000"
+
+def percentile(values: list[float], p: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(p / 100 * len(ordered)))] if ordered else 0.0
+
+def run_scenario(call, configs: list[Config], duration: float, calls: int | None = None) -> dict:
+    """Call call(config) from one thread per config until duration has passed (or `calls` calls in total)"""
+    latencies = []
+    failures = 0
+    lock = threading.Lock()
+    deadline = time.perf_counter() + duration
+    remaining = [calls]
+
+    def worker(config: Config):
+        nonlocal failures
+        while True:
+            with lock:
+                if remaining[0] is not None:
+                    if remaining[0] <= 0:
+                        return
+                    remaining[0] -= 1
+            if remaining[0] is None and time.perf_counter() >= deadline:
+                return
+            start = time.perf_counter()
+            try:
+                ok = call(config)
+            except Exception:
+                ok = False
+            elapsed = time.perf_counter() - start
+            with lock:
+                latencies.append(elapsed)
+                failures += not ok
+
+    start = time.perf_counter()
+    threads = [threading.Thread(target=worker, args=(config,)) for config in configs]
+    # the xrpcli functions print their results and report failures by returning None or less data.
+    # sys.stdout is process wide, so it is swapped once here rather than in each thread.
+    with redirect_stdout(io.StringIO()):
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    elapsed = time.perf_counter() - start
+    return {"calls": len(latencies), "failures": failures, "seconds": elapsed,
+            "calls_per_second": len(latencies) / elapsed if elapsed else 0.0,
+            "p50": percentile(latencies, 50), "p90": percentile(latencies, 90),
+            "p99": percentile(latencies, 99), "max": max(latencies, default=0.0)}
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--url", action="append", help="use this (mock) node instead of starting one, repeat for several")
+    parser.add_argument("--transactions", type=int, default=20_000, help="transactions in the account history (default: 20000)")
+    parser.add_argument("--nodes", type=int, default=1, help="mock nodes to start, more than 1 uses failover (default: 1)")
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds the mock adds to every request")
+    parser.add_argument("--jitter", type=float, default=0.0, help="up to this many more random seconds per request")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of requests answered with tooBusy")
+    parser.add_argument("--http-error-rate", type=float, default=0.0, help="fraction of requests answered with HTTP 503")
+    parser.add_argument("--concurrency", type=int, default=4, help="threads per scenario (default: 4)")
+    parser.add_argument("--duration", type=float, default=5.0, help="seconds per request scenario (default: 5)")
+    parser.add_argument("--walks", type=int, default=1, help="full history walks for get_all_transactions, spread over up to --concurrency threads (default: 1)")
+    args = parser.parse_args()
+
+    with ExitStack() as stack:
+        urls = args.url or [stack.enter_context(MockRippled(
+            {ACCOUNT: args.transactions}, latency=args.latency, jitter=args.jitter, error_rate=args.error_rate,
+            http_error_rate=args.http_error_rate, seed=node)).url for node in range(args.nodes)]
+
+        def config() -> Config:
+            # one config, so one client, per thread
+            return Config("", "", ACCOUNT, client_url=urls[0], client_urls=urls if len(urls) > 1 else None)
+
+        scenarios = [
+            ("get_all_transactions", lambda c: len(get_all_transactions(c)) == args.transactions,
+             min(args.concurrency, args.walks), args.walks),
+            ("get_xrp_balance", lambda c: get_xrp_balance(c) is not None, args.concurrency, None),
+            ("get_xrp_fees", lambda c: get_xrp_fees(c) is not None, args.concurrency, None),
+        ]
+        print(f"🔹 {len(urls)} node(s), {args.transactions:,} transactions, latency {args.latency * 1000:.0f} ms"
+              f" +{args.jitter * 1000:.0f} ms, tooBusy {args.error_rate:.1%}, 503 {args.http_error_rate:.1%}")
+        failed = False
+        for name, call, threads, calls in scenarios:
+            result = run_scenario(call, [config() for _ in range(threads)], args.duration, calls)
+            rate = (f"{result['calls'] * args.transactions / result['seconds']:>10,.0f} tx/s" if calls
+                    else f"{result['calls_per_second']:>10,.1f} calls/s")
+            print(f"{'❌' if result['failures'] else '✅'} {name:<22} {result['calls']:>6} calls {rate}"
+                  f"  p50 {result['p50'] * 1000:>8.1f} ms  p90 {result['p90'] * 1000:>8.1f} ms"
+                  f"  p99 {result['p99'] * 1000:>8.1f} ms  max {result['max'] * 1000:>8.1f} ms"
+                  f"  {result['failures']} failed")
+            failed |= bool(result["failures"])
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
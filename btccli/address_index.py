@@ -0,0 +1,311 @@
+"""
+On-disk index answering "which of our keys owns this address / hash160?".
+
+An index file is a small header followed by fixed-width records sorted by
+(lookup key, address type):
+
+    lookup key     32 bytes  hash160 (zero padded) or Taproot x-only output key
+    address type    1 byte   AddressType
+    public key     33 bytes  compressed public key of the owning keyset
+    private key    32 bytes  only when the index was built with include_private_keys=True
+
+Every keyset contributes one record per address type. A P2PKH address of the
+compressed key (as BIP44 wallets use) has no record of its own: it commits to the
+same hash160 as the P2WPKH address, so lookup_address finds it through that record.
+
+Files are opened with mmap and searched by binary search, so a lookup touches a
+handful of pages no matter how large the index is. append() writes a new sorted
+segment next to the main file and lookups search every segment, returning each
+entry once even if several segments have it. merge() folds the segments back into
+the main file, and append() does so itself once there are more than max_segments.
+
+Private keys are only stored when explicitly asked for.
+"""
+import heapq
+import mmap
+import os
+import struct
+import tempfile
+from dataclasses import dataclass
+from enum import IntEnum
+from typing import Iterable, Iterator
+
+from btccli.btc_keys import BitcoinKeys
+from btccli.keys import decode_base58check, decode_segwit_address, hash160
+
+_MAGIC = b"BTCAIDX1"
+_HEADER = struct.Struct("<8sII")  # magic, version, flags
+_VERSION = 1
+_FLAG_PRIVATE_KEYS = 1
+
+_LOOKUP_KEY_SIZE = 32
+_SORT_KEY_SIZE = _LOOKUP_KEY_SIZE + 1
+_PUBLIC_RECORD_SIZE = _SORT_KEY_SIZE + 33
+_PRIVATE_RECORD_SIZE = _PUBLIC_RECORD_SIZE + 32
+
+# Records sorted in memory before spilling a run to disk while building a segment
+_RUN_SIZE = 1 << 20
+
+MAX_SEGMENTS = 8
+"""Appended segments append() allows before merging them into the main file"""
+
+class AddressType(IntEnum):
+    LEGACY = 0
+    """P2PKH, keyed by the hash160 of the uncompressed public key"""
+
+    WRAPPED_SEGWIT = 1
+    """P2SH-P2WPKH, keyed by the hash160 of the P2WPKH script"""
+
+    SEGWIT = 2
+    """P2WPKH, keyed by the hash160 of the compressed public key"""
+
+    TAPROOT = 3
+    """P2TR, keyed by the x-only output key"""
+
+@dataclass(frozen=True)
+class IndexEntry:
+    address_type: AddressType
+    lookup_key: bytes
+    """hash160 (20 bytes) or Taproot output key (32 bytes)"""
+
+    comp_pub_key: bytes
+    """Compressed public key of the keyset that owns the address"""
+
+    priv_key: bytes | None = None
+    """Raw private key, only if the index stores them"""
+
+    def to_keys(self) -> BitcoinKeys:
+        return BitcoinKeys(self.comp_pub_key, priv_key=self.priv_key)
+
+def address_to_lookup_key(address : str) -> tuple[AddressType, bytes]:
+    """The address type and hash160/output key an address commits to"""
+    if address.lower().startswith("bc1"):
+        witver, witprog = decode_segwit_address(address)
+        if witver == 0 and len(witprog) == 20:
+            return AddressType.SEGWIT, witprog
+        if witver == 1 and len(witprog) == 32:
+            return AddressType.TAPROOT, witprog
+    else:
+        payload = decode_base58check(address)
+        if len(payload) == 21 and payload[0] == 0x00:
+            return AddressType.LEGACY, payload[1:]
+        if len(payload) == 21 and payload[0] == 0x05:
+            return AddressType.WRAPPED_SEGWIT, payload[1:]
+    raise ValueError(f"Unsupported address {address}")
+
+def keyset_records(keys : BitcoinKeys, include_private_keys : bool = False) -> list[bytes]:
+    """The four index records (one per address type) for a keyset"""
+    suffix = keys.comp_pub_key_bytes
+    if include_private_keys:
+        if keys.priv_key_bytes is None:
+            raise ValueError(f"Keyset {keys.comp_pub_key} has no private key to store")
+        suffix += keys.priv_key_bytes
+
+    lookup_keys = (
+        (AddressType.LEGACY, keys.hash160_uncompressed),
+        (AddressType.WRAPPED_SEGWIT, hash160(b'\x00\x14' + keys.hash160)),
+        (AddressType.SEGWIT, keys.hash160),
+        (AddressType.TAPROOT, keys.taproot_output_key))
+    return [_sort_key(address_type, lookup_key) + suffix for address_type, lookup_key in lookup_keys]
+
+def build_address_index(path : str, keysets : Iterable[BitcoinKeys], include_private_keys : bool = False) -> "AddressIndex":
+    """Write a new index at path (replacing any existing one) and open it"""
+    for segment in _segment_paths(path):
+        os.remove(segment)
+    _write_segment(path, keysets, include_private_keys)
+    return AddressIndex(path)
+
+class AddressIndex:
+    """A read only view of an index file and its appended segments. Use as a context manager."""
+
+    def __init__(self, path : str):
+        self.path = path
+        self._segments = []
+        self._open_segments()
+
+    def _open_segments(self):
+        self._segments = [_Segment(p) for p in [self.path] + _segment_paths(self.path)]
+        flags = {segment.has_private_keys for segment in self._segments}
+        if len(flags) > 1:
+            raise ValueError(f"Index {self.path} mixes segments with and without private keys")
+        self.has_private_keys = flags.pop()
+
+    def __len__(self) -> int:
+        return sum(len(segment) for segment in self._segments)
+
+    def lookup_address(self, address : str) -> list[IndexEntry]:
+        """
+        Entries for the keysets that own address. Empty if none of ours do. A P2PKH
+        address of a compressed key is found as its keyset's SEGWIT entry.
+        """
+        address_type, lookup_key = address_to_lookup_key(address)
+        targets = [_sort_key(address_type, lookup_key)]
+        if address_type is AddressType.LEGACY:
+            targets.append(_sort_key(AddressType.SEGWIT, lookup_key))
+        return _unique(entry for target in targets for segment in self._segments for entry in segment.find(target))
+
+    def lookup_hash160(self, lookup_key : bytes) -> list[IndexEntry]:
+        """Entries of any address type keyed by a hash160 or Taproot output key"""
+        target = lookup_key.ljust(_LOOKUP_KEY_SIZE, b'\x00')
+        return _unique(entry for segment in self._segments for entry in segment.find(target))
+
+    def __contains__(self, address : str) -> bool:
+        return bool(self.lookup_address(address))
+
+    def append(self, keysets : Iterable[BitcoinKeys], max_segments : int | None = MAX_SEGMENTS) -> int:
+        """
+        Add keysets as a new sorted segment, then merge if that makes more than
+        max_segments appended segments (None never merges). Returns the number of
+        records written.
+        """
+        segment_path = f"{self.path}.{len(self._segments)}.seg"
+        count = _write_segment(segment_path, keysets, self.has_private_keys)
+        self._segments.append(_Segment(segment_path))
+        if max_segments is not None and len(self._segments) - 1 > max_segments:
+            self.merge()
+        return count
+
+    def merge(self):
+        """Merge every appended segment into the main file, dropping duplicate records"""
+        if len(self._segments) == 1:
+            return
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(self.path)), suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as out:
+                out.write(_header(self.has_private_keys))
+                previous = None
+                for record in heapq.merge(*(segment.records() for segment in self._segments)):
+                    if record != previous:
+                        out.write(record)
+                    previous = record
+            self.close()
+            os.replace(tmp_path, self.path)
+        except BaseException:
+            os.remove(tmp_path)
+            raise
+        for segment in _segment_paths(self.path):
+            os.remove(segment)
+        self._open_segments()
+
+    def close(self):
+        for segment in self._segments:
+            segment.close()
+        self._segments = []
+
+    def __enter__(self) -> "AddressIndex":
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+class _Segment:
+    def __init__(self, path : str):
+        with open(path, "rb") as file:
+            self._mm = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, flags = _HEADER.unpack_from(self._mm)
+        if magic != _MAGIC or version != _VERSION:
+            self._mm.close()
+            raise ValueError(f"{path} is not an address index file")
+        self.has_private_keys = bool(flags & _FLAG_PRIVATE_KEYS)
+        self.record_size = _PRIVATE_RECORD_SIZE if self.has_private_keys else _PUBLIC_RECORD_SIZE
+        self._count = (len(self._mm) - _HEADER.size) // self.record_size
+
+    def __len__(self) -> int:
+        return self._count
+
+    def _prefix(self, i : int, size : int) -> bytes:
+        offset = _HEADER.size + i * self.record_size
+        return self._mm[offset:offset + size]
+
+    def find(self, target : bytes) -> Iterator[IndexEntry]:
+        """Entries whose sort key starts with target (a full sort key or just a lookup key)"""
+        size = len(target)
+        lo, hi = 0, self._count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._prefix(mid, size) < target:
+                lo = mid + 1
+            else:
+                hi = mid
+        while lo < self._count and self._prefix(lo, size) == target:
+            yield self._entry(lo)
+            lo += 1
+
+    def _entry(self, i : int) -> IndexEntry:
+        record = self._prefix(i, self.record_size)
+        address_type = AddressType(record[_LOOKUP_KEY_SIZE])
+        lookup_key = record[:_LOOKUP_KEY_SIZE]
+        if address_type is not AddressType.TAPROOT:
+            lookup_key = lookup_key[:20]
+        return IndexEntry(address_type=address_type, lookup_key=lookup_key,
+                          comp_pub_key=record[_SORT_KEY_SIZE:_PUBLIC_RECORD_SIZE],
+                          priv_key=record[_PUBLIC_RECORD_SIZE:] if self.has_private_keys else None)
+
+    def records(self) -> Iterator[bytes]:
+        for i in range(self._count):
+            yield self._prefix(i, self.record_size)
+
+    def close(self):
+        self._mm.close()
+
+def _unique(entries : Iterable[IndexEntry]) -> list[IndexEntry]:
+    """entries without the repeats of a keyset indexed in more than one segment, in order"""
+    return list(dict.fromkeys(entries))
+
+def _sort_key(address_type : AddressType, lookup_key : bytes) -> bytes:
+    return lookup_key.ljust(_LOOKUP_KEY_SIZE, b'\x00') + bytes((address_type,))
+
+def _header(include_private_keys : bool) -> bytes:
+    return _HEADER.pack(_MAGIC, _VERSION, _FLAG_PRIVATE_KEYS if include_private_keys else 0)
+
+def _segment_paths(path : str) -> list[str]:
+    segments = []
+    while os.path.exists(f"{path}.{len(segments) + 1}.seg"):
+        segments.append(f"{path}.{len(segments) + 1}.seg")
+    return segments
+
+def _write_segment(path : str, keysets : Iterable[BitcoinKeys], include_private_keys : bool) -> int:
+    """Sort the keysets' records into path, spilling sorted runs to temporary files if there are many"""
+    runs = []
+    run = []
+    count = 0
+    try:
+        for keys in keysets:
+            run.extend(keyset_records(keys, include_private_keys))
+            if len(run) >= _RUN_SIZE:
+                runs.append(_spill_run(run))
+                run = []
+
+        run.sort()
+        record_size = _PRIVATE_RECORD_SIZE if include_private_keys else _PUBLIC_RECORD_SIZE
+        with os.fdopen(_create(path, include_private_keys), "wb") as out:
+            out.write(_header(include_private_keys))
+            previous = None
+            for record in heapq.merge(iter(run), *(_read_run(run_file, record_size) for run_file in runs)):
+                if record != previous:
+                    out.write(record)
+                    count += 1
+                previous = record
+    finally:
+        for run_file in runs:
+            run_file.close()
+    return count
+
+def _create(path : str, private : bool) -> int:
+    """Open path for writing, truncated. Files with private keys are only readable by their owner,
+    like the merge() temporary file, even if path already existed with a wider mode."""
+    fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600 if private else 0o666)
+    if private:
+        os.fchmod(fd, 0o600)
+    return fd
+
+def _spill_run(run : list[bytes]):
+    run.sort()
+    run_file = tempfile.TemporaryFile()
+    run_file.writelines(run)
+    run_file.seek(0)
+    return run_file
+
+def _read_run(run_file, record_size : int) -> Iterator[bytes]:
+    while record := run_file.read(record_size):
+        yield record
@@ -1,43 +1,182 @@
 from dataclasses import dataclass
+from enum import Enum
+from functools import partial
+from itertools import islice
+from typing import Iterable, Iterator
 
-from btccli.keys import (comp_public_key_to_segwit_address,
-                             comp_public_key_to_taproot_address,
-                             comp_public_key_to_wrapped_segwit_address,
-                             compressed_to_uncompressed_pubkey,
-                             private_key_to_public_key, private_key_to_wif,
-                             uncomp_public_key_to_legacy_address,
-                             uncompressed_to_compressed_pubkey,
-                             wif_to_raw_private_key, is_uncompressed_public_key, is_compressed_public_key)
+from btccli import secp256k1
+from btccli.encoding import encode_segwit_addresses
+from btccli.keys import (compress_pubkey_bytes, decode_base58check,
+                             decode_segwit_address, decode_wif,
+                             decompress_pubkey_bytes, encode_wif, hash160,
+                             hash160_to_legacy_address,
+                             hash160_to_segwit_address,
+                             hash160_to_wrapped_segwit_address,
+                             hash160s_to_legacy_addresses,
+                             hash160s_to_segwit_addresses,
+                             hash160s_to_wrapped_segwit_addresses,
+                             point_to_compressed, point_to_uncompressed,
+                             private_key_bytes_to_point)
+from btccli.taproot import (output_key_to_taproot_address, taproot_output_key,
+                            taproot_output_keys)
 from btccli.utils import is_valid_hex_str
+from process_pool import map_chunks, resolve_workers
 
-@dataclass
 class BitcoinKeys:
-    wif_key: str
-    """WIF Key. Electrum private key. Prefix is 'p2wpkh:[LK]. """
+    """
+    A Bitcoin key and the addresses derived from it.
 
-    priv_key_raw: str
-    """Raw hex encoded private key. 64 hex characters"""
+    Keys are held as raw bytes and every hex string and address is derived on first
+    access and cached, so a keyset only pays for what is actually read. The public key
+    hash shared by the wrapped SegWit and native SegWit addresses is computed once.
 
-    pub_key_raw: str
-    """Raw uncompressed public key. Starts with 04. 130 hex characters"""
+    The keys can also be given as hex strings. BitcoinKeys used to be a dataclass of
+    eight strings; from_hex() takes those same fields. It is no longer a dataclass, so
+    dataclasses.asdict() and replace() don't apply; keyset_row() has every field.
+    """
+    __slots__ = ('_wif_key', '_priv_key', '_pub_key', '_comp_pub_key', '_hash160', '_hash160_uncompressed',
+                 '_taproot_output_key', '_addr_legacy', '_addr_wrapped_segwit', '_addr_segwit', '_addr_taproot')
 
-    comp_pub_key: str
-    """Compressed Public Key. Starts with 02 or 03. 66 hex characters"""
+    def __init__(self, comp_pub_key : bytes | str, pub_key : bytes | str | None = None,
+                 priv_key : bytes | str | None = None, wif_key : str | None = None):
+        self._comp_pub_key = _from_hex(comp_pub_key)
+        self._pub_key = _from_hex(pub_key)
+        self._priv_key = _from_hex(priv_key)
+        self._wif_key = wif_key or None
+        self._hash160 = None
+        self._hash160_uncompressed = None
+        self._taproot_output_key = None
+        self._addr_legacy = None
+        self._addr_wrapped_segwit = None
+        self._addr_segwit = None
+        self._addr_taproot = None
 
-    addr_legacy: str
-    """Legacy (P2PKH) Address. Starts with a 1"""
+    @classmethod
+    def from_hex(cls, wif_key : str | None = None, priv_key_raw : str | None = None, pub_key_raw : str | None = None,
+                 comp_pub_key : str | None = None, addr_legacy : str | None = None,
+                 addr_wrapped_segwit : str | None = None, addr_segwit : str | None = None,
+                 addr_taproot : str | None = None) -> "BitcoinKeys":
+        """
+        A keyset from the hex and string fields BitcoinKeys used to be constructed with,
+        in the same order. Only one of the keys is needed. Addresses that are given are
+        kept as they are, so validate() checks them against the key.
+        """
+        if comp_pub_key:
+            keys = cls(comp_pub_key, pub_key_raw or None, priv_key_raw or None, wif_key)
+        elif pub_key_raw:
+            keys = _from_pub_key(pub_key_raw, wif_key or None, priv_key_raw or None)
+        else:
+            keys = _from_priv_key(wif_key or None, priv_key_raw or None)
+        if keys._priv_key is None and keys._wif_key:
+            keys._priv_key = decode_wif(keys._wif_key)
+        keys._addr_legacy = addr_legacy or None
+        keys._addr_wrapped_segwit = addr_wrapped_segwit or None
+        keys._addr_segwit = addr_segwit or None
+        keys._addr_taproot = addr_taproot or None
+        return keys
 
-    addr_wrapped_segwit: str
-    """Wrapped SegWit Address (P2SH-P2WPKH). Starts with a 3"""
+    @property
+    def priv_key_bytes(self) -> bytes | None:
+        """Raw 32 byte private key"""
+        return self._priv_key
 
-    addr_segwit: str
-    """Native Segwit (Bech32) Address. Starts with bc1q"""
+    @property
+    def pub_key_bytes(self) -> bytes:
+        """Raw 65 byte uncompressed public key"""
+        if self._pub_key is None:
+            self._pub_key = decompress_pubkey_bytes(self._comp_pub_key)
+        return self._pub_key
+
+    @property
+    def comp_pub_key_bytes(self) -> bytes:
+        """Raw 33 byte compressed public key"""
+        return self._comp_pub_key
+
+    @property
+    def hash160(self) -> bytes:
+        """hash160 of the compressed public key. Used by the SegWit addresses"""
+        if self._hash160 is None:
+            self._hash160 = hash160(self._comp_pub_key)
+        return self._hash160
+
+    @property
+    def hash160_uncompressed(self) -> bytes:
+        """hash160 of the uncompressed public key. Used by the legacy address"""
+        if self._hash160_uncompressed is None:
+            self._hash160_uncompressed = hash160(self.pub_key_bytes)
+        return self._hash160_uncompressed
+
+    @property
+    def taproot_output_key(self) -> bytes:
+        """x-only (32 byte) Taproot output key. Used by the Taproot address"""
+        if self._taproot_output_key is None:
+            self._taproot_output_key = taproot_output_key(self._comp_pub_key)
+        return self._taproot_output_key
+
+    @property
+    def wif_key(self) -> str | None:
+        """WIF Key. Electrum private key. Prefix is 'p2wpkh:[LK]. """
+        if self._wif_key is None and self._priv_key is not None:
+            self._wif_key = encode_wif(self._priv_key)
+        return self._wif_key
+
+    @property
+    def priv_key_raw(self) -> str | None:
+        """Raw hex encoded private key. 64 hex characters"""
+        return None if self._priv_key is None else self._priv_key.hex()
+
+    @property
+    def pub_key_raw(self) -> str:
+        """Raw uncompressed public key. Starts with 04. 130 hex characters"""
+        return self.pub_key_bytes.hex()
+
+    @property
+    def comp_pub_key(self) -> str:
+        """Compressed Public Key. Starts with 02 or 03. 66 hex characters"""
+        return self._comp_pub_key.hex()
+
+    @property
+    def addr_legacy(self) -> str:
+        """Legacy (P2PKH) Address. Starts with a 1"""
+        if self._addr_legacy is None:
+            self._addr_legacy = hash160_to_legacy_address(self.hash160_uncompressed)
+        return self._addr_legacy
+
+    @property
+    def addr_wrapped_segwit(self) -> str:
+        """Wrapped SegWit Address (P2SH-P2WPKH). Starts with a 3"""
+        if self._addr_wrapped_segwit is None:
+            self._addr_wrapped_segwit = hash160_to_wrapped_segwit_address(self.hash160)
+        return self._addr_wrapped_segwit
+
+    @property
+    def addr_segwit(self) -> str:
+        """Native Segwit (Bech32) Address. Starts with bc1q"""
+        if self._addr_segwit is None:
+            self._addr_segwit = hash160_to_segwit_address(self.hash160)
+        return self._addr_segwit
+
+    @property
+    def addr_taproot(self) -> str:
+        """Taproot (Bech32 bc1p...) Address"""
+        if self._addr_taproot is None:
+            self._addr_taproot = output_key_to_taproot_address(self.taproot_output_key)
+        return self._addr_taproot
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, BitcoinKeys):
+            return NotImplemented
+        # the raw keys only: the same key with and without Electrum's "p2wpkh:" WIF prefix is the same keyset
+        return self._comp_pub_key == other._comp_pub_key and self._priv_key == other._priv_key
+
+    def __hash__(self) -> int:
+        return hash(self._comp_pub_key)
+
+    def __repr__(self) -> str:
+        return f"BitcoinKeys(comp_pub_key={self.comp_pub_key!r}, has_priv_key={self.has_priv_key()})"
 
-    addr_taproot: str
-    """Taproot (Bech32 bc1p...) Address"""
-    
     def has_priv_key(self) -> bool:
-        if self.wif_key or self.priv_key_raw:
+        if self._wif_key or self._priv_key:
             return True
         return False
 
@@ -62,79 +201,250 @@ class BitcoinKeys:
 
         return "\n".join(parts)
     
-    def validate(self, known_electrum_address : str | None = None):
-        if self.wif_key:
-            wif = self.wif_key[7:] if self.wif_key.startswith('p2wpkh:') else self.wif_key
-            assert self.priv_key_raw == wif_to_raw_private_key(wif)
-            assert wif == private_key_to_wif(self.priv_key_raw)
-            assert self.pub_key_raw == private_key_to_public_key(self.priv_key_raw)
-
-        assert is_uncompressed_public_key(self.pub_key_raw)
-        assert is_compressed_public_key(self.comp_pub_key)
-
-        assert self.comp_pub_key == uncompressed_to_compressed_pubkey(self.pub_key_raw)
-        assert self.pub_key_raw == compressed_to_uncompressed_pubkey(self.comp_pub_key)
-
-        assert self.addr_legacy == uncomp_public_key_to_legacy_address(self.pub_key_raw)
-        assert self.addr_wrapped_segwit == comp_public_key_to_wrapped_segwit_address(self.comp_pub_key)
-        assert self.addr_segwit == comp_public_key_to_segwit_address(self.comp_pub_key)
-        assert self.addr_taproot == comp_public_key_to_taproot_address(self.comp_pub_key)
-
-        if known_electrum_address:
-            assert known_electrum_address == self.addr_segwit
-        
+    def validate(self, known_electrum_address : str | None = None,
+                 level : "ValidationLevel" = None) -> "BitcoinKeys":
+        """
+        Check the keyset is internally consistent, raising KeyValidationError if not.
+
+        ValidationLevel.STRUCTURAL checks the encodings, that the WIF key matches the raw
+        private key, that the public key is on the curve and that its two encodings agree.
+        ValidationLevel.FULL (the default) also re-derives the public key from the private
+        key and decodes every address back to the key hash it should commit to.
+        ValidationLevel.NONE skips everything. SAMPLED only applies to batches, see
+        make_bitcoin_keysets.
+        """
+        level = ValidationLevel.FULL if level is None else ValidationLevel(level)
+        if level is ValidationLevel.SAMPLED:
+            raise ValueError("ValidationLevel.SAMPLED only applies to make_bitcoin_keysets")
+        if level is ValidationLevel.NONE:
+            return self
+
+        self._validate_structure()
+        if level is ValidationLevel.FULL:
+            self._validate_derivation()
+
+        if known_electrum_address and known_electrum_address != self.addr_segwit:
+            raise AddressMismatchError(f"Expected the address {known_electrum_address} but the key produces {self.addr_segwit}")
+
         return self
-            
 
-def make_bitcoin_keyset(key : str | bytes, known_electrum_addr : str | None = None) -> BitcoinKeys:
+    def _validate_structure(self):
+        comp_pub_key = self._comp_pub_key
+        if len(comp_pub_key) != 33 or comp_pub_key[0] not in (2, 3):
+            raise KeyValidationError(f"Invalid compressed public key {comp_pub_key.hex()}")
+
+        pub_key = self.pub_key_bytes
+        if len(pub_key) != 65 or pub_key[0] != 4:
+            raise KeyValidationError(f"Invalid uncompressed public key {pub_key.hex()}")
+        if compress_pubkey_bytes(pub_key) != comp_pub_key:
+            raise KeyValidationError(f"The uncompressed public key {pub_key.hex()} doesn't match the compressed public key {comp_pub_key.hex()}")
+        if not secp256k1.is_on_curve(int.from_bytes(pub_key[1:33], 'big'), int.from_bytes(pub_key[33:], 'big')):
+            raise KeyValidationError(f"The public key {comp_pub_key.hex()} is not on the secp256k1 curve")
+
+        if self._priv_key is not None:
+            if len(self._priv_key) != 32 or not 0 < int.from_bytes(self._priv_key, 'big') < secp256k1.N:
+                raise KeyValidationError("The private key is out of range for secp256k1")
+        if self._wif_key:
+            wif = self._wif_key[7:] if self._wif_key.startswith('p2wpkh:') else self._wif_key
+            try:
+                wif_priv_key = decode_wif(wif)
+            except ValueError as e:
+                raise KeyValidationError(f"Invalid WIF key: {e}") from e
+            if wif_priv_key != self._priv_key or wif != encode_wif(wif_priv_key):
+                raise KeyValidationError("The WIF key doesn't match the raw private key")
+
+    def _validate_derivation(self):
+        if self._priv_key is not None and point_to_uncompressed(*private_key_bytes_to_point(self._priv_key)) != self.pub_key_bytes:
+            raise KeyValidationError(f"The public key {self.comp_pub_key} doesn't belong to the private key")
+
+        if decompress_pubkey_bytes(self._comp_pub_key) != self.pub_key_bytes:
+            raise KeyValidationError(f"The compressed public key {self.comp_pub_key} doesn't decompress to {self.pub_key_raw}")
+
+        if decode_base58check(self.addr_legacy) != b'\x00' + hash160(self.pub_key_bytes):
+            raise KeyValidationError(f"The legacy address {self.addr_legacy} doesn't match the public key")
+        if decode_base58check(self.addr_wrapped_segwit) != b'\x05' + hash160(b'\x00\x14' + hash160(self._comp_pub_key)):
+            raise KeyValidationError(f"The wrapped SegWit address {self.addr_wrapped_segwit} doesn't match the public key")
+        if decode_segwit_address(self.addr_segwit) != (0, hash160(self._comp_pub_key)):
+            raise KeyValidationError(f"The SegWit address {self.addr_segwit} doesn't match the public key")
+        if decode_segwit_address(self.addr_taproot) != (1, taproot_output_key(self._comp_pub_key)):
+            raise KeyValidationError(f"The Taproot address {self.addr_taproot} doesn't match the public key")
+
+
+KEYSET_FIELDS = ("wif_key", "priv_key", "pub_key", "comp_pub_key", "addr_legacy", "addr_wrapped_segwit",
+                 "addr_segwit", "addr_taproot")
+"""Columns of keyset_row(), the same information BitcoinKeys.__str__ shows"""
+
+def keyset_row(keys : BitcoinKeys) -> tuple:
+    """A keyset as a row of KEYSET_FIELDS, for the structured output formats. Private keys are None if absent."""
+    return (keys.wif_key, keys.priv_key_raw, keys.pub_key_raw, keys.comp_pub_key, keys.addr_legacy,
+            keys.addr_wrapped_segwit, keys.addr_segwit, keys.addr_taproot)
+
+def derive_addresses(keysets : list[BitcoinKeys]) -> list[BitcoinKeys]:
+    """
+    Fill in all four addresses of every keyset using the batch encoders, and one
+    shared modular inverse for the Taproot output keys. Returns keysets.
+    """
+    for keys, output_key in zip(keysets, taproot_output_keys([keys.comp_pub_key_bytes for keys in keysets])):
+        keys._taproot_output_key = output_key
+
+    hashes = [keys.hash160 for keys in keysets]
+    addresses = zip(hash160s_to_legacy_addresses([keys.hash160_uncompressed for keys in keysets]),
+                    hash160s_to_wrapped_segwit_addresses(hashes),
+                    hash160s_to_segwit_addresses(hashes),
+                    encode_segwit_addresses("bc", 1, [keys._taproot_output_key for keys in keysets]))
+    for keys, (legacy, wrapped_segwit, segwit, taproot) in zip(keysets, addresses):
+        keys._addr_legacy = legacy
+        keys._addr_wrapped_segwit = wrapped_segwit
+        keys._addr_segwit = segwit
+        keys._addr_taproot = taproot
+    return keysets
+
+class ValidationLevel(Enum):
+    """How much checking make_bitcoin_keyset and BitcoinKeys.validate do"""
+
+    NONE = "none"
+    """No checks at all"""
+
+    STRUCTURAL = "structural"
+    """Cheap checks of the encodings and of the public key, no EC multiplication"""
+
+    FULL = "full"
+    """Structural checks plus re-deriving the public key and cross-checking every address"""
+
+    SAMPLED = "sampled"
+    """Batches only. Every Nth entry gets FULL validation and the rest STRUCTURAL"""
+
+class KeyValidationError(ValueError):
+    """A BitcoinKeys failed validation"""
+
+class AddressMismatchError(KeyValidationError):
+    """The key doesn't produce the address it was expected to produce"""
+
+
+def make_bitcoin_keyset(key : str | bytes, known_electrum_addr : str | None = None,
+                        validation : ValidationLevel = ValidationLevel.FULL) -> BitcoinKeys:
     key = bytes.hex(key) if isinstance(key, bytes) else key
 
     # is it an elecrum wif key already
     if _is_wif(key):
-        return _from_priv_key(key, None).validate(known_electrum_addr)
+        return _from_priv_key(key, None).validate(known_electrum_addr, validation)
     
     ln = len(key)
     if ln == 64 and is_valid_hex_str(key):
-        return _from_priv_key(None, key).validate(known_electrum_addr)
+        return _from_priv_key(None, key).validate(known_electrum_addr, validation)
     
-    return _from_pub_key(key).validate(known_electrum_addr)
+    return _from_pub_key(key).validate(known_electrum_addr, validation)
+
+@dataclass
+class KeysetResult:
+    index: int
+    """Position of the entry in the input iterable"""
+
+    key: str | bytes
+    """The key as it was given (WIF, raw private key or public key)"""
+
+    known_electrum_addr: str | None = None
+    """Address the key was expected to produce, if one was given"""
+
+    keys: BitcoinKeys | None = None
+    """The derived keyset. None if derivation or validation failed"""
+
+    error: Exception | None = None
+    """What went wrong for this entry. None on success"""
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+def make_bitcoin_keysets(keys : Iterable[str | bytes | tuple], workers : int | None = None,
+                         chunksize : int = 256, ordered : bool = True,
+                         validation : ValidationLevel = ValidationLevel.FULL,
+                         sample_every : int = 100) -> Iterator[KeysetResult]:
+    """
+    Derive and validate many keysets, fanning the work out over a process pool.
+
+    Each entry is either a key (anything make_bitcoin_keyset accepts) or a
+    (key, known_electrum_addr) tuple. Entries are sent to the workers in chunks of
+    `chunksize` and only a few chunks per worker are in flight at once, so the input
+    can be a lazy iterable of any length. Results come back as KeysetResult, in input
+    order unless `ordered` is False, in which case chunks are yielded as they complete.
+    A failing entry is reported in its KeysetResult rather than stopping the run.
+
+    `workers` defaults to the number of CPUs. With workers=1 everything runs in this
+    process.
+
+    `validation` is applied to every entry. With ValidationLevel.SAMPLED every
+    `sample_every`th entry (by input position) is validated FULL and the others
+    STRUCTURAL.
+    """
+    if chunksize < 1:
+        raise ValueError(f"chunksize must be at least 1 but was {chunksize}")
+    if sample_every < 1:
+        raise ValueError(f"sample_every must be at least 1 but was {sample_every}")
+
+    make_chunk = partial(_make_keyset_chunk, validation=ValidationLevel(validation), sample_every=sample_every)
+    return map_chunks(make_chunk, _chunked(keys, chunksize), resolve_workers(workers), ordered)
+
+def _chunked(keys : Iterable[str | bytes | tuple], chunksize : int) -> Iterator[list[tuple]]:
+    entries = ((index,) + (entry if isinstance(entry, tuple) else (entry, None)) for index, entry in enumerate(keys))
+    while chunk := list(islice(entries, chunksize)):
+        yield chunk
+
+def _make_keyset_chunk(chunk : list[tuple], validation : ValidationLevel, sample_every : int) -> list[KeysetResult]:
+    results = []
+    for index, key, known_electrum_addr in chunk:
+        result = KeysetResult(index=index, key=key, known_electrum_addr=known_electrum_addr)
+        try:
+            result.keys = make_bitcoin_keyset(key, validation=ValidationLevel.NONE)
+        except Exception as e:
+            result.error = e
+        results.append(result)
+
+    # the addresses are derived here in the worker, batched, rather than lazily by whoever reads the results
+    derive_addresses([result.keys for result in results if result.ok])
+
+    for result in results:
+        if not result.ok:
+            continue
+        level = validation
+        if level is ValidationLevel.SAMPLED:
+            level = ValidationLevel.FULL if result.index % sample_every == 0 else ValidationLevel.STRUCTURAL
+        try:
+            result.keys.validate(result.known_electrum_addr, level)
+        except Exception as e:
+            result.keys = None
+            result.error = e
+    return results
 
         
 def _from_priv_key(wif_key = None, raw_key = None):
     if wif_key is None and raw_key is None:
         raise ValueError("Cannot have both wif_key and raw_key empty when trying to create a BitcoinKeys from a private key")
     
-    if not raw_key:
-        raw_key = wif_to_raw_private_key(wif_key)
-    if not wif_key:
-        wif_key = private_key_to_wif(raw_key)
-    return _from_pub_key(private_key_to_public_key(raw_key), wif_key, raw_key)
+    priv_key = decode_wif(wif_key) if not raw_key else bytes.fromhex(raw_key)
+    x, y = private_key_bytes_to_point(priv_key)
+    return BitcoinKeys(point_to_compressed(x, y), point_to_uncompressed(x, y), priv_key, wif_key or None)
 
-def _from_pub_key(public_key : str, wif_key : str | None, raw_key : str | None) -> BitcoinKeys:
+def _from_pub_key(public_key : str, wif_key : str | None = None, raw_key : str | None = None) -> BitcoinKeys:
     if not is_valid_hex_str(public_key):
         raise ValueError(f"Given public key {public_key} is not a hex string")
     ln = len(public_key)
+    priv_key = bytes.fromhex(raw_key) if raw_key else None
 
     if ln == 130 and public_key.startswith('04'):
-        raw_pub_key = public_key
-        comp_pub_key = uncompressed_to_compressed_pubkey(public_key)
+        raw_pub_key = bytes.fromhex(public_key)
+        return BitcoinKeys(compress_pubkey_bytes(raw_pub_key), raw_pub_key, priv_key, wif_key)
     
     elif ln == 66 and (public_key.startswith('02') or public_key.startswith('03')):
-        comp_pub_key = public_key
-        raw_pub_key = compressed_to_uncompressed_pubkey(public_key)
+        # Recover the uncompressed key now so an x coordinate that is not on the curve is rejected here
+        comp_pub_key = bytes.fromhex(public_key)
+        return BitcoinKeys(comp_pub_key, decompress_pubkey_bytes(comp_pub_key), priv_key, wif_key)
 
     else:
         raise ValueError(f"Unrecognized public key format {public_key}")
 
-    return BitcoinKeys(
-        wif_key=wif_key,
-        priv_key_raw=raw_key,
-        pub_key_raw=raw_pub_key,
-        comp_pub_key=comp_pub_key,
-        addr_legacy=uncomp_public_key_to_legacy_address(raw_pub_key),
-        addr_wrapped_segwit=comp_public_key_to_wrapped_segwit_address(comp_pub_key),
-        addr_segwit=comp_public_key_to_segwit_address(comp_pub_key),
-        addr_taproot=comp_public_key_to_taproot_address(comp_pub_key))
+def _from_hex(key : bytes | str | None) -> bytes | None:
+    return bytes.fromhex(key) if isinstance(key, str) else key
 
 def _is_wif(key : str) -> bool:
     if key.startswith('p2wpkh:'):
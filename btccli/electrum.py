@@ -1,6 +1,169 @@
+import csv
 import json
+import os
+import sys
+from contextlib import contextmanager
+from json.decoder import scanstring
+from typing import Iterator, TextIO
+
+_WHITESPACE = " \t\n\r"
+_LONGEST_ESCAPE = 11
+"""Characters after the backslash of the longest JSON escape, a \\uXXXX\\uXXXX surrogate pair"""
 
 def load_electrum_export(file_path : str) -> dict:
     with open(file_path, "r", encoding="utf-8") as file:
         return json.load(file)
-    
+
+def iter_electrum_export(file_path : str, chunk_size : int = 1 << 16) -> Iterator[tuple[str, str]]:
+    """
+    Stream the (address, key) pairs of an Electrum private key export.
+
+    The export is a single JSON object mapping addresses to keys. It is parsed a chunk
+    at a time so memory use does not depend on the size of the file and the first
+    pairs are available before the file has been read to the end. "-" reads stdin.
+    """
+    with _open_text(file_path) as file:
+        yield from _iter_json_object_strings(file, chunk_size)
+
+def iter_key_file(file_path : str, fmt : str | None = None) -> Iterator[tuple[str | None, str]]:
+    """
+    Stream (address, key) pairs from a key file. The address is None when the file
+    doesn't give one.
+
+    Supported formats, picked from the file extension unless `fmt` is given:
+
+    - "electrum" (.json): an Electrum export, {"address": "key", ...}
+    - "ndjson" (.ndjson, .jsonl): one JSON object per line with a "key" and optionally an "address"
+    - "csv" (.csv): with a header row naming "key" and optionally "address" columns,
+      otherwise address,key or just key per row
+    - "lines" (anything else): one key per line, optionally preceded by its address and whitespace
+
+    Blank lines and lines starting with # are skipped in the line based formats.
+    """
+    fmt = fmt or _format_from_extension(file_path)
+    if fmt == "electrum":
+        yield from iter_electrum_export(file_path)
+        return
+
+    readers = {"ndjson": _iter_ndjson, "csv": _iter_csv, "lines": _iter_lines}
+    if fmt not in readers:
+        raise ValueError(f"Unknown key file format {fmt}. Expected one of electrum, {', '.join(readers)}")
+
+    with _open_text(file_path) as file:
+        yield from readers[fmt](file)
+
+def _format_from_extension(file_path : str) -> str:
+    extension = os.path.splitext(file_path)[1].lower()
+    if extension == ".json":
+        return "electrum"
+    if extension in (".ndjson", ".jsonl"):
+        return "ndjson"
+    if extension == ".csv":
+        return "csv"
+    return "lines"
+
+@contextmanager
+def _open_text(file_path : str):
+    if file_path == "-":
+        yield sys.stdin
+    else:
+        with open(file_path, "r", encoding="utf-8", newline="") as file:
+            yield file
+
+def _iter_json_object_strings(file : TextIO, chunk_size : int) -> Iterator[tuple[str, str]]:
+    buffer = ""
+    pos = 0
+    eof = False
+
+    def next_token() -> str:
+        """Skip whitespace and return the next character, reading more input as needed"""
+        nonlocal pos
+        while True:
+            while pos < len(buffer) and buffer[pos] in _WHITESPACE:
+                pos += 1
+            if pos < len(buffer):
+                return buffer[pos]
+            if eof:
+                raise ValueError("Unexpected end of Electrum export")
+            read_more()
+
+    def read_more():
+        nonlocal buffer, pos, eof
+        chunk = file.read(chunk_size)
+        eof = not chunk
+        # drop what has been consumed so the buffer stays around one chunk in size
+        buffer = buffer[pos:] + chunk
+        pos = 0
+
+    def read_string() -> str:
+        nonlocal pos
+        if next_token() != '"':
+            raise ValueError(f"Expected a JSON string in Electrum export but found {buffer[pos:pos + 20]!r}")
+        while True:
+            try:
+                value, end = scanstring(buffer, pos + 1)
+            except json.JSONDecodeError as e:
+                # only read more for a string cut off by the end of the buffer: no closing quote yet,
+                # or an escape that may continue past it. Anything else is malformed input.
+                truncated = e.msg.startswith("Unterminated string") or e.pos + _LONGEST_ESCAPE > len(buffer)
+                if eof or not truncated:
+                    raise ValueError(f"{e.msg.removesuffix(' starting at')} in Electrum export: {buffer[pos:pos + 40]!r}") from None
+                read_more()
+                continue
+            pos = end
+            return value
+
+    def expect(char : str):
+        nonlocal pos
+        if next_token() != char:
+            raise ValueError(f"Expected {char!r} in Electrum export but found {buffer[pos:pos + 20]!r}")
+        pos += 1
+
+    expect("{")
+    if next_token() == "}":
+        return
+    while True:
+        address = read_string()
+        expect(":")
+        yield address, read_string()
+        if next_token() == "}":
+            return
+        expect(",")
+
+def _iter_ndjson(file : TextIO) -> Iterator[tuple[str | None, str]]:
+    for line_number, line in enumerate(file, 1):
+        line = line.strip()
+        if not line or line.startswith("#"):
+            continue
+        record = json.loads(line)
+        if not isinstance(record, dict) or "key" not in record:
+            raise ValueError(f"Line {line_number}: expected a JSON object with a 'key'")
+        yield record.get("address"), record["key"]
+
+def _iter_csv(file : TextIO) -> Iterator[tuple[str | None, str]]:
+    rows = (row for row in csv.reader(file) if row and not row[0].startswith("#"))
+    first = next(rows, None)
+    if first is None:
+        return
+
+    header = [column.strip().lower() for column in first]
+    if "key" in header:
+        key_column = header.index("key")
+        address_column = header.index("address") if "address" in header else None
+    else:
+        key_column, address_column = (1, 0) if len(first) > 1 else (0, None)
+        rows = _prepend(first, rows)
+
+    for row in rows:
+        yield (row[address_column].strip() if address_column is not None else None), row[key_column].strip()
+
+def _iter_lines(file : TextIO) -> Iterator[tuple[str | None, str]]:
+    for line in file:
+        fields = line.split()
+        if not fields or fields[0].startswith("#"):
+            continue
+        yield (fields[0], fields[1]) if len(fields) > 1 else (None, fields[0])
+
+def _prepend(first, rest):
+    yield first
+    yield from rest
@@ -0,0 +1,320 @@
+"""
+Balances and histories of derived addresses from an Electrum server.
+
+Electrum servers (ElectrumX, Fulcrum, electrs) index outputs by scripthash: the
+reversed SHA-256 of the output script, hex encoded. Every BitcoinKeys has four
+addresses and so four scripthashes (legacy, wrapped SegWit, SegWit and Taproot).
+
+ElectrumClient keeps one connection (TLS unless tls=False) open and sends requests
+as JSON-RPC batches of `batch_size`, with up to `pipeline` batches written before
+the first response is read, so thousands of lookups cost a handful of round trips.
+Results are kept in a small LRU cache for `cache_ttl` seconds. If the server answers
+one scripthash with an error, lookup() reports it on that address and carries on.
+btccli.mock_electrum is a local stand-in server to try it against.
+
+    with ElectrumClient("electrum.blockstream.info", 50002) as client:
+        for balance in client.lookup(keysets):
+            print(balance.keys.addr_segwit, balance.confirmed)
+"""
+import hashlib
+import json
+import socket
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Iterable, Sequence
+
+from btccli.address_index import AddressType, address_to_lookup_key
+from btccli.btc_keys import BitcoinKeys
+from btccli.keys import hash160
+
+DEFAULT_PORTS = {True: 50002, False: 50001}
+"""Conventional Electrum ports with and without TLS"""
+
+PROTOCOL_VERSION = "1.4"
+
+_GET_BALANCE = "blockchain.scripthash.get_balance"
+_GET_HISTORY = "blockchain.scripthash.get_history"
+
+class ElectrumError(RuntimeError):
+    """The server returned an error or the connection failed"""
+
+def script_pubkey(address_type: AddressType, lookup_key: bytes) -> bytes:
+    """The output script for an address, from its type and hash160/output key"""
+    if address_type is AddressType.LEGACY:
+        return b'\x76\xa9\x14' + lookup_key + b'\x88\xac'
+    if address_type is AddressType.WRAPPED_SEGWIT:
+        return b'\xa9\x14' + lookup_key + b'\x87'
+    if address_type is AddressType.SEGWIT:
+        return b'\x00\x14' + lookup_key
+    if address_type is AddressType.TAPROOT:
+        return b'\x51\x20' + lookup_key
+    raise ValueError(f"Unsupported address type {address_type}")
+
+def scripthash(script: bytes) -> str:
+    return hashlib.sha256(script).digest()[::-1].hex()
+
+def address_to_scripthash(address: str) -> str:
+    return scripthash(script_pubkey(*address_to_lookup_key(address)))
+
+def keyset_scripthashes(keys: BitcoinKeys) -> dict[AddressType, str]:
+    """The scripthashes of all four of a keyset's addresses"""
+    lookup_keys = (
+        (AddressType.LEGACY, keys.hash160_uncompressed),
+        (AddressType.WRAPPED_SEGWIT, hash160(b'\x00\x14' + keys.hash160)),
+        (AddressType.SEGWIT, keys.hash160),
+        (AddressType.TAPROOT, keys.taproot_output_key))
+    return {address_type: scripthash(script_pubkey(address_type, lookup_key)) for address_type, lookup_key in lookup_keys}
+
+def keyset_address(keys: BitcoinKeys, address_type: AddressType) -> str:
+    return (keys.addr_legacy, keys.addr_wrapped_segwit, keys.addr_segwit, keys.addr_taproot)[address_type]
+
+@dataclass
+class AddressBalance:
+    address_type: AddressType
+    address: str
+    scripthash: str
+    confirmed: int
+    """Satoshis"""
+
+    unconfirmed: int
+    history: list | None = None
+    """[{"tx_hash": ..., "height": ...}, ...], only if histories were requested"""
+
+    error: str | None = None
+    """Why the server couldn't answer for this address. The amounts are 0 then."""
+
+    @property
+    def used(self) -> bool:
+        return bool(self.confirmed or self.unconfirmed or self.history)
+
+@dataclass
+class KeysetBalance:
+    keys: BitcoinKeys
+    addresses: list[AddressBalance] = field(default_factory=list)
+
+    @property
+    def confirmed(self) -> int:
+        return sum(address.confirmed for address in self.addresses)
+
+    @property
+    def unconfirmed(self) -> int:
+        return sum(address.unconfirmed for address in self.addresses)
+
+    @property
+    def used(self) -> bool:
+        return any(address.used for address in self.addresses)
+
+    @property
+    def errors(self) -> list[AddressBalance]:
+        return [address for address in self.addresses if address.error]
+
+class ElectrumClient:
+    def __init__(self, host: str, port: int | None = None, tls: bool = True, verify: bool = True,
+                 timeout: float = 30.0, batch_size: int = 100, pipeline: int = 4,
+                 cache_size: int = 100_000, cache_ttl: float = 60.0):
+        if batch_size < 1 or pipeline < 1:
+            raise ValueError("batch_size and pipeline must be at least 1")
+        self.host = host
+        self.port = port or DEFAULT_PORTS[tls]
+        self.tls = tls
+        self.verify = verify
+        """Check the server's TLS certificate. Many Electrum servers use self-signed ones."""
+
+        self.timeout = timeout
+        self.batch_size = batch_size
+        self.pipeline = pipeline
+        """Batches written ahead of the responses being read"""
+
+        self.cache_size = cache_size
+        self.cache_ttl = cache_ttl
+        self.server_version = None
+        self.requests = 0
+        """Requests sent, not counting cache hits"""
+
+        self.round_trips = 0
+        self._cache: OrderedDict[tuple[str, str], tuple[float, object]] = OrderedDict()
+        self._socket = None
+        self._reader = None
+        self._next_id = 0
+
+    def connect(self) -> "ElectrumClient":
+        if self._socket is not None:
+            return self
+        sock = socket.create_connection((self.host, self.port), timeout=self.timeout)
+        if self.tls:
+            import ssl
+
+            context = ssl.create_default_context()
+            if not self.verify:
+                context.check_hostname = False
+                context.verify_mode = ssl.CERT_NONE
+            sock = context.wrap_socket(sock, server_hostname=self.host)
+        self._socket = sock
+        self._reader = sock.makefile("rb")
+        self.server_version = self.call("server.version", "btccli", PROTOCOL_VERSION)
+        return self
+
+    def close(self):
+        if self._socket is not None:
+            try:
+                self._reader.close()
+                self._socket.close()
+            finally:
+                self._socket = self._reader = None
+
+    def __enter__(self) -> "ElectrumClient":
+        return self.connect()
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def call(self, method: str, *params):
+        """One uncached request"""
+        return self.call_many([(method, list(params))])[0]
+
+    def call_many(self, calls: Sequence[tuple[str, list]], return_errors: bool = False) -> list:
+        """
+        Results of many (method, params) requests, in order, batched and pipelined. Uncached.
+        If the server answers any with an error, raises ElectrumError, or with return_errors
+        puts the ElectrumError in place of those results.
+        """
+        if self._socket is None:
+            try:
+                self.connect()
+            except OSError as e:
+                raise ElectrumError(f"Can't connect to {self.host}:{self.port}: {e}") from e
+        try:
+            results, errors = self._call_batches(calls)
+        except (OSError, ValueError) as e:
+            # the stream is in an unknown state, start over on the next call
+            self.close()
+            raise ElectrumError(f"Connection to {self.host}:{self.port} failed: {e}") from e
+        if errors and not return_errors:
+            first = next(iter(errors.values()))
+            raise ElectrumError(f"{first}" + (f" (and {len(errors) - 1} more)" if len(errors) > 1 else ""))
+        for position, error in errors.items():
+            results[position] = error
+        return results
+
+    def _call_batches(self, calls: Sequence[tuple[str, list]]) -> tuple[list, dict[int, ElectrumError]]:
+        results = [None] * len(calls)
+        positions = {}
+        batches = []
+        for start in range(0, len(calls), self.batch_size):
+            batch = []
+            for position in range(start, min(start + self.batch_size, len(calls))):
+                method, params = calls[position]
+                self._next_id += 1
+                positions[self._next_id] = position
+                batch.append({"jsonrpc": "2.0", "id": self._next_id, "method": method, "params": params})
+            batches.append((json.dumps(batch, separators=(",", ":")).encode("utf-8") + b"\n", len(batch)))
+
+        errors = {}
+        sent = 0
+        outstanding = 0
+        while outstanding or sent < len(batches):
+            while sent < len(batches) and outstanding < self.pipeline:
+                line, count = batches[sent]
+                self._socket.sendall(line)
+                self.requests += count
+                sent += 1
+                outstanding += 1
+            line = self._reader.readline()
+            if not line:
+                raise OSError("connection closed by the server")
+            message = json.loads(line)
+            responses = message if isinstance(message, list) else [message]
+            if not any(response.get("id") in positions for response in responses):
+                continue  # a subscription notification
+            outstanding -= 1
+            self.round_trips += 1
+            for response in responses:
+                position = positions.pop(response.get("id"), None)
+                if position is None:
+                    continue
+                if response.get("error"):
+                    # keep reading so the rest of the pipeline doesn't arrive as the answer to the next call
+                    error = response["error"]
+                    message = error.get('message', error) if isinstance(error, dict) else error
+                    errors[position] = ElectrumError(f"{calls[position][0]} failed: {message}")
+                results[position] = response.get("result")
+        return results, errors
+
+    def _cached_many(self, requests: Sequence[tuple[str, str]]) -> list:
+        """Results of (method, scripthash) requests, with the uncached ones sent as one pipelined batch"""
+        now = time.monotonic()
+        results = {}
+        missing = []
+        for request in dict.fromkeys(requests):
+            cached = self._cache.get(request)
+            if cached is not None and now - cached[0] < self.cache_ttl:
+                self._cache.move_to_end(request)
+                results[request] = cached[1]
+            else:
+                missing.append(request)
+
+        for request, result in zip(missing, self.call_many([(method, [sh]) for method, sh in missing], return_errors=True)):
+            results[request] = result
+            if not isinstance(result, ElectrumError):
+                self._cache[request] = (now, result)
+                self._cache.move_to_end(request)
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+        return [results[request] for request in requests]
+
+    def get_balances(self, scripthashes: Sequence[str]) -> list[dict | ElectrumError]:
+        """{"confirmed": sats, "unconfirmed": sats} for each scripthash, or the ElectrumError the server answered with"""
+        return self._cached_many([(_GET_BALANCE, sh) for sh in scripthashes])
+
+    def get_histories(self, scripthashes: Sequence[str]) -> list[list | ElectrumError]:
+        return self._cached_many([(_GET_HISTORY, sh) for sh in scripthashes])
+
+    def lookup(self, keysets: Iterable[BitcoinKeys], history: bool = False,
+               address_types: Iterable[AddressType] = tuple(AddressType)) -> list[KeysetBalance]:
+        """
+        Balances (and optionally histories) of every address of every keyset, in one
+        pipelined batch. An address the server answered with an error has it in error.
+        """
+        keysets = list(keysets)
+        address_types = list(address_types)
+        entries = []
+        for keys in keysets:
+            scripthashes = keyset_scripthashes(keys)
+            entries += [(keys, address_type, scripthashes[address_type]) for address_type in address_types]
+        methods = (_GET_BALANCE, _GET_HISTORY) if history else (_GET_BALANCE,)
+        answers = self._cached_many([(method, sh) for _, _, sh in entries for method in methods])
+        balances = answers[::len(methods)]
+        histories = answers[1::2] if history else [None] * len(entries)
+
+        results = {id(keys): KeysetBalance(keys) for keys in keysets}
+        for (keys, address_type, sh), balance, tx_history in zip(entries, balances, histories):
+            failed = next((str(result) for result in (balance, tx_history) if isinstance(result, ElectrumError)), None)
+            if failed:
+                balance, tx_history = {}, None
+            results[id(keys)].addresses.append(AddressBalance(
+                address_type, keyset_address(keys, address_type), sh,
+                int(balance.get("confirmed", 0)), int(balance.get("unconfirmed", 0)), tx_history, failed))
+        return [results[id(keys)] for keys in keysets]
+
+def parse_server(server: str, tls: bool = True) -> tuple[str, int, bool]:
+    """
+    "host", "host:port" or Electrum's "host:port:s" (TLS) / "host:port:t" (TCP) -> (host, port, tls).
+    IPv6 hosts go in brackets ("[::1]:50002:s"), unless it's the host alone.
+    """
+    if server.startswith("["):
+        host, bracket, rest = server[1:].partition("]")
+        if not bracket or (rest and not rest.startswith(":")):
+            raise ValueError(f"Bad Electrum server {server}, expected [ipv6]:port")
+        parts = [host] + (rest[1:].split(":", 1) if rest else [])
+    elif server.count(":") > 2 or server.startswith(":"):
+        parts = [server]
+    else:
+        parts = server.split(":", 2)
+    host = parts[0]
+    port = int(parts[1]) if len(parts) > 1 and parts[1] else None
+    if len(parts) > 2:
+        if parts[2] not in ("s", "t"):
+            raise ValueError(f"Unknown Electrum server protocol {parts[2]!r} in {server}, expected s or t")
+        tls = parts[2] == "s"
+    return host, port or DEFAULT_PORTS[tls], tls
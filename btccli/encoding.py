@@ -0,0 +1,183 @@
+"""
+Address and key encodings: Base58Check (WIF, P2PKH, P2SH), bech32 (BIP173) and
+bech32m (BIP350).
+
+Each encoding has a single value and a batch function. The batch functions take a
+list of payloads or one contiguous buffer of fixed-width payloads, and reuse the
+lookup tables and per-prefix state rather than setting them up per value.
+"""
+from functools import lru_cache
+from hashlib import sha256
+from typing import Iterable
+
+B58_ALPHABET = "123456789ABCDEFGHJKLMNPQRSTUVWXYZabcdefghijkmnopqrstuvwxyz"
+_B58_INDEX = {c: i for i, c in enumerate(B58_ALPHABET)}
+
+# Base58 digits are produced 10 at a time: one big int divmod by 58^10, then the
+# 10 digit remainder is split into 5 pairs looked up in a 58^2 entry table.
+_B58_CHUNK_DIGITS = 10
+_B58_CHUNK = 58 ** _B58_CHUNK_DIGITS
+_B58_PAIRS = [a + b for a in B58_ALPHABET for b in B58_ALPHABET]
+
+BECH32_CHARSET = "qpzry9x8gf2tvdw0s3jn54khce6mua7l"
+_BECH32_REVERSE = {c: i for i, c in enumerate(BECH32_CHARSET)}
+_BECH32_GENERATOR = (0x3b6a57b2, 0x26508e6d, 0x1ea119fa, 0x3d4233dd, 0x2a1462b3)
+
+# _BECH32_TABLE[top] is the XOR of the generator terms selected by the top 5 bits of the checksum
+_BECH32_TABLE = [0] * 32
+for _top in range(32):
+    for _i in range(5):
+        if (_top >> _i) & 1:
+            _BECH32_TABLE[_top] ^= _BECH32_GENERATOR[_i]
+
+BECH32_CONST = 1
+BECH32M_CONST = 0x2bc830a3
+
+def b58encode(data: bytes) -> str:
+    """Plain Base58 (no checksum)"""
+    n = int.from_bytes(data, 'big')
+    chunks = []
+    while n:
+        n, chunk = divmod(n, _B58_CHUNK)
+        chunks.append(chunk)
+
+    digits = []
+    for chunk in reversed(chunks):
+        # 10 digits, most significant pair first
+        digits.append(_B58_PAIRS[chunk // 58 ** 8])
+        digits.append(_B58_PAIRS[chunk // 58 ** 6 % 3364])
+        digits.append(_B58_PAIRS[chunk // 58 ** 4 % 3364])
+        digits.append(_B58_PAIRS[chunk // 3364 % 3364])
+        digits.append(_B58_PAIRS[chunk % 3364])
+    encoded = "".join(digits).lstrip("1")
+
+    # every leading zero byte is encoded as a '1'
+    return "1" * (len(data) - len(data.lstrip(b'\x00'))) + encoded
+
+def b58decode(value: str) -> bytes:
+    """Plain Base58 (no checksum)"""
+    n = 0
+    try:
+        for c in value:
+            n = n * 58 + _B58_INDEX[c]
+    except KeyError:
+        raise ValueError(f"Invalid Base58 character in {value!r}") from None
+    leading_zeros = len(value) - len(value.lstrip("1"))
+    return b'\x00' * leading_zeros + n.to_bytes((n.bit_length() + 7) // 8, 'big')
+
+def b58check_encode(payload: bytes) -> str:
+    """Base58Check: Base58 of the payload and the first 4 bytes of its double SHA-256"""
+    return b58encode(payload + sha256(sha256(payload).digest()).digest()[:4])
+
+def b58check_decode(value: str) -> bytes:
+    """Decode Base58Check and return the payload. Raises ValueError on a bad checksum"""
+    data = b58decode(value)
+    payload, checksum = data[:-4], data[-4:]
+    if len(data) < 4 or sha256(sha256(payload).digest()).digest()[:4] != checksum:
+        raise ValueError(f"Invalid Base58Check checksum in {value!r}")
+    return payload
+
+def b58check_encode_batch(payloads: Iterable[bytes] | bytes, width: int | None = None, prefix: bytes = b'') -> list[str]:
+    """
+    Base58Check encode many payloads, each prefixed by `prefix` (a version byte for
+    example). `payloads` is either an iterable of bytes or one buffer of payloads
+    `width` bytes wide.
+    """
+    if width is not None:
+        payloads = _split_buffer(payloads, width)
+    result = []
+    append = result.append
+    for payload in payloads:
+        payload = prefix + payload
+        append(b58encode(payload + sha256(sha256(payload).digest()).digest()[:4]))
+    return result
+
+def b58check_decode_batch(values: Iterable[str]) -> list[bytes]:
+    return [b58check_decode(value) for value in values]
+
+@lru_cache(maxsize=16)
+def _bech32_hrp_state(hrp: str) -> int:
+    """Checksum state after the expanded human readable part, cached per hrp"""
+    return _bech32_polymod([ord(c) >> 5 for c in hrp] + [0] + [ord(c) & 31 for c in hrp])
+
+def _bech32_polymod(values, chk: int = 1) -> int:
+    table = _BECH32_TABLE
+    for value in values:
+        chk = ((chk & 0x1ffffff) << 5) ^ value ^ table[chk >> 25]
+    return chk
+
+def _to_5bit(data: bytes) -> list[int]:
+    """Regroup bytes as 5 bit values, zero padding the last group (BIP173 convertbits with pad=True)"""
+    bits = len(data) * 8
+    groups = (bits + 4) // 5
+    n = int.from_bytes(data, 'big') << (groups * 5 - bits)
+    return [(n >> shift) & 31 for shift in range(groups * 5 - 5, -1, -5)]
+
+def _from_5bit(data: list[int]) -> bytes | None:
+    """Inverse of _to_5bit. None if the padding is invalid"""
+    bits = len(data) * 5
+    length, pad = divmod(bits, 8)
+    if pad > 4:
+        return None
+    n = 0
+    for value in data:
+        n = (n << 5) | value
+    if n & ((1 << pad) - 1):
+        return None
+    return (n >> pad).to_bytes(length, 'big')
+
+def encode_segwit_address(hrp: str, witver: int, witprog: bytes) -> str:
+    """Encode a witness program as a SegWit address. Version 0 uses bech32, later versions bech32m."""
+    return encode_segwit_addresses(hrp, witver, (witprog,))[0]
+
+def encode_segwit_addresses(hrp: str, witver: int, witprogs: Iterable[bytes] | bytes, width: int | None = None) -> list[str]:
+    """
+    Batch version of encode_segwit_address for one hrp and witness version.
+    `witprogs` is an iterable of programs or one buffer of programs `width` bytes wide.
+    """
+    if width is not None:
+        witprogs = _split_buffer(witprogs, width)
+    const = BECH32_CONST if witver == 0 else BECH32M_CONST
+    start = _bech32_polymod((witver,), _bech32_hrp_state(hrp))
+    prefix = hrp + "1" + BECH32_CHARSET[witver]
+    charset = BECH32_CHARSET
+
+    result = []
+    for witprog in witprogs:
+        data = _to_5bit(witprog)
+        polymod = _bech32_polymod(data + [0] * 6, start) ^ const
+        result.append(prefix + "".join([charset[d] for d in data])
+                      + "".join([charset[(polymod >> shift) & 31] for shift in (25, 20, 15, 10, 5, 0)]))
+    return result
+
+def decode_segwit_address(hrp: str, address: str) -> tuple[int, bytes]:
+    """Decode a SegWit address to (witness version, witness program). Raises ValueError if it is invalid."""
+    if address.lower() != address and address.upper() != address:
+        raise ValueError(f"Mixed case in SegWit address {address}")
+    address = address.lower()
+    pos = address.rfind("1")
+    if pos < 1 or pos + 7 > len(address) or len(address) > 90 or address[:pos] != hrp:
+        raise ValueError(f"Invalid SegWit address {address}")
+    try:
+        data = [_BECH32_REVERSE[c] for c in address[pos + 1:]]
+    except KeyError:
+        raise ValueError(f"Invalid character in SegWit address {address}") from None
+
+    witver = data[0]
+    const = _bech32_polymod(data, _bech32_hrp_state(hrp))
+    if const != (BECH32_CONST if witver == 0 else BECH32M_CONST):
+        raise ValueError(f"Invalid checksum in SegWit address {address}")
+
+    witprog = _from_5bit(data[1:-6])
+    if witprog is None or witver > 16 or not 2 <= len(witprog) <= 40 or (witver == 0 and len(witprog) not in (20, 32)):
+        raise ValueError(f"Invalid witness program in SegWit address {address}")
+    return witver, witprog
+
+def decode_segwit_addresses(hrp: str, addresses: Iterable[str]) -> list[tuple[int, bytes]]:
+    return [decode_segwit_address(hrp, address) for address in addresses]
+
+def _split_buffer(buffer: bytes, width: int) -> list[bytes]:
+    if len(buffer) % width:
+        raise ValueError(f"Buffer of {len(buffer)} bytes is not a whole number of {width} byte payloads")
+    view = memoryview(buffer)
+    return [bytes(view[i:i + width]) for i in range(0, len(buffer), width)]
@@ -0,0 +1,339 @@
+"""
+BIP32 hierarchical deterministic keys and gap limit scanning.
+
+An HDWallet wraps a root extended key (xprv/xpub/yprv/ypub/zprv/zpub, a BIP32 seed
+or a BIP39 mnemonic) and caches every intermediate node it derives, so the account
+and chain nodes of m/84'/0'/0'/0 are computed once no matter how many children are
+taken from them. Children are derived in batches: private children only need one
+HMAC and a scalar addition each and their public keys come from one batch
+multiplication; public (xpub) children share a single modular inverse.
+
+scan() walks the receive and change chains of BIP44/49/84/86 accounts until
+`gap_limit` consecutive addresses are unused, checking each batch of addresses
+against any container of addresses, such as a set or an AddressIndex.
+
+    python -m btccli.hd XPRV_OR_XPUB --index keys.idx --purpose 84 --accounts 5
+"""
+import hashlib
+import hmac
+from dataclasses import dataclass, field
+from typing import Container, Iterable, Sequence
+
+from btccli import encoding, secp256k1, taproot
+from btccli.btc_keys import BitcoinKeys
+from btccli.keys import (decompress_pubkey_bytes, hash160, hash160s_to_legacy_addresses, hash160s_to_segwit_addresses,
+                         hash160s_to_wrapped_segwit_addresses, point_to_compressed)
+
+HARDENED = 0x80000000
+
+# (private, public) mainnet version bytes, and the purpose they imply
+VERSIONS = {
+    "x": (bytes.fromhex("0488ade4"), bytes.fromhex("0488b21e"), 44),
+    "y": (bytes.fromhex("049d7878"), bytes.fromhex("049d7cb2"), 49),
+    "z": (bytes.fromhex("04b2430c"), bytes.fromhex("04b24746"), 84),
+}
+_VERSION_PREFIX = {version: prefix for prefix, versions in VERSIONS.items() for version in versions[:2]}
+
+PURPOSES = (44, 49, 84, 86)
+"""BIP44 P2PKH, BIP49 P2SH-P2WPKH, BIP84 P2WPKH and BIP86 P2TR"""
+
+DEFAULT_GAP_LIMIT = 20
+
+class ExtendedKey:
+    """A BIP32 node. private_key is None for public (neutered) nodes."""
+
+    __slots__ = ("depth", "parent_fingerprint", "child_number", "chain_code", "private_key", "_public_key",
+                 "_fingerprint", "prefix")
+
+    def __init__(self, chain_code: bytes, private_key: bytes | None = None, public_key: bytes | None = None,
+                 depth: int = 0, parent_fingerprint: bytes = b'\x00' * 4, child_number: int = 0, prefix: str = "x"):
+        if private_key is None and public_key is None:
+            raise ValueError("An extended key needs a private or a public key")
+        self.chain_code = chain_code
+        self.private_key = private_key
+        self._public_key = public_key
+        self._fingerprint = None
+        self.depth = depth
+        self.parent_fingerprint = parent_fingerprint
+        self.child_number = child_number
+        self.prefix = prefix
+        """Version family, "x", "y" or "z", used when serializing"""
+
+    @classmethod
+    def from_seed(cls, seed: bytes, prefix: str = "x") -> "ExtendedKey":
+        """Master key for a BIP32 seed (16 to 64 bytes)"""
+        digest = hmac.new(b"Bitcoin seed", seed, hashlib.sha512).digest()
+        if not 0 < int.from_bytes(digest[:32], 'big') < secp256k1.N:
+            raise ValueError("Seed gives an invalid master key")
+        return cls(digest[32:], private_key=digest[:32], prefix=prefix)
+
+    @classmethod
+    def from_string(cls, value: str) -> "ExtendedKey":
+        """Parse a Base58Check xprv/xpub (or y/z variant)"""
+        data = encoding.b58check_decode(value)
+        if len(data) != 78 or data[:4] not in _VERSION_PREFIX:
+            raise ValueError(f"Not a mainnet extended key: {value[:12]}...")
+        version, depth, fingerprint, child_number, chain_code, key = (
+            data[:4], data[4], data[5:9], int.from_bytes(data[9:13], 'big'), data[13:45], data[45:])
+        prefix = _VERSION_PREFIX[version]
+        if version == VERSIONS[prefix][0]:
+            if key[0] != 0 or not 0 < int.from_bytes(key[1:], 'big') < secp256k1.N:
+                raise ValueError("Invalid private key in extended key")
+            return cls(chain_code, private_key=key[1:], depth=depth, parent_fingerprint=fingerprint,
+                       child_number=child_number, prefix=prefix)
+        decompress_pubkey_bytes(key)  # raises ValueError if the key is not on the curve
+        return cls(chain_code, public_key=key, depth=depth, parent_fingerprint=fingerprint,
+                   child_number=child_number, prefix=prefix)
+
+    @property
+    def is_private(self) -> bool:
+        return self.private_key is not None
+
+    @property
+    def public_key(self) -> bytes:
+        """33 byte compressed public key"""
+        if self._public_key is None:
+            self._public_key = point_to_compressed(*secp256k1.base_mult(int.from_bytes(self.private_key, 'big')))
+        return self._public_key
+
+    @property
+    def fingerprint(self) -> bytes:
+        """First 4 bytes of the public key's hash160, which every child of this node carries"""
+        if self._fingerprint is None:
+            self._fingerprint = hash160(self.public_key)[:4]
+        return self._fingerprint
+
+    def neuter(self) -> "ExtendedKey":
+        """The public only version of this node"""
+        return ExtendedKey(self.chain_code, public_key=self.public_key, depth=self.depth,
+                           parent_fingerprint=self.parent_fingerprint, child_number=self.child_number, prefix=self.prefix)
+
+    def to_string(self, prefix: str | None = None) -> str:
+        private_version, public_version, _ = VERSIONS[prefix or self.prefix]
+        key = b'\x00' + self.private_key if self.is_private else self.public_key
+        return encoding.b58check_encode((private_version if self.is_private else public_version)
+                                        + bytes((self.depth,)) + self.parent_fingerprint
+                                        + self.child_number.to_bytes(4, 'big') + self.chain_code + key)
+
+    def child(self, index: int) -> "ExtendedKey":
+        return derive_children(self, [index])[0]
+
+    def to_keys(self) -> BitcoinKeys:
+        return BitcoinKeys(self.public_key, priv_key=self.private_key)
+
+    def __repr__(self) -> str:
+        return f"ExtendedKey({'private' if self.is_private else 'public'}, depth={self.depth}, child={format_index(self.child_number)})"
+
+def derive_children(parent: ExtendedKey, indices: Iterable[int]) -> list[ExtendedKey]:
+    """
+    BIP32 child key derivation for many indices of one parent. Indices >= HARDENED
+    are hardened and need a private parent. Raises ValueError for the (roughly
+    2^-127 likely) indices BIP32 defines as invalid.
+    """
+    indices = list(indices)
+    # both are cached on the parent node, so siblings derived in later calls don't redo the EC work or hashing
+    fingerprint = parent.fingerprint
+    parent_public = parent.public_key
+
+    tweaks, chain_codes = [], []
+    for index in indices:
+        if not 0 <= index < 2 ** 32:
+            raise ValueError(f"Child index {index} is out of range")
+        if index >= HARDENED:
+            if not parent.is_private:
+                raise ValueError(f"Can't derive hardened child {format_index(index)} from a public key")
+            data = b'\x00' + parent.private_key + index.to_bytes(4, 'big')
+        else:
+            data = parent_public + index.to_bytes(4, 'big')
+        digest = hmac.new(parent.chain_code, data, hashlib.sha512).digest()
+        tweak = int.from_bytes(digest[:32], 'big')
+        if tweak >= secp256k1.N:
+            raise ValueError(f"Child {format_index(index)} is invalid")
+        tweaks.append(tweak)
+        chain_codes.append(digest[32:])
+
+    if parent.is_private:
+        k = int.from_bytes(parent.private_key, 'big')
+        scalars = [(tweak + k) % secp256k1.N for tweak in tweaks]
+        if 0 in scalars:
+            raise ValueError(f"Child {format_index(indices[scalars.index(0)])} is invalid")
+        private_keys = [scalar.to_bytes(32, 'big') for scalar in scalars]
+        public_keys = [point_to_compressed(x, y) for x, y in secp256k1.base_mult_batch(scalars)]
+    else:
+        parent_point = _point(parent_public)
+        points = [secp256k1.jacobian_add_affine(secp256k1.base_mult_jacobian(tweak), parent_point) for tweak in tweaks]
+        if any(not z for _, _, z in points):
+            raise ValueError("A child key is the point at infinity")
+        private_keys = [None] * len(indices)
+        public_keys = [point_to_compressed(x, y) for x, y in secp256k1.to_affine_batch(points)]
+
+    return [ExtendedKey(chain_code, private_key=private_key, public_key=public_key, depth=parent.depth + 1,
+                        parent_fingerprint=fingerprint, child_number=index, prefix=parent.prefix)
+            for chain_code, private_key, public_key, index in zip(chain_codes, private_keys, public_keys, indices)]
+
+def _point(comp_pub_key: bytes) -> tuple[int, int]:
+    x = int.from_bytes(comp_pub_key[1:], 'big')
+    return x, secp256k1.lift_x(x, odd=comp_pub_key[0] == 3)
+
+def parse_path(path: str | Sequence[int]) -> tuple[int, ...]:
+    """Parse "m/84'/0'/0'/0" (' h or H mark hardened indices) to a tuple of indices. Sequences pass through."""
+    if not isinstance(path, str):
+        return tuple(path)
+    parts = path.strip().split("/")
+    if parts and parts[0] in ("m", "M"):
+        parts = parts[1:]
+    indices = []
+    for part in parts:
+        hardened = part[-1:] in ("'", "h", "H")
+        number = part[:-1] if hardened else part
+        if not number.isdigit() or int(number) >= HARDENED:
+            raise ValueError(f"Invalid path component {part!r} in {path!r}")
+        indices.append(int(number) + (HARDENED if hardened else 0))
+    return tuple(indices)
+
+def format_index(index: int) -> str:
+    return f"{index - HARDENED}'" if index >= HARDENED else str(index)
+
+def format_path(path: Sequence[int]) -> str:
+    return "/".join(["m"] + [format_index(index) for index in path])
+
+def seed_from_mnemonic(mnemonic: str, passphrase: str = "") -> bytes:
+    """BIP39 seed for a mnemonic. The word list checksum is not checked."""
+    import unicodedata
+
+    mnemonic = unicodedata.normalize("NFKD", " ".join(mnemonic.split()))
+    salt = unicodedata.normalize("NFKD", "mnemonic" + passphrase)
+    return hashlib.pbkdf2_hmac("sha512", mnemonic.encode("utf-8"), salt.encode("utf-8"), 2048)
+
+def addresses_for_purpose(purpose: int, comp_pub_keys: Sequence[bytes]) -> list[str]:
+    """
+    The addresses a BIP44/49/84/86 wallet uses for these public keys. Note BIP44
+    P2PKH addresses hash the compressed key, unlike BitcoinKeys.addr_legacy; an
+    AddressIndex still finds them, through the key's SEGWIT record.
+    """
+    if purpose == 86:
+        return taproot.taproot_addresses(comp_pub_keys)
+    hashes = [hash160(key) for key in comp_pub_keys]
+    if purpose == 44:
+        return hash160s_to_legacy_addresses(hashes)
+    if purpose == 49:
+        return hash160s_to_wrapped_segwit_addresses(hashes)
+    if purpose == 84:
+        return hash160s_to_segwit_addresses(hashes)
+    raise ValueError(f"Unsupported purpose {purpose}. Expected one of {', '.join(map(str, PURPOSES))}")
+
+@dataclass
+class ScanHit:
+    path: str
+    address: str
+    key: ExtendedKey
+
+    def to_keys(self) -> BitcoinKeys:
+        return self.key.to_keys()
+
+@dataclass
+class ScanResult:
+    hits: list[ScanHit] = field(default_factory=list)
+    scanned: dict[str, int] = field(default_factory=dict)
+    """Chain path -> number of child indices derived and checked"""
+
+class HDWallet:
+    """A root extended key with a cache of the nodes derived from it"""
+
+    def __init__(self, root: ExtendedKey | str):
+        self.root = ExtendedKey.from_string(root) if isinstance(root, str) else root
+        self._nodes: dict[tuple[int, ...], ExtendedKey] = {(): self.root}
+
+    @classmethod
+    def from_seed(cls, seed: bytes) -> "HDWallet":
+        return cls(ExtendedKey.from_seed(seed))
+
+    @classmethod
+    def from_mnemonic(cls, mnemonic: str, passphrase: str = "") -> "HDWallet":
+        return cls.from_seed(seed_from_mnemonic(mnemonic, passphrase))
+
+    def node(self, path: str | Sequence[int]) -> ExtendedKey:
+        """The node at path relative to the root, derived through (and caching) every node on the way"""
+        path = parse_path(path)
+        depth = len(path)
+        while path[:depth] not in self._nodes:
+            depth -= 1
+        node = self._nodes[path[:depth]]
+        for i in range(depth, len(path)):
+            node = node.child(path[i])
+            self._nodes[path[:i + 1]] = node
+        return node
+
+    def children(self, path: str | Sequence[int], indices: Iterable[int]) -> list[ExtendedKey]:
+        """Batch derive children of the node at path. The children themselves aren't cached."""
+        return derive_children(self.node(path), indices)
+
+    def keys(self, path: str | Sequence[int], indices: Iterable[int]) -> list[BitcoinKeys]:
+        return [child.to_keys() for child in self.children(path, indices)]
+
+    def addresses(self, path: str | Sequence[int], indices: Iterable[int], purpose: int) -> list[str]:
+        return addresses_for_purpose(purpose, [child.public_key for child in self.children(path, indices)])
+
+    def account_path(self, purpose: int, account: int = 0, coin: int = 0) -> tuple[int, ...]:
+        """m/purpose'/coin'/account', or the root itself if it is already an account level key"""
+        if self.root.depth == 3:
+            return ()
+        return (purpose + HARDENED, coin + HARDENED, account + HARDENED)
+
+    def scan_chain(self, path: str | Sequence[int], addresses: Container[str], purpose: int,
+                   gap_limit: int = DEFAULT_GAP_LIMIT, result: ScanResult | None = None) -> ScanResult:
+        """Check children of the chain at path, a gap_limit sized batch at a time, until gap_limit in a row are unused"""
+        if gap_limit < 1:
+            raise ValueError(f"gap_limit must be at least 1 but was {gap_limit}")
+        path = parse_path(path)
+        result = result if result is not None else ScanResult()
+        next_index = 0
+        last_used = -1
+        while next_index - last_used <= gap_limit:
+            batch = range(next_index, next_index + gap_limit)
+            children = self.children(path, batch)
+            for index, child, address in zip(batch, children, addresses_for_purpose(purpose, [c.public_key for c in children])):
+                if address in addresses:
+                    last_used = index
+                    result.hits.append(ScanHit(format_path(path + (index,)), address, child))
+            next_index += gap_limit
+        result.scanned[format_path(path)] = next_index
+        return result
+
+    def scan(self, addresses: Container[str], purpose: int = 84, accounts: Iterable[int] = (0,),
+             gap_limit: int = DEFAULT_GAP_LIMIT, chains: Iterable[int] = (0, 1), coin: int = 0) -> ScanResult:
+        """
+        Scan the receive (0) and change (1) chains of each account. An account level
+        root (depth 3, like an account xpub) is scanned once whatever `accounts` says.
+        """
+        result = ScanResult()
+        accounts = [0] if self.root.depth == 3 else list(accounts)
+        for account in accounts:
+            account_path = self.account_path(purpose, account, coin)
+            for chain in chains:
+                self.scan_chain(account_path + (chain,), addresses, purpose, gap_limit, result)
+        return result
+
+if __name__ == "__main__":
+    import argparse
+
+    from btccli.address_index import AddressIndex
+
+    parser = argparse.ArgumentParser(description="Scan an HD wallet's accounts for addresses in an address index")
+    parser.add_argument("key", help="xprv/xpub (or y/z variant), or a BIP39 mnemonic in quotes")
+    parser.add_argument("--index", metavar="PATH", required=True, help="address index to check addresses against")
+    parser.add_argument("--purpose", type=int, choices=PURPOSES, help="default: implied by the key's version, or 84")
+    parser.add_argument("--accounts", type=int, default=1, help="number of accounts to scan (default: 1)")
+    parser.add_argument("--gap-limit", type=int, default=DEFAULT_GAP_LIMIT)
+    parser.add_argument("--passphrase", default="", help="BIP39 passphrase, with a mnemonic")
+    args = parser.parse_args()
+
+    wallet = HDWallet.from_mnemonic(args.key, args.passphrase) if " " in args.key.strip() else HDWallet(args.key)
+    purpose = args.purpose or (VERSIONS[wallet.root.prefix][2] if wallet.root.prefix != "x" else 84)
+    with AddressIndex(args.index) as index:
+        result = wallet.scan(index, purpose=purpose, accounts=range(args.accounts), gap_limit=args.gap_limit)
+    for hit in result.hits:
+        print(f"🔑 {hit.path:<24} {hit.address}")
+    for chain, scanned in result.scanned.items():
+        print(f"🔹 {chain:<24} {scanned} scanned")
+    print(f"Found {len(result.hits)} used addresses")
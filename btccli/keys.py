@@ -1,72 +1,122 @@
 import hashlib
 
-import base58
-import bech32
-import ecdsa
-from bitcoinutils.setup import setup
-from ecdsa.ecdsa import curve_secp256k1, ellipticcurve
-from bitcoinutils.keys import PublicKey
-
+from btccli import encoding, secp256k1, taproot
 from btccli.utils import is_valid_hex_str
 
-# Set up the network; use 'mainnet' for the main Bitcoin network
-setup('mainnet')
+# The bytes based helpers below are what BitcoinKeys uses internally. The hex based
+# functions further down are kept for callers that work with hex strings.
+
+def hash160(data: bytes) -> bytes:
+    """RIPEMD-160 of the SHA-256 of data"""
+    return hashlib.new('ripemd160', hashlib.sha256(data).digest()).digest()
+
+def decode_wif(wif_key: str) -> bytes:
+    """Decode a WIF key (with or without Electrum's 'p2wpkh:' prefix) to the 32 raw private key bytes"""
+    wif_key = wif_key[7:] if wif_key.startswith('p2wpkh:') else wif_key
+    decoded = decode_base58check(wif_key)
+
+    # Remove the first byte (prefix) and last byte (if compressed key)
+    return decoded[1:-1] if len(decoded) == 34 else decoded[1:]
+
+def encode_wif(private_key_bytes: bytes) -> str:
+    """Encode 32 raw private key bytes as a compressed mainnet WIF key (starts with K or L)"""
+    # Bitcoin mainnet prefix (0x80) and 0x01 suffix for the compressed key format
+    return encoding.b58check_encode(b'\x80' + private_key_bytes + b'\x01')
+
+def private_key_bytes_to_point(private_key_bytes: bytes) -> tuple[int, int]:
+    """Public key point (x, y) for 32 raw private key bytes"""
+    return secp256k1.base_mult(_private_key_bytes_to_scalar(private_key_bytes))
+
+def private_key_bytes_to_points(private_keys_bytes) -> list[tuple[int, int]]:
+    """Batch version of private_key_bytes_to_point. All keys share a single modular inverse."""
+    return secp256k1.base_mult_batch([_private_key_bytes_to_scalar(key) for key in private_keys_bytes])
+
+def point_to_uncompressed(x: int, y: int) -> bytes:
+    return b'\x04' + x.to_bytes(32, 'big') + y.to_bytes(32, 'big')
+
+def point_to_compressed(x: int, y: int) -> bytes:
+    return (b'\x03' if y & 1 else b'\x02') + x.to_bytes(32, 'big')
+
+def compress_pubkey_bytes(uncompressed_pubkey: bytes) -> bytes:
+    return (b'\x03' if uncompressed_pubkey[64] & 1 else b'\x02') + uncompressed_pubkey[1:33]
+
+def decompress_pubkey_bytes(compressed_pubkey: bytes) -> bytes:
+    y = secp256k1.lift_x(int.from_bytes(compressed_pubkey[1:33], 'big'), odd=compressed_pubkey[0] == 3)
+    return b'\x04' + compressed_pubkey[1:33] + y.to_bytes(32, 'big')
+
+def hash160_to_legacy_address(pubkey_hash: bytes) -> str:
+    """P2PKH address (starts with '1') for the hash160 of a public key"""
+    # Add network byte (0x00 for Bitcoin mainnet)
+    return encoding.b58check_encode(b'\x00' + pubkey_hash)
+
+def hash160_to_wrapped_segwit_address(pubkey_hash: bytes) -> str:
+    """P2SH-P2WPKH address (starts with '3') for the hash160 of a compressed public key"""
+    segwit_script = b'\x00\x14' + pubkey_hash  # P2WPKH script
+    return encoding.b58check_encode(b'\x05' + hash160(segwit_script))
+
+def hash160_to_segwit_address(pubkey_hash: bytes) -> str:
+    """Native SegWit Bech32 address (starts with 'bc1q') for the hash160 of a compressed public key"""
+    return encoding.encode_segwit_address("bc", 0, pubkey_hash)
+
+def hash160s_to_legacy_addresses(pubkey_hashes) -> list[str]:
+    """Batch version of hash160_to_legacy_address"""
+    return encoding.b58check_encode_batch(pubkey_hashes, prefix=b'\x00')
+
+def hash160s_to_wrapped_segwit_addresses(pubkey_hashes) -> list[str]:
+    """Batch version of hash160_to_wrapped_segwit_address"""
+    return encoding.b58check_encode_batch([hash160(b'\x00\x14' + pubkey_hash) for pubkey_hash in pubkey_hashes], prefix=b'\x05')
+
+def hash160s_to_segwit_addresses(pubkey_hashes) -> list[str]:
+    """Batch version of hash160_to_segwit_address"""
+    return encoding.encode_segwit_addresses("bc", 0, pubkey_hashes)
+
+def decode_base58check(value: str) -> bytes:
+    """Decode a Base58Check string (WIF key, P2PKH or P2SH address) and return the payload including the version byte"""
+    return encoding.b58check_decode(value)
+
+def decode_segwit_address(address: str, hrp: str = "bc") -> tuple[int, bytes]:
+    """Decode a SegWit (bech32) or Taproot (bech32m) address to (witness version, witness program)"""
+    return encoding.decode_segwit_address(hrp, address)
+
+def _private_key_bytes_to_scalar(private_key_bytes: bytes) -> int:
+    if len(private_key_bytes) != 32:
+        raise ValueError(f"Private key must be 32 bytes but was {len(private_key_bytes)}")
+    scalar = int.from_bytes(private_key_bytes, "big")
+    if not 0 < scalar < secp256k1.N:
+        raise ValueError("Private key is out of range for secp256k1")
+    return scalar
 
 def wif_to_raw_private_key(wif_key: str) -> str:
     """
     Electrum private keys with a prefix 'p2wpkh:' and starting with a L or K.
     """
-    wif_key = wif_key[7:] if wif_key.startswith('p2wpkh:') else wif_key
-    decoded = base58.b58decode_check(wif_key)
-    
-    # Remove the first byte (prefix) and last byte (if compressed key)
-    raw_key = decoded[1:-1] if len(decoded) == 34 else decoded[1:]
-    
-    return raw_key.hex()
+    return decode_wif(wif_key).hex()
 
 def private_key_to_public_key(private_key_hex):
-    private_key_bytes = bytes.fromhex(private_key_hex)
+    """Convert a 32-byte hex private key to its uncompressed public key (04 + X + Y)"""
+    return point_to_uncompressed(*private_key_bytes_to_point(bytes.fromhex(private_key_hex))).hex()
 
-    # Use secp256k1 curve to generate the public key
-    sk = ecdsa.SigningKey.from_string(private_key_bytes, curve=ecdsa.SECP256k1)
-    vk = sk.verifying_key
-    public_key = b'\x04' + vk.to_string()  # Uncompressed public key
-    return public_key.hex()
+def private_keys_to_public_keys(private_keys_hex):
+    """Batch version of private_key_to_public_key. All keys share a single modular inverse."""
+    points = private_key_bytes_to_points([bytes.fromhex(key) for key in private_keys_hex])
+    return [point_to_uncompressed(x, y).hex() for x, y in points]
 
 def uncompressed_to_compressed_pubkey(uncompressed_pubkey):
     if len(uncompressed_pubkey) != 130 or not uncompressed_pubkey.startswith("04"):
         raise ValueError("Invalid uncompressed public key")
 
-    # Extract X and Y coordinates
+    # Extract X coordinate
     x = uncompressed_pubkey[2:66]  # First 32 bytes after '04'
-    y = uncompressed_pubkey[66:]   # Last 32 bytes
-
-    # Convert Y to an integer to check if even or odd
-    y_int = int(y, 16)
 
     # Compressed key: 02 if Y is even, 03 if Y is odd
-    prefix = "02" if y_int % 2 == 0 else "03"
+    prefix = "03" if int(uncompressed_pubkey[-1], 16) & 1 else "02"
 
     # Return compressed public key
     return prefix + x
 
 def private_key_to_wif(private_key_hex):
     """Convert a 32-byte hex private key to Compressed WIF (starts with K or L)"""
-    private_key_bytes = bytes.fromhex(private_key_hex)
-
-    # Add Bitcoin mainnet prefix (0x80)
-    extended_key = b'\x80' + private_key_bytes
-
-    # Add 0x01 suffix for compressed key format
-    extended_key += b'\x01'
-
-    # Compute double SHA-256 checksum
-    checksum = hashlib.sha256(hashlib.sha256(extended_key).digest()).digest()[:4]
-
-    # Append checksum and encode in Base58Check
-    wif_key = base58.b58encode(extended_key + checksum).decode('utf-8')
-
-    return wif_key
+    return encode_wif(bytes.fromhex(private_key_hex))
 
 def compressed_to_uncompressed_pubkey(compressed_pubkey):
     """Convert a compressed public key (02/03 + X) to an uncompressed public key (04 + X + Y)."""
@@ -75,92 +125,52 @@ def compressed_to_uncompressed_pubkey(compressed_pubkey):
 
     # Extract X coordinate
     x_hex = compressed_pubkey[2:]
-    x = int(x_hex, 16)
 
-    # Compute Y^2 = x^3 + 7 mod p
-    p = curve_secp256k1.p()
-    y_squared = (x**3 + 7) % p
-
-    # Compute modular square root (Y value)
-    y = pow(y_squared, (p + 1) // 4, p)  # secp256k1 specific sqrt mod p
-
-    # Check if computed Y matches the parity given by the prefix (02 = even, 03 = odd)
-    if (compressed_pubkey.startswith("02") and y % 2 != 0) or (compressed_pubkey.startswith("03") and y % 2 == 0):
-        y = p - y  # Flip Y to correct parity
+    # Solve y^2 = x^3 + 7 for the Y with the parity given by the prefix (02 = even, 03 = odd)
+    y = secp256k1.lift_x(int(x_hex, 16), odd=compressed_pubkey.startswith("03"))
 
     # Convert to hex and return uncompressed format
     y_hex = format(y, '064x')
     return "04" + x_hex + y_hex
 
+def compressed_to_uncompressed_pubkeys(compressed_pubkeys):
+    """Batch version of compressed_to_uncompressed_pubkey"""
+    return [compressed_to_uncompressed_pubkey(pubkey) for pubkey in compressed_pubkeys]
+
 def uncomp_public_key_to_legacy_address(public_key_hex):
     """ Generate a legacy P2PKH Bitcoin address (starts with '1') """
     if not is_uncompressed_public_key(public_key_hex):
         raise ValueError(f"public_key_to_segwit_address expects a compressed public key but was passed {public_key_hex}")
-    public_key_bytes = bytes.fromhex(public_key_hex)
-
-    # Perform SHA-256 hashing on the public key
-    sha256 = hashlib.sha256(public_key_bytes).digest()
-
-    # Perform RIPEMD-160 hashing on the SHA-256 result
-    ripemd160 = hashlib.new('ripemd160')
-    ripemd160.update(sha256)
-    hashed_public_key = ripemd160.digest()
-
-    # Add network byte (0x00 for Bitcoin mainnet)
-    network_byte = b'\x00' + hashed_public_key
-
-    # Perform double SHA-256 hash for checksum
-    checksum = hashlib.sha256(hashlib.sha256(network_byte).digest()).digest()[:4]
-
-    # Concatenate hashed public key and checksum
-    address_bytes = network_byte + checksum
-
-    # Convert to Base58 to get the final Bitcoin address
-    return base58.b58encode(address_bytes).decode('utf-8')
+    return hash160_to_legacy_address(hash160(bytes.fromhex(public_key_hex)))
 
 def comp_public_key_to_wrapped_segwit_address(public_key_hex):
     """ Generate a wrapped SegWit P2SH-P2WPKH Bitcoin address (starts with '3') """
     if not is_compressed_public_key(public_key_hex):
         raise ValueError(f"comp_public_key_to_wrapped_segwit_address expects a compressed public key but was passed {public_key_hex}")
-    public_key_bytes = bytes.fromhex(public_key_hex)
-    sha256 = hashlib.sha256(public_key_bytes).digest()
-    ripemd160 = hashlib.new('ripemd160', sha256).digest()
-    segwit_script = b'\x00\x14' + ripemd160  # P2WPKH script
-    sha256_script = hashlib.sha256(segwit_script).digest()
-    ripemd160_script = hashlib.new('ripemd160', sha256_script).digest()
-    network_byte = b'\x05' + ripemd160_script
-    checksum = hashlib.sha256(hashlib.sha256(network_byte).digest()).digest()[:4]
-    return base58.b58encode(network_byte + checksum).decode()
+    return hash160_to_wrapped_segwit_address(hash160(bytes.fromhex(public_key_hex)))
 
 def comp_public_key_to_segwit_address(public_key_hex):
     """ Generate a native SegWit Bech32 Bitcoin address (starts with 'bc1') using the compressed public key """
     if not is_compressed_public_key(public_key_hex):
         raise ValueError(f"comp_public_key_to_segwit_address expects a compressed public key but was passed {public_key_hex}")
-    
-    public_key_bytes = bytes.fromhex(public_key_hex)
-
-    # Perform SHA-256 hashing on the compressed public key
-    sha256_hash = hashlib.sha256(public_key_bytes).digest()
-
-    # Perform RIPEMD-160 hashing on the SHA-256 result
-    ripemd160 = hashlib.new('ripemd160', sha256_hash).digest()
-
-    # Convert to Bech32 address (native SegWit, bc1...)
-    return bech32.encode("bc", 0, ripemd160)
+    return hash160_to_segwit_address(hash160(bytes.fromhex(public_key_hex)))
 
 def comp_public_key_to_taproot_address(public_key_hex: str) -> str:
-    """Generate a Taproot (bc1p...) address from an uncompressed public key."""
-    
+    """Generate a Taproot (bc1p...) address from a compressed public key."""
+
     # Validate input
     if not is_compressed_public_key(public_key_hex):
         raise ValueError(f"comp_public_key_to_taproot_address expects a compressed public key but was passed {public_key_hex}")
 
-    pub = PublicKey(public_key_hex)
+    return taproot.taproot_address(bytes.fromhex(public_key_hex))
 
-    # Generate the Taproot address
-    taproot_address = pub.get_taproot_address()
+def comp_public_keys_to_taproot_addresses(public_keys_hex):
+    """Batch version of comp_public_key_to_taproot_address. All keys share a single modular inverse."""
+    for public_key_hex in public_keys_hex:
+        if not is_compressed_public_key(public_key_hex):
+            raise ValueError(f"comp_public_keys_to_taproot_addresses expects compressed public keys but was passed {public_key_hex}")
 
-    return taproot_address.to_string()
+    return taproot.taproot_addresses([bytes.fromhex(public_key_hex) for public_key_hex in public_keys_hex])
 
 def is_compressed_public_key(public_key : str):
     return len(public_key)== 66 and (public_key.startswith('02') or public_key.startswith('03')) and is_valid_hex_str(public_key)
@@ -0,0 +1,161 @@
+"""
+A local stand-in for an Electrum server, for checks and offline runs.
+
+MockElectrum speaks newline delimited JSON-RPC over plain TCP, single requests and
+batches, and serves the methods ElectrumClient uses: server.version,
+blockchain.scripthash.get_balance and blockchain.scripthash.get_history. Addresses
+in `funded` have that many confirmed sats and one transaction; every other address
+is unused. Batches are answered in reverse order, as real servers may answer them
+in any order, and addresses in `failing` are answered with an error.
+
+    with MockElectrum({"bc1q...": 50_000}) as server:
+        client = ElectrumClient(server.host, server.port, tls=False)
+
+    python -m btccli.mock_electrum --port 50001 --fund bc1q...=50000
+"""
+import asyncio
+import hashlib
+import json
+import threading
+import time
+
+from btccli.electrum_client import address_to_scripthash
+
+class MockElectrum:
+    def __init__(self, funded: dict[str, int] | None = None, failing: set[str] | None = None,
+                 host: str = "127.0.0.1", port: int = 0, latency: float = 0.0):
+        self.funded = {address_to_scripthash(address): sats for address, sats in (funded or {}).items()}
+        """Scripthash -> confirmed sats"""
+
+        self.failing = {address_to_scripthash(address) for address in failing or ()}
+        self.host = host
+        self.port = port
+        """0 picks a free port; the actual one is set once started"""
+
+        self.latency = latency
+        """Seconds added to every line (a single request or a whole batch)"""
+
+        self.requests: dict[str, int] = {}
+        """Method -> requests received"""
+
+        self.lines = 0
+        """Lines received: one per single request or batch"""
+
+        self._loop = None
+        self._server = None
+        self._thread = None
+
+    @property
+    def server(self) -> str:
+        """host:port:t, as electrum_key.py --server takes it"""
+        return f"{self.host}:{self.port}:t"
+
+    def start(self) -> "MockElectrum":
+        ready = threading.Event()
+        self._loop = asyncio.new_event_loop()
+
+        async def serve():
+            self._server = await asyncio.start_server(self._handle, self.host, self.port)
+            self.port = self._server.sockets[0].getsockname()[1]
+            ready.set()
+
+        def run():
+            self._loop.run_until_complete(serve())
+            self._loop.run_forever()
+
+        self._thread = threading.Thread(target=run, name="mock-electrum", daemon=True)
+        self._thread.start()
+        ready.wait()
+        return self
+
+    def stop(self):
+        if self._loop is None:
+            return
+
+        async def shutdown():
+            self._server.close()
+            await self._server.wait_closed()
+
+        asyncio.run_coroutine_threadsafe(shutdown(), self._loop).result()
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+        self._loop.close()
+        self._loop = None
+
+    def __enter__(self) -> "MockElectrum":
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            while line := await reader.readline():
+                self.lines += 1
+                if self.latency:
+                    await asyncio.sleep(self.latency)
+                try:
+                    message = json.loads(line)
+                except ValueError:
+                    reply = {"jsonrpc": "2.0", "id": None, "error": {"code": -32700, "message": "parse error"}}
+                else:
+                    if isinstance(message, list):
+                        reply = [self.respond(request) for request in reversed(message)]
+                    else:
+                        reply = self.respond(message)
+                writer.write(json.dumps(reply).encode("utf-8") + b"\n")
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    def respond(self, request: dict) -> dict:
+        """The JSON-RPC response to one request"""
+        method, params = request.get("method"), request.get("params") or []
+        self.requests[method] = self.requests.get(method, 0) + 1
+        if method == "server.version":
+            return self._result(request, ["MockElectrum 1.0", "1.4"])
+        if method in ("blockchain.scripthash.get_balance", "blockchain.scripthash.get_history") and params:
+            sh = params[0]
+            if sh in self.failing:
+                return self._error(request, -32603, f"history too large for {sh}")
+            if method.endswith("get_balance"):
+                return self._result(request, {"confirmed": self.funded.get(sh, 0), "unconfirmed": 0})
+            funding_tx = hashlib.sha256(sh.encode("ascii")).hexdigest()
+            return self._result(request, [{"tx_hash": funding_tx, "height": 800_000}] if sh in self.funded else [])
+        return self._error(request, -32601, f"unknown method {method}")
+
+    @staticmethod
+    def _result(request: dict, result) -> dict:
+        return {"jsonrpc": "2.0", "id": request.get("id"), "result": result}
+
+    @staticmethod
+    def _error(request: dict, code: int, message: str) -> dict:
+        return {"jsonrpc": "2.0", "id": request.get("id"), "error": {"code": code, "message": message}}
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Run a mock Electrum server over plain TCP")
+    parser.add_argument("--port", type=int, default=50001)
+    parser.add_argument("--fund", action="append", default=[], metavar="ADDRESS=SATS",
+                        help="give an address a confirmed balance (repeatable)")
+    parser.add_argument("--fail", action="append", default=[], metavar="ADDRESS",
+                        help="answer requests for an address with an error (repeatable)")
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds added to every request or batch")
+    args = parser.parse_args()
+
+    funded = {}
+    for entry in args.fund:
+        address, _, sats = entry.partition("=")
+        funded[address] = int(sats or 100_000)
+    server = MockElectrum(funded, set(args.fail), port=args.port, latency=args.latency).start()
+    print(f"🔹 Electrum : {server.server}")
+    for address, sats in funded.items():
+        print(f"🔹 {address}: {sats} sats")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.stop()
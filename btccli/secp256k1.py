@@ -0,0 +1,153 @@
+"""
+Pure python secp256k1 point arithmetic tuned for deriving many keys at once.
+
+Points are kept in Jacobian coordinates (X, Y, Z) while they are being computed so
+that no modular inverse is needed per addition. Multiples of the generator come
+from a precomputed table of affine points, one row per 8 bit window of the scalar,
+so k*G is at most 32 mixed additions and no doublings. Converting back to affine
+uses Montgomery's batch inversion trick: N points cost one modular inverse plus
+3(N-1) multiplications.
+"""
+from typing import Iterable, Sequence
+
+P = 0xFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFEFFFFFC2F
+"""Field prime"""
+
+N = 0xFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFEBAAEDCE6AF48A03BBFD25E8CD0364141
+"""Order of the generator"""
+
+G = (0x79BE667EF9DCBBAC55A06295CE870B07029BFCDB2DCE28D959F2815B16F81798,
+     0x483ADA7726A3C4655DA4FBFC0E1108A8FD17B448A68554199C47D08FFB10D4B8)
+"""Generator point (affine)"""
+
+WINDOW_BITS = 8
+_WINDOWS = 256 // WINDOW_BITS
+_WINDOW_MASK = (1 << WINDOW_BITS) - 1
+
+INFINITY = (0, 1, 0)
+"""The point at infinity in Jacobian coordinates"""
+
+# _G_TABLE[i][d - 1] is the affine point d * 2^(WINDOW_BITS * i) * G. Built on first use.
+_G_TABLE: list[list[tuple[int, int]]] | None = None
+
+def jacobian_double(p : tuple[int, int, int]) -> tuple[int, int, int]:
+    x, y, z = p
+    if not y or not z:
+        return INFINITY
+    yy = y * y % P
+    s = 4 * x * yy % P
+    m = 3 * x * x % P  # a == 0 for secp256k1
+    nx = (m * m - 2 * s) % P
+    ny = (m * (s - nx) - 8 * yy * yy) % P
+    nz = 2 * y * z % P
+    return (nx, ny, nz)
+
+def jacobian_add_affine(p : tuple[int, int, int], q : tuple[int, int]) -> tuple[int, int, int]:
+    """Mixed addition of a Jacobian point and an affine point."""
+    x1, y1, z1 = p
+    x2, y2 = q
+    if not z1:
+        return (x2, y2, 1)
+    z1z1 = z1 * z1 % P
+    u2 = x2 * z1z1 % P
+    s2 = y2 * z1 * z1z1 % P
+    h = (u2 - x1) % P
+    r = (s2 - y1) % P
+    if not h:
+        if not r:
+            return jacobian_double(p)
+        return INFINITY
+    hh = h * h % P
+    hhh = h * hh % P
+    v = x1 * hh % P
+    nx = (r * r - hhh - 2 * v) % P
+    ny = (r * (v - nx) - y1 * hhh) % P
+    nz = z1 * h % P
+    return (nx, ny, nz)
+
+def batch_inverse(values : Sequence[int], modulus : int = P) -> list[int]:
+    """Invert every (non zero) value modulo `modulus` with a single modular inverse."""
+    if not values:
+        return []
+    prefix = [0] * len(values)
+    acc = 1
+    for i, value in enumerate(values):
+        prefix[i] = acc
+        acc = acc * value % modulus
+
+    inv = pow(acc, -1, modulus)
+    result = [0] * len(values)
+    for i in range(len(values) - 1, -1, -1):
+        result[i] = inv * prefix[i] % modulus
+        inv = inv * values[i] % modulus
+    return result
+
+def to_affine_batch(points : Sequence[tuple[int, int, int]]) -> list[tuple[int, int]]:
+    """Convert Jacobian points to affine (x, y) sharing one modular inverse."""
+    if any(not z for _, _, z in points):
+        raise ValueError("Cannot convert the point at infinity to affine coordinates")
+    inverses = batch_inverse([z for _, _, z in points])
+    result = []
+    for (x, y, _), zinv in zip(points, inverses):
+        zinv2 = zinv * zinv % P
+        result.append((x * zinv2 % P, y * zinv2 * zinv % P))
+    return result
+
+def to_affine(point : tuple[int, int, int]) -> tuple[int, int]:
+    return to_affine_batch([point])[0]
+
+def _generator_table() -> list[list[tuple[int, int]]]:
+    global _G_TABLE
+    if _G_TABLE is None:
+        rows = []
+        base = (G[0], G[1], 1)
+        for _ in range(_WINDOWS):
+            base_affine = to_affine(base)
+            row = [base]
+            for _ in range(_WINDOW_MASK - 1):
+                row.append(jacobian_add_affine(row[-1], base_affine))
+            rows.append(row)
+            # next row starts at 2^WINDOW_BITS times this row's base
+            base = jacobian_add_affine(row[-1], base_affine)
+
+        flat = to_affine_batch([point for row in rows for point in row])
+        _G_TABLE = [flat[i * _WINDOW_MASK:(i + 1) * _WINDOW_MASK] for i in range(_WINDOWS)]
+    return _G_TABLE
+
+def base_mult_jacobian(k : int) -> tuple[int, int, int]:
+    """k * G in Jacobian coordinates, using the precomputed generator table."""
+    if not 0 < k < N:
+        raise ValueError("Scalar must be between 1 and the curve order - 1")
+    table = _generator_table()
+    acc = INFINITY
+    window = 0
+    while k:
+        digit = k & _WINDOW_MASK
+        if digit:
+            acc = jacobian_add_affine(acc, table[window][digit - 1])
+        k >>= WINDOW_BITS
+        window += 1
+    return acc
+
+def base_mult(k : int) -> tuple[int, int]:
+    """k * G as an affine point."""
+    return to_affine(base_mult_jacobian(k))
+
+def base_mult_batch(scalars : Iterable[int]) -> list[tuple[int, int]]:
+    """k * G for every k, converted to affine with one shared inverse."""
+    return to_affine_batch([base_mult_jacobian(k) for k in scalars])
+
+def lift_x(x : int, odd : bool = False) -> int:
+    """Return the y coordinate for x with the requested parity. Raises ValueError if x is not on the curve."""
+    if not 0 <= x < P:
+        raise ValueError("x coordinate is not a field element")
+    y_squared = (pow(x, 3, P) + 7) % P
+    y = pow(y_squared, (P + 1) // 4, P)  # P % 4 == 3 so this is the square root if there is one
+    if y * y % P != y_squared:
+        raise ValueError("x coordinate is not on the secp256k1 curve")
+    if (y & 1) != odd:
+        y = P - y
+    return y
+
+def is_on_curve(x : int, y : int) -> bool:
+    return 0 <= x < P and 0 <= y < P and (y * y - x * x * x - 7) % P == 0
@@ -0,0 +1,117 @@
+"""
+Taproot (BIP340/BIP341/BIP86) output keys and addresses for single key wallets.
+
+The output key is Q = P + t*G where P is the internal key with an even Y and
+t = hash_TapTweak(x(P)). The tagged hash prefix is hashed once and the SHA-256 state
+after it is copied for every key. The batch functions share one modular inverse for
+all of the output points.
+
+`python -m btccli.taproot [N]` checks the BIP86 and BIP341 test vectors, that the
+batch and single key functions agree on N random keys and, if bitcoin-utils is
+installed, that it derives the same N addresses.
+"""
+import hashlib
+
+from btccli import secp256k1
+from btccli.encoding import encode_segwit_address, encode_segwit_addresses
+
+def tagged_hash_midstate(tag: str):
+    """SHA-256 state after absorbing the BIP340 prefix sha256(tag) || sha256(tag). Copy it before use."""
+    tag_hash = hashlib.sha256(tag.encode()).digest()
+    return hashlib.sha256(tag_hash + tag_hash)
+
+_TAPTWEAK = tagged_hash_midstate("TapTweak")
+
+def tagged_hash(tag: str, data: bytes) -> bytes:
+    midstate = _TAPTWEAK.copy() if tag == "TapTweak" else tagged_hash_midstate(tag)
+    midstate.update(data)
+    return midstate.digest()
+
+def _tweaked_jacobian(comp_pub_key: bytes) -> tuple[int, int, int]:
+    if len(comp_pub_key) != 33 or comp_pub_key[0] not in (2, 3):
+        raise ValueError(f"Expected a compressed public key but was passed {comp_pub_key.hex()}")
+    xonly = comp_pub_key[1:]
+    x = int.from_bytes(xonly, 'big')
+    internal_key = (x, secp256k1.lift_x(x, odd=False))
+
+    tweak = int.from_bytes(tagged_hash("TapTweak", xonly), 'big')
+    if tweak >= secp256k1.N:
+        raise ValueError("Taproot tweak is out of range")
+
+    return secp256k1.jacobian_add_affine(secp256k1.base_mult_jacobian(tweak), internal_key)
+
+def taproot_output_key(comp_pub_key: bytes) -> bytes:
+    """x-only (32 byte) Taproot output key for a 33 byte compressed public key"""
+    x, _ = secp256k1.to_affine(_tweaked_jacobian(comp_pub_key))
+    return x.to_bytes(32, 'big')
+
+def taproot_output_keys(comp_pub_keys) -> list[bytes]:
+    """Batch version of taproot_output_key"""
+    points = secp256k1.to_affine_batch([_tweaked_jacobian(key) for key in comp_pub_keys])
+    return [x.to_bytes(32, 'big') for x, _ in points]
+
+def output_key_to_taproot_address(output_key: bytes) -> str:
+    """bc1p... address for an x-only output key"""
+    return encode_segwit_address("bc", 1, output_key)
+
+def taproot_address(comp_pub_key: bytes) -> str:
+    return output_key_to_taproot_address(taproot_output_key(comp_pub_key))
+
+def taproot_addresses(comp_pub_keys) -> list[str]:
+    return encode_segwit_addresses("bc", 1, taproot_output_keys(comp_pub_keys))
+
+def bitcoinutils_taproot_address(comp_pub_key_hex: str) -> str:
+    """The Taproot address bitcoinutils derives for a compressed public key. Requires bitcoin-utils."""
+    try:
+        from bitcoinutils.keys import PublicKey
+        from bitcoinutils.setup import setup
+    except ImportError as e:
+        raise ImportError("Cross-checking Taproot addresses requires bitcoin-utils (pip install bitcoin-utils)") from e
+
+    setup('mainnet')
+    return PublicKey(comp_pub_key_hex).get_taproot_address().to_string()
+
+TEST_VECTORS = (
+    # (x-only internal key, x-only output key, address)
+    # BIP86, m/86'/0'/0'/0/0 of "abandon abandon ... about"
+    ("cc8a4bc64d897bddc5fbc2f670f7a8ba0b386779106cf1223c6fc5d7cd6fc115",
+     "a60869f0dbcf1dc659c9cecbaf8050135ea9e8cdc487053f1dc6880949dc684c",
+     "bc1p5cyxnuxmeuwuvkwfem96lqzszd02n6xdcjrs20cac6yqjjwudpxqkedrcr"),
+    # BIP341 wallet test vectors, key path only (no script tree)
+    ("d6889cb081036e0faefa3a35157ad71086b123b2b144b649798b494c300a961d",
+     "53a1f6e454df1aa2776a2814a721372d6258050de330b3c6d10ee8f4e0dda343",
+     "bc1p2wsldez5mud2yam29q22wgfh9439spgduvct83k3pm50fcxa5dps59h4z5"),
+)
+
+if __name__ == "__main__":
+    import os
+    import sys
+
+    from btccli.keys import point_to_compressed, private_key_bytes_to_points
+
+    failures = []
+    for internal_key, output_key, address in TEST_VECTORS:
+        # the internal key is x-only, so either parity must give the same output
+        for comp_pub_key in (bytes.fromhex("02" + internal_key), bytes.fromhex("03" + internal_key)):
+            if taproot_output_key(comp_pub_key).hex() != output_key or taproot_address(comp_pub_key) != address:
+                failures.append(f"test vector {comp_pub_key.hex()}")
+    print(f"Checked {len(TEST_VECTORS)} BIP86/BIP341 test vectors")
+
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100
+    comp_pub_keys = [point_to_compressed(x, y) for x, y in private_key_bytes_to_points([os.urandom(32) for _ in range(count)])]
+    addresses = taproot_addresses(comp_pub_keys)
+    failures += [f"batch/single mismatch for {key.hex()}" for key, address in zip(comp_pub_keys, addresses)
+                 if address != taproot_address(key)]
+    print(f"Checked taproot_addresses against taproot_address for {count} keys")
+
+    try:
+        mismatches = [f"bitcoinutils mismatch for {key.hex()}" for key, address in zip(comp_pub_keys, addresses)
+                      if address != bitcoinutils_taproot_address(key.hex())]
+        failures += mismatches
+        print(f"Checked {count} keys against bitcoinutils, {len(mismatches)} mismatches")
+    except ImportError as e:
+        print(f"Skipped the bitcoinutils cross-check: {e}")
+
+    for failure in failures:
+        print(f"❌ Taproot {failure}")
+    sys.exit(1 if failures else 0)
@@ -1,19 +1,103 @@
+import argparse
+import os
 import sys
+from itertools import islice
 
-from btccli.btc_keys import make_bitcoin_keyset
-from btccli.electrum import load_electrum_export
+from btccli.address_index import MAX_SEGMENTS, AddressIndex, build_address_index
+from btccli.btc_keys import KEYSET_FIELDS, ValidationLevel, keyset_row, make_bitcoin_keysets
+from btccli.electrum import iter_key_file
+from output_sinks import FORMATS, open_sink
 
-if len(sys.argv) != 2:
-    print(f"Usage: python {sys.argv[0]} path/to/electrum/export.json")
-    sys.exit(1)
+parser = argparse.ArgumentParser(description="Derive and validate the Bitcoin keys in an Electrum private key export")
+parser.add_argument("export", help="path/to/electrum/export.json, or a key file in one of the --format formats. - reads stdin")
+parser.add_argument("--format", choices=["electrum", "ndjson", "csv", "lines"],
+                    help="format of the key file (default: guessed from the file extension)")
+parser.add_argument("-j", "--jobs", type=int, default=1,
+                    help="number of worker processes used to derive the keys (default: 1)")
+parser.add_argument("--validation", choices=[level.value for level in ValidationLevel], default=ValidationLevel.FULL.value,
+                    help="how thoroughly each derived keyset is checked (default: full). "
+                         "'sampled' fully checks every 100th key and structurally checks the rest")
+parser.add_argument("--index", metavar="PATH",
+                    help="add the derived keys to the address index at PATH, creating it if it doesn't exist")
+parser.add_argument("--balances", metavar="SERVER",
+                    help="look up the balance of every derived address on an Electrum server, "
+                         "host[:port[:s|t]] (s: TLS, the default, t: plain TCP)")
+parser.add_argument("--history", action="store_true", help="with --balances, also fetch each address's transaction history")
+parser.add_argument("--insecure", action="store_true", help="with --balances, don't verify the server's TLS certificate")
+parser.add_argument("--index-private-keys", action="store_true",
+                    help="store the private keys in a newly created --index as well (default: public keys only)")
+parser.add_argument("--merge", action="store_true",
+                    help=f"merge an existing --index's segments after adding the keys (default: only past {MAX_SEGMENTS} segments)")
+parser.add_argument("--output-format", choices=FORMATS, default="pretty",
+                    help="how the derived keys are written (default: pretty). parquet and arrow need pyarrow and --output")
+parser.add_argument("--output", metavar="PATH", help="write the derived keys to PATH instead of stdout")
+args = parser.parse_args()
+
+if args.jobs < 1:
+    parser.error("--jobs must be at least 1")
+
+# Electrum export (or key file) streamed one entry at a time
+entries = ((electrum_wif_key, btc_addr) for btc_addr, electrum_wif_key in iter_key_file(args.export, args.format))
+
+try:
+    sink = open_sink(args.output_format, args.output, KEYSET_FIELDS, keyset_row)
+except (RuntimeError, ValueError) as e:
+    parser.error(str(e))
+
+# with structured records on stdout, stdout carries only them so they can be piped; reports go to stderr
+report = sys.stderr if args.output_format != "pretty" and args.output in (None, "-") else sys.stdout
 
-electrum_export_path = sys.argv[1]
+total = 0
+failures = 0
 
-# Electrum export load
-electrum_keys = load_electrum_export(electrum_export_path)
+def derived_keys():
+    global total, failures
+    for result in make_bitcoin_keysets(entries, workers=args.jobs, validation=args.validation):
+        total += 1
+        if result.ok:
+            sink.write(result.keys)
+            yield result.keys
+        else:
+            failures += 1
+            print(f"❌ Failed to derive the keys for {result.known_electrum_addr or result.index}: {result.error!r}", file=sys.stderr)
 
-for btc_addr, electrum_wif_key in electrum_keys.items():
-    bck = make_bitcoin_keyset(electrum_wif_key, known_electrum_addr=btc_addr)
-    print(bck)
-    assert btc_addr == bck.addr_segwit
+def with_balances(keysets):
+    from btccli.electrum_client import ElectrumClient, parse_server
 
+    host, port, tls = parse_server(args.balances)
+    total_sats = 0
+    lookup_errors = 0
+    with ElectrumClient(host, port, tls=tls, verify=not args.insecure) as client:
+        while batch := list(islice(keysets, 250)):
+            for balance in client.lookup(batch, history=args.history):
+                for address in balance.addresses:
+                    if address.error:
+                        lookup_errors += 1
+                        print(f"❌ {address.address}: {address.error}", file=sys.stderr)
+                    elif address.used:
+                        history = f" {len(address.history)} transactions" if address.history is not None else ""
+                        print(f"💰 {address.address}: {address.confirmed / 1e8:.8f} BTC"
+                              f" ({address.unconfirmed / 1e8:+.8f} unconfirmed){history}", file=report)
+                total_sats += balance.confirmed
+            yield from batch
+    print(f"💰 Total confirmed: {total_sats / 1e8:.8f} BTC"
+          + (f", not counting {lookup_errors} address(es) the server failed to look up" if lookup_errors else ""),
+          file=report)
+
+keysets = with_balances(derived_keys()) if args.balances else derived_keys()
+
+with sink:
+    if not args.index:
+        for _ in keysets:
+            pass
+    elif os.path.exists(args.index):
+        with AddressIndex(args.index) as index:
+            index.append(keysets)
+            if args.merge:
+                index.merge()
+    else:
+        build_address_index(args.index, keysets, include_private_keys=args.index_private_keys).close()
+
+if failures:
+    print(f"❌ {failures} of {total} keys failed", file=sys.stderr)
+    sys.exit(1)
@@ -0,0 +1,162 @@
+"""
+Buffered output sinks for the command line tools.
+
+A sink takes items (BitcoinKeys, transactions, ...) and writes them in one of
+several formats:
+
+- "pretty": the human readable text the tools have always printed
+- "jsonl": one JSON object per line
+- "csv": a header row and one row per item
+- "parquet" / "arrow": columnar files, through pyarrow (optional, not in requirements.txt)
+
+Items are turned into text with `to_text` (pretty) or into a row of `fields` with
+`to_row` (everything else), collected into batches of `batch_size` and written to
+the stream with a single write per batch, so the cost per record is the formatting
+and not a print() call per line.
+
+    with open_sink("jsonl", "keys.jsonl", KEYSET_FIELDS, keyset_row, str) as sink:
+        sink.write_many(keysets)
+"""
+import csv
+import json
+import sys
+from abc import ABC, abstractmethod
+from typing import Any, Callable, Iterable, Sequence, TextIO
+
+FORMATS = ("pretty", "jsonl", "csv", "parquet", "arrow")
+
+STREAM_BUFFER = 1 << 20
+"""Write buffer for output files"""
+
+class Sink(ABC):
+    def __init__(self, batch_size: int = 1024):
+        self.batch_size = batch_size
+        self.count = 0
+        """Items written so far"""
+
+        self._batch = []
+
+    def write(self, item):
+        self._batch.append(item)
+        if len(self._batch) >= self.batch_size:
+            self.flush()
+
+    def write_many(self, items: Iterable):
+        for item in items:
+            self.write(item)
+
+    def flush(self):
+        if self._batch:
+            batch, self._batch = self._batch, []
+            self._write_batch(batch)
+            self.count += len(batch)
+
+    def close(self):
+        self.flush()
+
+    @abstractmethod
+    def _write_batch(self, batch: list):
+        """Write one batch of items"""
+
+    def __enter__(self) -> "Sink":
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+class _StreamSink(Sink):
+    def __init__(self, stream: TextIO, batch_size: int = 1024, owns_stream: bool = False):
+        super().__init__(batch_size)
+        self.stream = stream
+        self._owns_stream = owns_stream
+
+    def close(self):
+        super().close()
+        if self._owns_stream:
+            self.stream.close()
+        else:
+            self.stream.flush()
+
+class PrettySink(_StreamSink):
+    def __init__(self, stream: TextIO, to_text: Callable[[Any], str], batch_size: int = 64, owns_stream: bool = False):
+        super().__init__(stream, batch_size, owns_stream)
+        self.to_text = to_text
+
+    def _write_batch(self, batch: list):
+        to_text = self.to_text
+        self.stream.write("\n".join([to_text(item) for item in batch]) + "\n")
+
+class JsonLinesSink(_StreamSink):
+    def __init__(self, stream: TextIO, fields: Sequence[str], to_row: Callable[[Any], Sequence],
+                 batch_size: int = 1024, owns_stream: bool = False):
+        super().__init__(stream, batch_size, owns_stream)
+        self.fields = tuple(fields)
+        self.to_row = to_row
+        self._encode = json.JSONEncoder(ensure_ascii=False, separators=(",", ":")).encode
+
+    def _write_batch(self, batch: list):
+        fields, to_row, encode = self.fields, self.to_row, self._encode
+        self.stream.write("\n".join([encode(dict(zip(fields, to_row(item)))) for item in batch]) + "\n")
+
+class CsvSink(_StreamSink):
+    def __init__(self, stream: TextIO, fields: Sequence[str], to_row: Callable[[Any], Sequence],
+                 batch_size: int = 1024, owns_stream: bool = False):
+        super().__init__(stream, batch_size, owns_stream)
+        self.fields = tuple(fields)
+        self.to_row = to_row
+        self._writer = csv.writer(stream)
+        self._writer.writerow(self.fields)
+
+    def _write_batch(self, batch: list):
+        self._writer.writerows(map(self.to_row, batch))
+
+class ArrowSink(Sink):
+    """Parquet (parquet=True) or Arrow IPC file output. Every column is written as a nullable string."""
+
+    def __init__(self, path: str, fields: Sequence[str], to_row: Callable[[Any], Sequence],
+                 parquet: bool = True, batch_size: int = 65536):
+        try:
+            import pyarrow
+        except ImportError as e:
+            raise RuntimeError(f"{'Parquet' if parquet else 'Arrow'} output needs pyarrow: pip install pyarrow") from e
+        super().__init__(batch_size)
+        self.fields = tuple(fields)
+        self.to_row = to_row
+        self._pa = pyarrow
+        self._schema = pyarrow.schema([(field, pyarrow.string()) for field in self.fields])
+        if parquet:
+            import pyarrow.parquet
+
+            self._writer = pyarrow.parquet.ParquetWriter(path, self._schema)
+        else:
+            import pyarrow.ipc
+
+            self._writer = pyarrow.ipc.new_file(path, self._schema)
+
+    def _write_batch(self, batch: list):
+        columns = list(zip(*map(self.to_row, batch)))
+        arrays = [self._pa.array([None if value is None else str(value) for value in column], self._pa.string())
+                  for column in columns]
+        self._writer.write_table(self._pa.Table.from_arrays(arrays, schema=self._schema))
+
+    def close(self):
+        super().close()
+        self._writer.close()
+
+def open_sink(fmt: str, path: str | None, fields: Sequence[str], to_row: Callable[[Any], Sequence],
+              to_text: Callable[[Any], str] = str) -> Sink:
+    """A sink writing `fmt` to path, or stdout for None or "-" (not for the columnar formats)"""
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown output format {fmt}. Expected one of {', '.join(FORMATS)}")
+    if fmt in ("parquet", "arrow"):
+        if path in (None, "-"):
+            raise ValueError(f"{fmt} output needs a file path")
+        return ArrowSink(path, fields, to_row, parquet=fmt == "parquet")
+
+    owns_stream = path not in (None, "-")
+    stream = open(path, "w", encoding="utf-8", newline="", buffering=STREAM_BUFFER) if owns_stream else sys.stdout
+    if fmt == "pretty":
+        return PrettySink(stream, to_text, owns_stream=owns_stream)
+    if fmt == "jsonl":
+        return JsonLinesSink(stream, fields, to_row, owns_stream=owns_stream)
+    return CsvSink(stream, fields, to_row, owns_stream=owns_stream)
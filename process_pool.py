@@ -0,0 +1,60 @@
+"""
+Chunked work over a process pool, shared by btccli and xrpcli.
+
+map_chunks() runs a function over chunks of input in worker processes with only a
+couple of chunks per worker in flight, so the input can be a lazy iterator of any
+length and memory stays bounded by the chunks being worked on.
+
+    for result in map_chunks(derive_chunk, chunks, workers=4):
+        ...
+"""
+import os
+from collections import deque
+from itertools import islice
+from typing import Callable, Iterable, Iterator, TypeVar
+
+T = TypeVar("T")
+
+def resolve_workers(workers: int | None) -> int:
+    """workers, or the number of CPUs for None"""
+    if workers is None:
+        workers = os.cpu_count() or 1
+    if workers < 1:
+        raise ValueError(f"workers must be at least 1 but was {workers}")
+    return workers
+
+def map_chunks(func: Callable[[list], Iterable[T]], chunks: Iterator[list], workers: int | None = None,
+               ordered: bool = True) -> Iterator[T]:
+    """
+    Yield everything func(chunk) returns for each chunk. func must be picklable (a
+    module level function or a partial of one). Results come in chunk order unless
+    `ordered` is False, then chunk by chunk as they complete. `workers` defaults to the
+    number of CPUs; with 1, func runs in this process.
+    """
+    workers = resolve_workers(workers)
+    chunks = iter(chunks)
+    if workers == 1:
+        for chunk in chunks:
+            yield from func(chunk)
+        return
+
+    # only batch work needs a process pool, so don't make every import pay for it
+    from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+    max_in_flight = workers * 2
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        pending = deque(executor.submit(func, chunk) for chunk in islice(chunks, max_in_flight))
+        while pending:
+            if ordered:
+                done = [pending.popleft()]
+            else:
+                finished, _ = wait(pending, return_when=FIRST_COMPLETED)
+                done = [future for future in pending if future in finished]
+                for future in done:
+                    pending.remove(future)
+
+            for future in done:
+                next_chunk = next(chunks, None)
+                if next_chunk is not None:
+                    pending.append(executor.submit(func, next_chunk))
+                yield from future.result()
@@ -1,18 +1,78 @@
-from xrpl.clients import JsonRpcClient
-from xrpl.models.requests import AccountInfo
-from xrpcli.config import Config
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Iterable
+
+from xrpcli.config import DEFAULT_CLIENT_URL, Config
+from xrpcli.metrics import ClientMetrics
+
+if TYPE_CHECKING:
+    from xrpl.clients import Client
+
+@dataclass
+class BalanceResults:
+    balances: dict[str, float] = field(default_factory=dict)
+    """XRP balance per address"""
+
+    errors: dict[str, str] = field(default_factory=dict)
+    """Why the balance couldn't be fetched, per address"""
 
 def get_xrp_balance(config: Config) -> float:
-    """Fetches the XRP balance of an account."""
-    client: JsonRpcClient = config.client()
-    account_address: str = config.xrp_address
-    account_info_request = AccountInfo(account=account_address, ledger_index="validated")
-    response = client.request(account_info_request)
-
-    if response.is_successful():
-        balance_drops = response.result["account_data"]["Balance"]  # Balance in drops
-        balance_xrp = int(balance_drops) / 1_000_000  # Convert drops to XRP
-        return balance_xrp
-    else:
-        print("❌ Error fetching balance:", response.result.get("error_message", "Unknown error"))
+    """Fetches the XRP balance of an account through config.client(), so it uses the configured nodes."""
+    results = get_xrp_balances([config.xrp_address], client=config.client())
+    if config.xrp_address in results.errors:
+        print("❌ Error fetching balance:", results.errors[config.xrp_address])
         return None
+    return results.balances[config.xrp_address]
+
+def get_xrp_balances(addresses: Iterable[str], client_url: str = DEFAULT_CLIENT_URL, concurrency: int = 16,
+                     metrics: ClientMetrics | None = None, client: "Client | None" = None) -> BalanceResults:
+    """Fetches the XRP balances of many accounts concurrently. See get_xrp_balances_async."""
+    import asyncio
+
+    return asyncio.run(get_xrp_balances_async(addresses, client_url, concurrency, metrics, client))
+
+async def get_xrp_balances_async(addresses: Iterable[str], client_url: str = DEFAULT_CLIENT_URL,
+                                 concurrency: int = 16, metrics: ClientMetrics | None = None,
+                                 client: "Client | None" = None) -> BalanceResults:
+    """
+    Fetches the XRP balances of many accounts with AccountInfo requests issued
+    concurrently over one pooled connection to client_url, at most `concurrency` in
+    flight. Requests are recorded in metrics if given. Pass a client, such as
+    Config.client(), to send them through it instead, with its nodes, failover and
+    metrics. An address that fails ends up in BalanceResults.errors rather than raising.
+    """
+    import asyncio
+    from contextlib import nullcontext
+
+    from xrpcli.async_client import PooledAsyncJsonRpcClient
+
+    if concurrency < 1:
+        raise ValueError(f"concurrency must be at least 1 but was {concurrency}")
+
+    addresses = list(dict.fromkeys(addresses))
+    results = BalanceResults()
+    semaphore = asyncio.Semaphore(concurrency)
+    own_client = client is None
+
+    async with (PooledAsyncJsonRpcClient(client_url, max_connections=concurrency, metrics=metrics) if own_client
+                else nullcontext(client)) as client:
+        async def fetch(address: str):
+            async with semaphore:
+                try:
+                    results.balances[address] = await _fetch_balance(client, address)
+                except Exception as e:
+                    results.errors[address] = str(e) or type(e).__name__
+
+        await asyncio.gather(*(fetch(address) for address in addresses))
+    return results
+
+async def _fetch_balance(client, address: str) -> float:
+    from xrpl.models.requests import AccountInfo
+
+    account_info_request = AccountInfo(account=address, ledger_index="validated")
+    # the sync clients' request() runs _request_impl in an event loop of its own, await it in this one
+    response = await client._request_impl(account_info_request)
+
+    if not response.is_successful():
+        raise RuntimeError(response.result.get("error_message", response.result.get("error", "Unknown error")))
+    balance_drops = response.result["account_data"]["Balance"]  # Balance in drops
+    return int(balance_drops) / 1_000_000  # Convert drops to XRP
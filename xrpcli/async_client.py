@@ -0,0 +1,164 @@
+import asyncio
+import random
+import time
+from json import JSONDecodeError
+
+import httpx
+from xrpl.asyncio.clients import AsyncJsonRpcClient, XRPLRequestFailureException
+from xrpl.asyncio.clients.client import REQUEST_TIMEOUT
+from xrpl.asyncio.clients.utils import json_to_response, request_to_json_rpc
+from xrpl.clients import JsonRpcClient
+from xrpl.models.requests.request import Request
+from xrpl.models.response import Response
+
+from xrpcli.endpoints import IDEMPOTENT_METHODS, RETRYABLE_ERRORS, Endpoint, EndpointPool
+from xrpcli.metrics import ClientMetrics, instrumented_request
+
+class PooledAsyncJsonRpcClient(AsyncJsonRpcClient):
+    """
+    An AsyncJsonRpcClient that sends every request over one shared httpx connection
+    pool instead of opening a new HTTP client per request. The pool belongs to the
+    event loop the client is first used on, so create one per asyncio.run and close
+    it (or use it as an async context manager) when done. Requests are recorded in
+    metrics if given.
+    """
+
+    def __init__(self, url: str, max_connections: int = 16, timeout: float = REQUEST_TIMEOUT,
+                 metrics: ClientMetrics | None = None):
+        super().__init__(url)
+        self.metrics = metrics
+        self._http = httpx.AsyncClient(timeout=timeout,
+                                       limits=httpx.Limits(max_connections=max_connections,
+                                                           max_keepalive_connections=max_connections))
+
+    async def _post(self, payload: dict, timeout: float) -> httpx.Response:
+        return await self._http.post(self.url, json=payload, timeout=timeout)
+
+    async def _request_impl(self, request: Request, *, timeout: float = REQUEST_TIMEOUT) -> Response:
+        if self.metrics is not None:
+            return await instrumented_request(self.metrics, self._post, request, timeout)
+        response = await self._post(request_to_json_rpc(request), timeout)
+        try:
+            return json_to_response(response.json())
+        except JSONDecodeError:
+            raise XRPLRequestFailureException({"error": response.status_code, "error_message": response.text})
+
+    async def aclose(self):
+        await self._http.aclose()
+
+    async def __aenter__(self) -> "PooledAsyncJsonRpcClient":
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.aclose()
+
+class InstrumentedJsonRpcClient(JsonRpcClient):
+    """A JsonRpcClient that records every request in a ClientMetrics. Config.client() returns one when Config.metrics is set."""
+
+    def __init__(self, url: str, metrics: ClientMetrics):
+        super().__init__(url)
+        self.metrics = metrics
+
+    async def _post(self, payload: dict, timeout: float) -> httpx.Response:
+        # like JsonRpcClient, a new HTTP client per request since each sync request runs its own event loop
+        async with httpx.AsyncClient(timeout=timeout) as http:
+            return await http.post(self.url, json=payload)
+
+    async def _request_impl(self, request: Request, *, timeout: float = REQUEST_TIMEOUT) -> Response:
+        return await instrumented_request(self.metrics, self._post, request, timeout)
+
+class _NodeError(Exception):
+    """A response with a RETRYABLE_ERRORS error, raised so the request is retried elsewhere"""
+
+    def __init__(self, response: Response):
+        super().__init__(response.result.get("error"))
+        self.response = response
+
+class FailoverJsonRpcClient(JsonRpcClient):
+    """
+    A JsonRpcClient over an EndpointPool. Idempotent reads (IDEMPOTENT_METHODS) are
+    retried up to `retries` times with jittered exponential backoff, each attempt on
+    a freshly chosen endpoint, and with hedge=True are also sent to a second endpoint
+    if the first hasn't answered within its p95 latency; the first good answer wins.
+    Other requests, like submit, are sent exactly once.
+    """
+
+    def __init__(self, urls: list[str], metrics: ClientMetrics | None = None, retries: int = 2,
+                 backoff: float = 0.25, hedge: bool = True, pool: EndpointPool | None = None):
+        super().__init__(urls[0])
+        self.pool = pool or EndpointPool(urls)
+        self.metrics = metrics
+        self.retries = retries
+        self.backoff = backoff
+        self.hedge = hedge
+
+    async def _request_impl(self, request: Request, *, timeout: float = REQUEST_TIMEOUT) -> Response:
+        idempotent = request.method.value in IDEMPOTENT_METHODS
+        attempts = self.retries + 1 if idempotent else 1
+        # one HTTP client per request, like JsonRpcClient, since each sync request runs its own event loop
+        async with httpx.AsyncClient(timeout=timeout) as http:
+            error = None
+            for attempt in range(attempts):
+                if attempt:
+                    await asyncio.sleep(self.backoff * 2 ** (attempt - 1) * random.uniform(0.5, 1.5))
+                try:
+                    if idempotent and self.hedge and len(self.pool) > 1:
+                        return await self._hedged(http, request, timeout)
+                    return await self._attempt(http, self.pool.choose(), request, timeout)
+                except Exception as e:
+                    error = e
+            # every endpoint stayed busy: hand back rippled's answer like a single node client would
+            if isinstance(error, _NodeError):
+                return error.response
+            raise error
+
+    async def _attempt(self, http: httpx.AsyncClient, endpoint: Endpoint, request: Request, timeout: float) -> Response:
+        async def post(payload: dict, timeout: float) -> httpx.Response:
+            return await http.post(endpoint.url, json=payload, timeout=timeout)
+
+        start = time.perf_counter()
+        try:
+            if self.metrics is not None:
+                response = await instrumented_request(self.metrics, post, request, timeout)
+            else:
+                http_response = await post(request_to_json_rpc(request), timeout)
+                try:
+                    response = json_to_response(http_response.json())
+                except JSONDecodeError:
+                    raise XRPLRequestFailureException({"error": http_response.status_code,
+                                                       "error_message": http_response.text})
+        except asyncio.CancelledError:
+            # lost a hedge race; it was at least this slow
+            self.pool.record_latency(endpoint, time.perf_counter() - start)
+            raise
+        except Exception:
+            self.pool.record_failure(endpoint)
+            raise
+
+        if not response.is_successful() and response.result.get("error") in RETRYABLE_ERRORS:
+            self.pool.record_failure(endpoint)
+            raise _NodeError(response)
+        self.pool.record_success(endpoint, time.perf_counter() - start)
+        return response
+
+    async def _hedged(self, http: httpx.AsyncClient, request: Request, timeout: float) -> Response:
+        first = self.pool.choose()
+        tasks = {asyncio.ensure_future(self._attempt(http, first, request, timeout))}
+        done, _ = await asyncio.wait(tasks, timeout=self.pool.hedge_delay(first))
+        if not done:
+            second = self.pool.choose(exclude=(first,))
+            tasks.add(asyncio.ensure_future(self._attempt(http, second, request, timeout)))
+
+        error = None
+        try:
+            while tasks:
+                done, tasks = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        return task.result()
+                    error = task.exception()
+            raise error
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
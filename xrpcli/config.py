@@ -1,10 +1,23 @@
+import hashlib
 import json
-from dataclasses import dataclass
+import os
+import sys
+from dataclasses import dataclass, field
+from functools import partial
+from itertools import islice
+from typing import TYPE_CHECKING, Iterable, Iterator
 
-from xrpl import CryptoAlgorithm
-from xrpl.clients import JsonRpcClient
-from xrpl.core.keypairs import (derive_classic_address, derive_keypair,
-                                is_valid_message, sign)
+from process_pool import map_chunks, resolve_workers
+
+# xrpl is slow to import so it is only imported by the functions that need it
+if TYPE_CHECKING:
+    from xrpl.clients import JsonRpcClient
+
+    from xrpcli.metrics import ClientMetrics
+
+DEFAULT_CLIENT_URL = "https://xrplcluster.com" # Alternative: "https://s1.ripple.com:51234"
+DEFAULT_CLIENT_URLS = (DEFAULT_CLIENT_URL, "https://s1.ripple.com:51234", "https://s2.ripple.com:51234")
+"""Public nodes to spread requests over with Config.client_urls"""
 
 
 @dataclass
@@ -12,16 +25,85 @@ class Config:
     public_key: str
     private_key: str
     xrp_address: str
-    client_url: str = "https://xrplcluster.com" # Alternative: "https://s1.ripple.com:51234"
+    client_url: str = DEFAULT_CLIENT_URL
+    client_urls: list[str] = None
+    """Nodes to use instead of client_url. With more than one, client() fails over and hedges between them."""
 
-    _client: JsonRpcClient = None
+    metrics: "ClientMetrics" = None
+    """If set, every request made through client() is recorded in it"""
 
-    def client(self) -> JsonRpcClient :
+    _client: "JsonRpcClient" = None
+
+    def client(self) -> "JsonRpcClient" :
         if not self._client:
-            self._client = JsonRpcClient(self.client_url)
+            urls = list(self.client_urls or [self.client_url])
+            if len(urls) > 1:
+                from xrpcli.async_client import FailoverJsonRpcClient
+                self._client = FailoverJsonRpcClient(urls, metrics=self.metrics)
+            elif self.metrics is not None:
+                from xrpcli.async_client import InstrumentedJsonRpcClient
+                self._client = InstrumentedJsonRpcClient(urls[0], self.metrics)
+            else:
+                from xrpl.clients import JsonRpcClient
+                self._client = JsonRpcClient(urls[0])
         return self._client
 
-def validate(config : Config | dict) -> Config:
+class ValidationCache:
+    """
+    Fingerprints of configs that have passed validate(), so the signing round trip
+    and address derivation only run once per config. A fingerprint is a SHA-256 over
+    the public key, address and private key; no key material is stored. With a path
+    the fingerprints persist across runs, one hex digest per line.
+    """
+
+    def __init__(self, path : str | None = None):
+        self.path = path
+        self._fingerprints = set()
+        if path and os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as file:
+                self._fingerprints = {line.strip() for line in file if line.strip()}
+
+    @staticmethod
+    def fingerprint(config : Config) -> str:
+        # the private key is hashed in so a cached public key/address can't vouch for a different private key
+        material = "\0".join(("xrpcli-config-v1", config.public_key, config.xrp_address, config.private_key))
+        return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+    def __contains__(self, config : Config) -> bool:
+        return self.fingerprint(config) in self._fingerprints
+
+    def __len__(self) -> int:
+        return len(self._fingerprints)
+
+    def add(self, configs : Iterable[Config]):
+        new = {self.fingerprint(config) for config in configs} - self._fingerprints
+        self._fingerprints |= new
+        if self.path and new:
+            with open(self.path, "a", encoding="utf-8") as file:
+                file.writelines(f"{fingerprint}\n" for fingerprint in sorted(new))
+
+@dataclass
+class ConfigResults:
+    configs: dict = field(default_factory=dict)
+    """name (file path for load_configs) -> validated Config"""
+
+    errors: dict = field(default_factory=dict)
+    """name -> the exception that made it fail to load or validate"""
+
+def validate(config : Config | dict, cache : ValidationCache | None = None) -> Config:
+    """
+    Check the config's keys are a pair and the address is derived from them. With a
+    cache, configs that have already passed skip the EC work.
+    """
+    config = _check_fields(config)
+    if cache is not None and config in cache:
+        return config
+    _verify_keys(config)
+    if cache is not None:
+        cache.add([config])
+    return config
+
+def _check_fields(config : Config | dict) -> Config:
     if config is None:
         raise ValueError("Invalid Config: None")
     
@@ -33,7 +115,11 @@ def validate(config : Config | dict) -> Config:
         raise ValueError("Invalid Config: missing public_key")
     if not config.xrp_address:
         raise ValueError("Invalid Config: missing account")
-    
+    return config
+
+def _verify_keys(config : Config):
+    from xrpl.core.keypairs import derive_classic_address, is_valid_message, sign
+
     # Validate the public_key is the public_key for the given private key
     # Message to sign
     message = "test message".encode("utf-8")
@@ -46,16 +132,165 @@ def validate(config : Config | dict) -> Config:
     classic_address = derive_classic_address(config.public_key)
     if classic_address != config.xrp_address:
         raise ValueError(f"Invalid Config: Address given was {config.xrp_address} however, the address generated from the public key was {classic_address}")
-    return config
+
+def _verify_keys_or_error(config : Config) -> Exception | None:
+    try:
+        _verify_keys(config)
+    except Exception as e:
+        return e
+    return None
+
+def _verify_chunk(configs : list[Config]) -> list[Exception | None]:
+    return [_verify_keys_or_error(config) for config in configs]
+
+def validate_configs(configs : dict, cache : ValidationCache | None = None, workers : int | None = None) -> ConfigResults:
+    """
+    Validate many configs, given as name -> Config or dict. Cached configs are accepted
+    straight away and the rest are verified in parallel across `workers` processes with
+    map_chunks (default: one per CPU, 1 runs in this process). Failures are collected
+    per name.
+    """
+    results = ConfigResults()
+    pending = {}
+    for name, config in configs.items():
+        try:
+            config = _check_fields(config)
+        except Exception as e:
+            results.errors[name] = e
+            continue
+        if cache is not None and config in cache:
+            results.configs[name] = config
+        else:
+            pending[name] = config
+
+    # the EC work is pure Python, so it needs processes rather than threads to run in parallel
+    workers = min(resolve_workers(workers), max(1, len(pending)))
+    to_verify = list(pending.values())
+    chunksize = max(1, len(to_verify) // (workers * 4))
+    chunks = (to_verify[start:start + chunksize] for start in range(0, len(to_verify), chunksize))
+    errors = list(map_chunks(_verify_chunk, chunks, workers))
+
+    for (name, config), error in zip(pending.items(), errors):
+        if error is None:
+            results.configs[name] = config
+        else:
+            results.errors[name] = error
+    if cache is not None:
+        cache.add(config for name, config in pending.items() if name in results.configs)
+    return results
 
 def calculate_config(seed: str) -> Config:
+    from xrpl import CryptoAlgorithm
+    from xrpl.core.keypairs import derive_classic_address, derive_keypair
+
     public_key, private_key = derive_keypair(seed, algorithm=CryptoAlgorithm.SECP256K1)
     classic_address = derive_classic_address(public_key)
     config = Config(public_key=public_key, private_key=private_key, xrp_address=classic_address)
     return config
 
-def load_config(file_path: str) -> Config:
-    return validate(_load_config(file_path))
+@dataclass
+class SeedResult:
+    index: int
+    """Position of the seed in the input"""
+
+    seed: str = field(default=None, repr=False)
+    """Only set by calculate_configs(keep_seeds=True)"""
+
+    config: Config | None = None
+    """The derived config. None if derivation failed"""
+
+    error: Exception | None = None
+    """What went wrong for this seed. None on success"""
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+def iter_seed_file(file_path : str) -> Iterator[str]:
+    """Stream seeds from a file with one seed per line, or stdin for "-". Blank lines and # comments are skipped."""
+    file = sys.stdin if file_path == "-" else open(file_path, "r", encoding="utf-8")
+    try:
+        for line in file:
+            line = line.strip()
+            if line and not line.startswith("#"):
+                yield line
+    finally:
+        if file is not sys.stdin:
+            file.close()
+
+def calculate_configs(seeds : Iterable[str], workers : int | None = None, chunksize : int = 64,
+                      ordered : bool = True, check : bool = False, keep_seeds : bool = False) -> Iterator[SeedResult]:
+    """
+    calculate_config() for many seeds over a process pool, the way make_bitcoin_keysets
+    does it for Bitcoin keys: seeds are sent in chunks of `chunksize` with only a few
+    chunks per worker in flight, so `seeds` can be a lazy iterable of any length.
+    Results are in input order unless `ordered` is False. A bad seed is reported in its
+    SeedResult rather than stopping the run; its error never includes the seed.
+
+    Seeds are not sent back from the workers. With keep_seeds each result gets its seed
+    attached here, from the chunks still in flight.
+
+    derive_keypair already checks the derived keys sign and verify, so `check` (a full
+    validate() of each config) is only needed for extra assurance. `workers` defaults
+    to the number of CPUs; 1 runs everything in this process.
+    """
+    if chunksize < 1:
+        raise ValueError(f"chunksize must be at least 1 but was {chunksize}")
+    workers = resolve_workers(workers)
+
+    entries = enumerate(seeds)
+    chunks = iter(lambda: list(islice(entries, chunksize)), [])
+    calculate_chunk = partial(_calculate_config_chunk, check=check)
+    if not keep_seeds:
+        return map_chunks(calculate_chunk, chunks, workers, ordered)
+
+    in_flight = {}
+    return _attach_seeds(map_chunks(calculate_chunk, _remember_seeds(chunks, in_flight), workers, ordered), in_flight)
+
+def _remember_seeds(chunks : Iterator[list[tuple[int, str]]], in_flight : dict[int, str]) -> Iterator[list[tuple[int, str]]]:
+    for chunk in chunks:
+        in_flight.update(chunk)
+        yield chunk
+
+def _attach_seeds(results : Iterator[SeedResult], in_flight : dict[int, str]) -> Iterator[SeedResult]:
+    for result in results:
+        result.seed = in_flight.pop(result.index)
+        yield result
+
+def _calculate_config_chunk(chunk : list[tuple[int, str]], check : bool) -> list[SeedResult]:
+    results = []
+    for index, seed in chunk:
+        result = SeedResult(index)
+        try:
+            result.config = calculate_config(seed)
+            if check:
+                _verify_keys(result.config)
+        except Exception as e:
+            # xrpl's messages can quote the seed, so only the exception type goes back
+            result.error = ValueError(f"Invalid seed ({type(e).__name__})")
+        results.append(result)
+    return results
+
+def load_config(file_path: str, cache : ValidationCache | None = None) -> Config:
+    return validate(_load_config(file_path), cache)
+
+def load_configs(dir_path : str, cache : ValidationCache | None = None, workers : int | None = None) -> ConfigResults:
+    """Load and validate every *.json config in a directory, keyed by file path. Bad files end up in errors."""
+    results = ConfigResults()
+    configs = {}
+    for name in sorted(os.listdir(dir_path)):
+        file_path = os.path.join(dir_path, name)
+        if not name.endswith(".json") or not os.path.isfile(file_path):
+            continue
+        try:
+            configs[file_path] = _load_config(file_path)
+        except (OSError, ValueError) as e:
+            results.errors[file_path] = e
+
+    validated = validate_configs(configs, cache, workers)
+    results.configs.update(validated.configs)
+    results.errors.update(validated.errors)
+    return results
 
 def _load_config(file_path : str) -> dict:
     """Load a JSON config file into a Python dictionary."""
@@ -0,0 +1,116 @@
+"""
+Health and latency tracking for a pool of rippled endpoints.
+
+EndpointPool picks an endpoint for each request at random, weighted by the inverse
+of its smoothed latency, so faster nodes take most of the traffic while slower ones
+keep getting enough to notice when they recover. An endpoint that fails (connection
+error, bad HTTP response, or a rippled error such as tooBusy) is skipped for a
+cooldown that doubles with each consecutive failure.
+
+FailoverJsonRpcClient (in xrpcli.async_client) uses a pool to retry idempotent
+reads with backoff and to hedge them to a second endpoint after the first one's
+p95 latency. Config.client() returns one when Config.client_urls lists several nodes.
+"""
+import random
+import threading
+import time
+from typing import Iterable
+
+from xrpcli.fees import RollingWindow
+
+IDEMPOTENT_METHODS = frozenset({
+    "account_channels", "account_currencies", "account_info", "account_lines", "account_nfts", "account_objects",
+    "account_offers", "account_tx", "book_offers", "fee", "gateway_balances", "ledger", "ledger_closed",
+    "ledger_current", "ledger_data", "ledger_entry", "nft_info", "server_info", "server_state", "tx",
+})
+"""Read only methods that are safe to retry or send to two nodes at once"""
+
+RETRYABLE_ERRORS = frozenset({"tooBusy", "noNetwork", "noCurrent", "noClosed", "slowDown", "failedToForward"})
+"""rippled errors that say more about the node than about the request"""
+
+class Endpoint:
+    def __init__(self, url: str, window: int = 64):
+        self.url = url
+        self.latencies = RollingWindow(window)
+        self.latency: float | None = None
+        """Exponentially smoothed latency in seconds, None until the first response"""
+
+        self.failures = 0
+        """Consecutive failures"""
+
+        self.down_until = 0.0
+
+    def healthy(self, now: float | None = None) -> bool:
+        return (now if now is not None else time.monotonic()) >= self.down_until
+
+    def __repr__(self) -> str:
+        return f"Endpoint({self.url!r})"
+
+class EndpointPool:
+    """Thread safe; share one pool across threads and clients."""
+
+    def __init__(self, urls: Iterable[str], cooldown: float = 2.0, max_cooldown: float = 60.0,
+                 smoothing: float = 0.2, hedge_after: float = 1.0, rng: random.Random | None = None):
+        self.endpoints = [Endpoint(url) for url in dict.fromkeys(urls)]
+        if not self.endpoints:
+            raise ValueError("An endpoint pool needs at least one URL")
+        self.cooldown = cooldown
+        self.max_cooldown = max_cooldown
+        self.smoothing = smoothing
+        self.hedge_after = hedge_after
+        """Hedge delay for endpoints without enough latency samples for a p95"""
+
+        self._rng = rng or random.Random()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self.endpoints)
+
+    def choose(self, exclude: Iterable[Endpoint] = ()) -> Endpoint:
+        """
+        A healthy endpoint not in exclude, weighted towards low latency. If none are
+        healthy, the one that comes out of its cooldown first.
+        """
+        exclude = set(exclude)
+        now = time.monotonic()
+        with self._lock:
+            candidates = [e for e in self.endpoints if e not in exclude] or self.endpoints
+            healthy = [e for e in candidates if e.healthy(now)]
+            if not healthy:
+                return min(candidates, key=lambda e: e.down_until)
+
+            known = [e.latency for e in healthy if e.latency is not None]
+            # endpoints without a latency yet are weighted like the fastest so they get tried
+            fastest = min(known) if known else 1.0
+            weights = [1 / max(e.latency if e.latency is not None else fastest, 1e-3) for e in healthy]
+            return self._rng.choices(healthy, weights)[0]
+
+    def record_latency(self, endpoint: Endpoint, seconds: float):
+        with self._lock:
+            endpoint.latencies.append(seconds)
+            endpoint.latency = seconds if endpoint.latency is None else (
+                self.smoothing * seconds + (1 - self.smoothing) * endpoint.latency)
+
+    def record_success(self, endpoint: Endpoint, seconds: float):
+        self.record_latency(endpoint, seconds)
+        with self._lock:
+            endpoint.failures = 0
+            endpoint.down_until = 0.0
+
+    def record_failure(self, endpoint: Endpoint):
+        with self._lock:
+            endpoint.failures += 1
+            endpoint.down_until = time.monotonic() + min(self.max_cooldown, self.cooldown * 2 ** (endpoint.failures - 1))
+
+    def hedge_delay(self, endpoint: Endpoint, percentile: float = 95.0) -> float:
+        """How long to wait on endpoint before also asking another: its p95 latency once it has a few samples"""
+        with self._lock:
+            if len(endpoint.latencies) < 8:
+                return self.hedge_after
+            return endpoint.latencies.percentile(percentile)
+
+    def status(self) -> list[dict]:
+        now = time.monotonic()
+        with self._lock:
+            return [{"url": e.url, "healthy": e.healthy(now), "latency": e.latency,
+                     "p95": e.latencies.percentile(95), "failures": e.failures} for e in self.endpoints]
@@ -0,0 +1,209 @@
+"""
+Continuous fee sampling.
+
+FeeMonitor polls the Fee method on an interval and keeps the last `window` samples
+of the open ledger fee, median fee and queue size in fixed-size rolling windows.
+Each window keeps a running sum and a sorted copy of its values, so moving averages
+and percentiles are read without scanning the window, and recommended_fee() answers
+from memory instead of making a request per transaction. xrpl_keys.py --fees N
+samples N times with sample_many() and prints stats().
+"""
+import threading
+import time
+from bisect import bisect_left, insort
+from collections import deque
+from dataclasses import dataclass
+
+from xrpcli.config import Config
+
+@dataclass(frozen=True)
+class FeeSample:
+    time: float
+    """Unix time the sample was taken"""
+
+    base_fee: int
+    """All fees in drops"""
+
+    minimum_fee: int
+    median_fee: int
+    open_ledger_fee: int
+    current_queue_size: int
+    max_queue_size: int
+    expected_ledger_size: int
+    ledger_current_index: int
+
+    @property
+    def queue_fill(self) -> float:
+        """Fraction of the transaction queue in use"""
+        return self.current_queue_size / self.max_queue_size if self.max_queue_size else 0.0
+
+def fetch_fee_sample(config: Config) -> FeeSample:
+    """One Fee request. Raises RuntimeError if it fails."""
+    from xrpl.models.requests import Fee
+
+    response = config.client().request(Fee())
+    if not response.is_successful():
+        raise RuntimeError(f"Error fetching fees: {response.result.get('error_message', 'Unknown error')}")
+    result = response.result
+    drops = result["drops"]
+    return FeeSample(time=time.time(),
+                     base_fee=int(drops["base_fee"]),
+                     minimum_fee=int(drops["minimum_fee"]),
+                     median_fee=int(drops["median_fee"]),
+                     open_ledger_fee=int(drops["open_ledger_fee"]),
+                     current_queue_size=int(result.get("current_queue_size", 0)),
+                     max_queue_size=int(result.get("max_queue_size", 0)),
+                     expected_ledger_size=int(result.get("expected_ledger_size", 0)),
+                     ledger_current_index=int(result.get("ledger_current_index", 0)))
+
+class RollingWindow:
+    """
+    The last `size` values with a running sum and a sorted copy. mean() and
+    percentile() are O(1); append() is a binary search plus a shift of the sorted
+    copy, which for windows of a few hundred values is a single memmove.
+    """
+
+    def __init__(self, size: int):
+        if size < 1:
+            raise ValueError(f"Window size must be at least 1 but was {size}")
+        self.size = size
+        self._values = deque(maxlen=size)
+        self._sorted = []
+        self._sum = 0
+
+    def __len__(self) -> int:
+        return len(self._values)
+
+    def append(self, value: int | float):
+        if len(self._values) == self.size:
+            oldest = self._values[0]
+            del self._sorted[bisect_left(self._sorted, oldest)]
+            self._sum -= oldest
+        self._values.append(value)
+        insort(self._sorted, value)
+        self._sum += value
+
+    @property
+    def latest(self) -> int | float | None:
+        return self._values[-1] if self._values else None
+
+    def mean(self) -> float | None:
+        return self._sum / len(self._values) if self._values else None
+
+    def percentile(self, p: float) -> int | float | None:
+        """Nearest-rank percentile, p from 0 to 100"""
+        if not self._sorted:
+            return None
+        if not 0 <= p <= 100:
+            raise ValueError(f"Percentile must be between 0 and 100 but was {p}")
+        return self._sorted[min(len(self._sorted) - 1, int(p / 100 * len(self._sorted)))]
+
+    def min(self) -> int | float | None:
+        return self._sorted[0] if self._sorted else None
+
+    def max(self) -> int | float | None:
+        return self._sorted[-1] if self._sorted else None
+
+class FeeMonitor:
+    """
+    Samples fees every `interval` seconds on a background thread once start()ed, or
+    on demand with sample(). Use as a context manager to start and stop polling.
+    """
+
+    def __init__(self, config: Config, interval: float = 4.0, window: int = 256):
+        self.config = config
+        self.interval = interval
+        self.open_ledger_fee = RollingWindow(window)
+        self.median_fee = RollingWindow(window)
+        self.queue_size = RollingWindow(window)
+        self.queue_fill = RollingWindow(window)
+        self.latest: FeeSample | None = None
+        self.errors = 0
+        """Failed polls so far"""
+
+        self.last_error: Exception | None = None
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def record(self, sample: FeeSample):
+        with self._lock:
+            self.latest = sample
+            self.open_ledger_fee.append(sample.open_ledger_fee)
+            self.median_fee.append(sample.median_fee)
+            self.queue_size.append(sample.current_queue_size)
+            self.queue_fill.append(sample.queue_fill)
+
+    def sample(self) -> FeeSample:
+        """Fetch and record one sample now"""
+        sample = fetch_fee_sample(self.config)
+        self.record(sample)
+        return sample
+
+    def sample_many(self, count: int, interval: float | None = None) -> int:
+        """
+        Take `count` samples in this thread, `interval` (default: the monitor's) seconds
+        apart. Failures are counted in errors like polling does. Returns how many succeeded.
+        """
+        interval = self.interval if interval is None else interval
+        taken = 0
+        for i in range(count):
+            if i:
+                time.sleep(interval)
+            try:
+                self.sample()
+                taken += 1
+            except Exception as e:
+                self.errors += 1
+                self.last_error = e
+        return taken
+
+    def start(self) -> "FeeMonitor":
+        if self._thread is None:
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._poll, name="fee-monitor", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _poll(self):
+        while not self._stop.is_set():
+            try:
+                self.sample()
+            except Exception as e:
+                # keep polling; a transient failure shouldn't stop fee tracking
+                self.errors += 1
+                self.last_error = e
+            self._stop.wait(self.interval)
+
+    def __enter__(self) -> "FeeMonitor":
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def recommended_fee(self, percentile: float = 75.0, max_fee: int | None = None) -> int:
+        """
+        Fee in drops to submit with: the higher of the current open ledger fee and its
+        `percentile` over the window, and never below the minimum fee. Capped at
+        max_fee if given. Takes a sample first if there are none yet.
+        """
+        if self.latest is None:
+            self.sample()
+        with self._lock:
+            fee = max(self.latest.open_ledger_fee, self.latest.minimum_fee,
+                      self.open_ledger_fee.percentile(percentile))
+        return min(fee, max_fee) if max_fee is not None else fee
+
+    def stats(self) -> dict:
+        """Moving averages and percentiles of everything tracked"""
+        with self._lock:
+            return {name: {"latest": window.latest, "mean": window.mean(), "p50": window.percentile(50),
+                           "p90": window.percentile(90), "min": window.min(), "max": window.max()}
+                    for name, window in (("open_ledger_fee", self.open_ledger_fee), ("median_fee", self.median_fee),
+                                         ("queue_size", self.queue_size), ("queue_fill", self.queue_fill))}
@@ -0,0 +1,173 @@
+"""
+In-process metrics for XRPL requests.
+
+ClientMetrics collects, per request method, a latency histogram, bytes sent and
+received, how many requests were part of a paginated (marker) walk and the error
+codes returned. Set Config.metrics (or pass metrics to get_xrp_balances) and every
+request made through the client is recorded. stage() times application phases such
+as parsing, so a slow run can be attributed to the node, pagination or local work.
+
+Export with to_json(), to_prometheus() (text exposition format) or report().
+"""
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+"""Histogram bucket upper bounds in seconds, as in the Prometheus client defaults"""
+
+@dataclass
+class MethodMetrics:
+    requests: int = 0
+    seconds: float = 0.0
+    """Total latency"""
+
+    max_seconds: float = 0.0
+    buckets: list = field(default_factory=lambda: [0] * (len(LATENCY_BUCKETS) + 1))
+    """Request count per latency bucket (not cumulative), the last is +Inf"""
+
+    bytes_sent: int = 0
+    bytes_received: int = 0
+    paged: int = 0
+    """Requests that carried a marker or got one back, i.e. pages of a paginated result"""
+
+    errors: dict = field(default_factory=dict)
+    """Error code (rippled error, HTTP status or exception name) -> count"""
+
+class ClientMetrics:
+    """Thread safe; the sharded transaction fetch records from several threads at once."""
+
+    def __init__(self):
+        self.methods: dict[str, MethodMetrics] = {}
+        self.stages: dict[str, float] = {}
+        """Stage name -> total seconds"""
+
+        self._lock = threading.Lock()
+
+    def record(self, method: str, seconds: float, bytes_sent: int = 0, bytes_received: int = 0,
+               paged: bool = False, error: str | None = None):
+        with self._lock:
+            metrics = self.methods.setdefault(method, MethodMetrics())
+            metrics.requests += 1
+            metrics.seconds += seconds
+            metrics.max_seconds = max(metrics.max_seconds, seconds)
+            metrics.buckets[bisect_left(LATENCY_BUCKETS, seconds)] += 1
+            metrics.bytes_sent += bytes_sent
+            metrics.bytes_received += bytes_received
+            metrics.paged += paged
+            if error is not None:
+                metrics.errors[error] = metrics.errors.get(error, 0) + 1
+
+    @contextmanager
+    def stage(self, name: str):
+        """Time a block of application work under name"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            with self._lock:
+                self.stages[name] = self.stages.get(name, 0.0) + elapsed
+
+    def to_json(self) -> dict:
+        with self._lock:
+            return {
+                "methods": {method: {
+                    "requests": m.requests,
+                    "seconds": m.seconds,
+                    "mean_seconds": m.seconds / m.requests if m.requests else 0.0,
+                    "max_seconds": m.max_seconds,
+                    "latency_buckets": {str(bound): count for bound, count in zip(LATENCY_BUCKETS + ("+Inf",), m.buckets)},
+                    "bytes_sent": m.bytes_sent,
+                    "bytes_received": m.bytes_received,
+                    "paged": m.paged,
+                    "errors": dict(m.errors),
+                } for method, m in sorted(self.methods.items())},
+                "stages": dict(self.stages),
+            }
+
+    def to_prometheus(self) -> str:
+        """The metrics in the Prometheus text exposition format"""
+        lines = [
+            "# HELP xrpl_request_duration_seconds XRPL request latency",
+            "# TYPE xrpl_request_duration_seconds histogram",
+        ]
+        with self._lock:
+            methods = sorted(self.methods.items())
+            for method, m in methods:
+                cumulative = 0
+                for bound, count in zip(LATENCY_BUCKETS + ("+Inf",), m.buckets):
+                    cumulative += count
+                    lines.append(f'xrpl_request_duration_seconds_bucket{{method="{method}",le="{bound}"}} {cumulative}')
+                lines.append(f'xrpl_request_duration_seconds_sum{{method="{method}"}} {m.seconds}')
+                lines.append(f'xrpl_request_duration_seconds_count{{method="{method}"}} {m.requests}')
+
+            lines += ["# HELP xrpl_request_bytes_total Bytes sent and received in XRPL requests",
+                      "# TYPE xrpl_request_bytes_total counter"]
+            for method, m in methods:
+                lines.append(f'xrpl_request_bytes_total{{method="{method}",direction="sent"}} {m.bytes_sent}')
+                lines.append(f'xrpl_request_bytes_total{{method="{method}",direction="received"}} {m.bytes_received}')
+
+            lines += ["# HELP xrpl_paged_requests_total Requests that were pages of a paginated result",
+                      "# TYPE xrpl_paged_requests_total counter"]
+            lines += [f'xrpl_paged_requests_total{{method="{method}"}} {m.paged}' for method, m in methods]
+
+            lines += ["# HELP xrpl_request_errors_total Failed XRPL requests by error code",
+                      "# TYPE xrpl_request_errors_total counter"]
+            lines += [f'xrpl_request_errors_total{{method="{method}",error="{error}"}} {count}'
+                      for method, m in methods for error, count in sorted(m.errors.items())]
+
+            lines += ["# HELP xrpcli_stage_seconds_total Time spent in application stages",
+                      "# TYPE xrpcli_stage_seconds_total counter"]
+            lines += [f'xrpcli_stage_seconds_total{{stage="{stage}"}} {seconds}' for stage, seconds in self.stages.items()]
+        return "\n".join(lines) + "\n"
+
+    def report(self) -> str:
+        """Human readable breakdown"""
+        metrics = self.to_json()
+        lines = ["📊 Request Profile:"]
+        for method, m in metrics["methods"].items():
+            errors = ", ".join(f"{error} x{count}" for error, count in m["errors"].items()) or "none"
+            lines.append(f"🔹 {method:<14} {m['requests']:>5} requests {m['seconds']:>8.3f} s total "
+                         f"{m['mean_seconds'] * 1000:>8.1f} ms mean {m['max_seconds'] * 1000:>8.1f} ms max "
+                         f"{m['bytes_received'] / 1024:>10,.1f} KiB received  {m['paged']} paged  errors: {errors}")
+        for stage, seconds in metrics["stages"].items():
+            lines.append(f"⏱️  {stage:<14} {seconds:>8.3f} s")
+        return "\n".join(lines)
+
+async def instrumented_request(metrics: ClientMetrics, post, request, timeout: float):
+    """
+    Send request with post(payload, timeout) -> httpx.Response and record it in metrics.
+    Mirrors xrpl-py's JSON-RPC _request_impl so the clients behave the same with or
+    without instrumentation.
+    """
+    from json import JSONDecodeError
+
+    from xrpl.asyncio.clients import XRPLRequestFailureException
+    from xrpl.asyncio.clients.utils import json_to_response, request_to_json_rpc
+
+    payload = request_to_json_rpc(request)
+    method = payload["method"]
+    had_marker = payload["params"][0].get("marker") is not None
+
+    start = time.perf_counter()
+    try:
+        http_response = await post(payload, timeout)
+    except Exception as e:
+        metrics.record(method, time.perf_counter() - start, paged=had_marker, error=type(e).__name__)
+        raise
+    elapsed = time.perf_counter() - start
+    sent, received = len(http_response.request.content), len(http_response.content)
+
+    try:
+        response = json_to_response(http_response.json())
+    except JSONDecodeError:
+        metrics.record(method, elapsed, sent, received, had_marker, error=f"HTTP {http_response.status_code}")
+        raise XRPLRequestFailureException({"error": http_response.status_code, "error_message": http_response.text})
+
+    error = None if response.is_successful() else str(response.result.get("error", "unknown"))
+    paged = had_marker or response.result.get("marker") is not None
+    metrics.record(method, elapsed, sent, received, paged, error)
+    return response
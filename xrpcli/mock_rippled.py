@@ -0,0 +1,510 @@
+"""
+A local stand-in for rippled, for load tests and offline runs.
+
+MockRippled serves the JSON-RPC methods xrpcli uses (account_tx, account_info, fee,
+server_info, ledger_current) over HTTP and, with ws_port set, the same methods plus
+subscribe/unsubscribe over WebSocket. Account histories are synthetic and generated
+on demand from the account and position, so an account with a million transactions
+costs no memory. account_tx pages them with real {"ledger", "seq"} markers, honouring
+ledger ranges, forward and limit (capped at max_limit like rippled).
+
+Faults are injected per request: `latency` plus up to `jitter` seconds of delay,
+tooBusy errors at `error_rate` and HTTP 503s at `http_error_rate`. close_ledger()
+validates a new ledger, adding transactions to accounts and publishing them to
+WebSocket subscribers; drop_connections() disconnects every WebSocket client.
+
+    with MockRippled({"rAccount...": 1_000_000}, latency=0.02) as node:
+        config.client_url = node.url
+
+    python -m xrpcli.mock_rippled --transactions 1000000 --port 5005 --ws-port 6006
+"""
+import hashlib
+import json
+import random
+import threading
+import time
+from bisect import bisect_left, bisect_right
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from xrpcli.transactions import ACCOUNT_TX_MAX_LIMIT, RIPPLE_EPOCH
+
+FIRST_LEDGER = 32_570
+"""First ledger of the synthetic histories, like the oldest ledger full history nodes have"""
+
+LEDGER_STEP = 3
+"""Ledgers between an account's consecutive synthetic transactions"""
+
+HISTORY_START = 500_000_000
+"""Ripple time of the first synthetic transaction (2015-11)"""
+
+COUNTERPARTIES = 64
+
+class _Account:
+    def __init__(self, address: str, count: int):
+        self.address = address
+        self.count = count
+        """Synthetic transactions, at FIRST_LEDGER + position * LEDGER_STEP"""
+
+        self.added: list[dict] = []
+        """Transactions added by close_ledger(), in ledger order after the synthetic ones"""
+
+        self.added_ledgers: list[int] = []
+
+    def __len__(self) -> int:
+        return self.count + len(self.added)
+
+    def ledger_of(self, position: int) -> int:
+        if position < self.count:
+            return FIRST_LEDGER + position * LEDGER_STEP
+        return self.added_ledgers[position - self.count]
+
+    def positions(self, ledger_min: int, ledger_max: int) -> range:
+        """Positions of the transactions in [ledger_min, ledger_max]"""
+        # the added transactions all come after the synthetic ones, so the matches are one contiguous range
+        first = max(0, min(self.count, -(-(ledger_min - FIRST_LEDGER) // LEDGER_STEP)))
+        last = max(0, min(self.count, (ledger_max - FIRST_LEDGER) // LEDGER_STEP + 1))
+        added_first = bisect_left(self.added_ledgers, ledger_min)
+        added_last = bisect_right(self.added_ledgers, ledger_max)
+        if first >= last:
+            first = self.count + added_first
+        if added_last > added_first:
+            last = self.count + added_last
+        return range(first, max(first, last))
+
+    def transaction(self, position: int) -> dict:
+        if position >= self.count:
+            return self.added[position - self.count]
+        return synthetic_transaction(self.address, position, self.ledger_of(position),
+                                     HISTORY_START + position * 3600)
+
+def synthetic_transaction(account: str, position: int, ledger_index: int, date: int) -> dict:
+    """A deterministic Payment to or from `account`, in account_tx (API v2) shape"""
+    digest = hashlib.sha256(f"{account}:{position}".encode("utf-8")).digest()
+    counterparty = f"rMockCounterparty{digest[0] % COUNTERPARTIES:017d}"
+    outgoing = digest[1] & 1
+    amount = str(int.from_bytes(digest[2:7], 'big') % 10**10 + 1)
+    tx_hash = hashlib.sha512(digest).hexdigest()[:64].upper()
+    tx_json = {
+        "Account": account if outgoing else counterparty,
+        "Destination": counterparty if outgoing else account,
+        "DeliverMax": amount,
+        "Fee": str(10 + digest[7] % 40),
+        "Flags": 0,
+        "LastLedgerSequence": ledger_index + 4,
+        "Sequence": position + 1,
+        "TransactionType": "Payment",
+        "date": date,
+        "ledger_index": ledger_index,
+    }
+    return {
+        "close_time_iso": datetime.fromtimestamp(date + RIPPLE_EPOCH, timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ"),
+        "hash": tx_hash,
+        "ledger_index": ledger_index,
+        "meta": {"TransactionIndex": 0, "TransactionResult": "tesSUCCESS", "delivered_amount": amount},
+        "tx_json": tx_json,
+        "validated": True,
+    }
+
+class MockRippled:
+    def __init__(self, accounts: dict[str, int] | None = None, host: str = "127.0.0.1", port: int = 0,
+                 ws_port: int | None = None, latency: float = 0.0, jitter: float = 0.0, error_rate: float = 0.0,
+                 http_error_rate: float = 0.0, page_size: int = 200, max_limit: int = ACCOUNT_TX_MAX_LIMIT,
+                 ledger_interval: float = 0.0, seed: int = 1):
+        self.accounts = {address: _Account(address, count) for address, count in (accounts or {}).items()}
+        self.host = host
+        self.port = port
+        """0 picks a free port; the actual one is in url once started"""
+
+        self.ws_port = ws_port
+        """None for no WebSocket server, 0 for any free port"""
+
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        """Fraction of requests answered with a tooBusy error"""
+
+        self.http_error_rate = http_error_rate
+        """Fraction of HTTP requests answered with a 503"""
+
+        self.page_size = page_size
+        """account_tx page size when the request has no limit"""
+
+        self.max_limit = max_limit
+        self.ledger_interval = ledger_interval
+        """If > 0, close a ledger every this many seconds once started"""
+
+        last_synthetic = max((account.ledger_of(account.count - 1) for account in self.accounts.values() if account.count),
+                             default=FIRST_LEDGER)
+        self.ledger_index = last_synthetic + 1
+        """Last validated ledger"""
+
+        self.requests: dict[str, int] = {}
+        """Method -> requests received"""
+
+        self.injected_errors = 0
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._http = None
+        self._ws_loop = None
+        self._ws_server = None
+        self._subscribers: dict = {}
+        self._stop = threading.Event()
+        self._threads: list[threading.Thread] = []
+
+    @property
+    def url(self) -> str:
+        return f"http://{self.host}:{self.port}"
+
+    @property
+    def ws_url(self) -> str | None:
+        return f"ws://{self.host}:{self.ws_port}" if self.ws_port is not None else None
+
+    def add_account(self, address: str, count: int = 0):
+        with self._lock:
+            self.accounts[address] = _Account(address, count)
+
+    def start(self) -> "MockRippled":
+        node = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+                if node._delay_and_roll(node.http_error_rate):
+                    self._reply(503, b"Service Unavailable", "text/plain")
+                    return
+                try:
+                    payload = json.loads(body)
+                    params = (payload.get("params") or [{}])[0]
+                    result = node.handle(payload.get("method"), params)
+                except (ValueError, TypeError, AttributeError):
+                    result = {"error": "invalidParams", "error_message": "Bad request", "status": "error"}
+                self._reply(200, json.dumps({"result": result}).encode("utf-8"), "application/json")
+
+            def _reply(self, status: int, body: bytes, content_type: str):
+                self.send_response(status)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                try:
+                    self.wfile.write(body)
+                except (BrokenPipeError, ConnectionResetError):
+                    pass  # the client gave up, e.g. the losing side of a hedged request
+
+        self._stop.clear()
+        self._http = ThreadingHTTPServer((self.host, self.port), Handler)
+        self._http.daemon_threads = True
+        self.port = self._http.server_address[1]
+        self._spawn(self._http.serve_forever)
+        if self.ws_port is not None:
+            self._start_websocket()
+        if self.ledger_interval > 0:
+            self._spawn(self._close_ledgers)
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._http is not None:
+            self._http.shutdown()
+            self._http.server_close()
+            self._http = None
+        if self._ws_loop is not None:
+            import asyncio
+
+            async def shutdown():
+                self._ws_server.close()
+                await self._ws_server.wait_closed()
+
+            asyncio.run_coroutine_threadsafe(shutdown(), self._ws_loop).result()
+            self._ws_loop.call_soon_threadsafe(self._ws_loop.stop)
+        for thread in self._threads:
+            thread.join()
+        self._threads = []
+        self._ws_loop = None
+
+    def __enter__(self) -> "MockRippled":
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def _spawn(self, target):
+        thread = threading.Thread(target=target, name="mock-rippled", daemon=True)
+        thread.start()
+        self._threads.append(thread)
+
+    def _delay_and_roll(self, rate: float) -> bool:
+        """Sleep the injected latency and roll for a fault at `rate`"""
+        with self._lock:
+            delay = self.latency + self.jitter * self._rng.random()
+            fault = self._rng.random() < rate
+        if delay:
+            time.sleep(delay)
+        return fault
+
+    def handle(self, method: str, params: dict) -> dict:
+        """The result of one request, as rippled would return it"""
+        with self._lock:
+            self.requests[method] = self.requests.get(method, 0) + 1
+            if self._rng.random() < self.error_rate:
+                self.injected_errors += 1
+                return {"error": "tooBusy", "error_code": 9, "error_message": "The server is too busy to help you now.",
+                        "status": "error", "request": {"command": method, **params}}
+        handler = getattr(self, f"_{method}", None) if method in self.METHODS else None
+        if handler is None:
+            return {"error": "unknownCmd", "error_code": 32, "error_message": "Unknown method.", "status": "error"}
+        return handler(params)
+
+    def _delayed_handle(self, method: str, params: dict) -> dict:
+        self._delay_and_roll(0.0)
+        return self.handle(method, params)
+
+    METHODS = frozenset({"account_tx", "account_info", "fee", "server_info", "ledger_current"})
+
+    def _account(self, params: dict) -> _Account | dict:
+        account = self.accounts.get(params.get("account"))
+        if account is None:
+            return {"error": "actNotFound", "error_code": 19, "error_message": "Account not found.", "status": "error",
+                    "account": params.get("account"), "validated": True}
+        return account
+
+    def _account_tx(self, params: dict) -> dict:
+        account = self._account(params)
+        if isinstance(account, dict):
+            return account
+        with self._lock:
+            validated = self.ledger_index
+            ledger_min = params.get("ledger_index_min", -1)
+            ledger_max = params.get("ledger_index_max", -1)
+            ledger_min = FIRST_LEDGER if ledger_min in (-1, None) else ledger_min
+            ledger_max = validated if ledger_max in (-1, None) else min(ledger_max, validated)
+            forward = bool(params.get("forward", False))
+            limit = max(1, min(int(params.get("limit") or self.page_size), self.max_limit))
+
+            positions = account.positions(ledger_min, ledger_max)
+            marker = params.get("marker")
+            if marker is not None:
+                try:
+                    seq = int(marker["seq"])
+                except (TypeError, KeyError, ValueError):
+                    return {"error": "invalidParams", "error_message": "Invalid field 'marker'.", "status": "error"}
+                start = max(0, seq - positions.start if forward else positions.stop - 1 - seq)
+            else:
+                start = 0
+            ordered = positions if forward else positions[::-1]
+            page = ordered[start:start + limit]
+            transactions = [account.transaction(position) for position in page]
+
+            result = {"account": account.address, "ledger_index_min": ledger_min, "ledger_index_max": ledger_max,
+                      "limit": limit, "transactions": transactions, "validated": True, "status": "success"}
+            if start + limit < len(ordered):
+                next_position = ordered[start + limit]
+                result["marker"] = {"ledger": account.ledger_of(next_position), "seq": next_position}
+            return result
+
+    def _account_info(self, params: dict) -> dict:
+        account = self._account(params)
+        if isinstance(account, dict):
+            return account
+        digest = hashlib.sha256(account.address.encode("utf-8")).digest()
+        with self._lock:
+            return {"account_data": {"Account": account.address, "Balance": str(int.from_bytes(digest[:5], 'big') % 10**14),
+                                     "Flags": 0, "LedgerEntryType": "AccountRoot", "OwnerCount": 0,
+                                     "Sequence": len(account) + 1},
+                    "ledger_index": self.ledger_index, "validated": True, "status": "success"}
+
+    def _fee(self, params: dict) -> dict:
+        with self._lock:
+            queue = self._rng.randrange(0, 200)
+            return {"current_ledger_size": "40", "current_queue_size": str(queue), "expected_ledger_size": "150",
+                    "ledger_current_index": self.ledger_index + 1, "max_queue_size": "2000",
+                    "drops": {"base_fee": "10", "median_fee": "5000", "minimum_fee": "10",
+                              "open_ledger_fee": str(10 + queue * 2)},
+                    "levels": {"median_level": "128000", "minimum_level": "256", "open_ledger_level": "256",
+                               "reference_level": "256"},
+                    "status": "success"}
+
+    def _server_info(self, params: dict) -> dict:
+        with self._lock:
+            return {"info": {"build_version": "mock", "complete_ledgers": f"{FIRST_LEDGER}-{self.ledger_index}",
+                             "server_state": "full", "validated_ledger": {"seq": self.ledger_index, "base_fee_xrp": 0.00001}},
+                    "status": "success"}
+
+    def _ledger_current(self, params: dict) -> dict:
+        with self._lock:
+            return {"ledger_current_index": self.ledger_index + 1, "status": "success"}
+
+    def close_ledger(self, transactions: dict[str, int] | None = None) -> int:
+        """
+        Validate the next ledger with `transactions` new transactions per account
+        (default: none) and publish it to subscribers. Returns the ledger index.
+        """
+        with self._lock:
+            self.ledger_index += 1
+            ledger_index = self.ledger_index
+            date = int(time.time()) - RIPPLE_EPOCH
+            new = []
+            for address, count in (transactions or {}).items():
+                account = self.accounts.setdefault(address, _Account(address, 0))
+                for _ in range(count):
+                    tx = synthetic_transaction(address, len(account), ledger_index, date)
+                    account.added.append(tx)
+                    account.added_ledgers.append(ledger_index)
+                    new.append((address, tx))
+        self._publish(ledger_index, date, new)
+        return ledger_index
+
+    def _close_ledgers(self):
+        while not self._stop.wait(self.ledger_interval):
+            with self._lock:
+                addresses = list(self.accounts)
+                busy = [address for address in addresses if self._rng.random() < 0.1]
+            self.close_ledger({address: 1 for address in busy})
+
+    def drop_connections(self):
+        """Disconnect every WebSocket client, as a node restart would"""
+        if self._ws_loop is None:
+            return
+        import asyncio
+
+        async def drop():
+            for websocket in list(self._subscribers):
+                await websocket.close()
+
+        asyncio.run_coroutine_threadsafe(drop(), self._ws_loop).result()
+
+    def _start_websocket(self):
+        import asyncio
+
+        from websockets.asyncio.server import serve
+
+        ready = threading.Event()
+        errors = []
+
+        async def listen():
+            try:
+                self._ws_server = await serve(self._ws_handler, self.host, self.ws_port)
+                self.ws_port = self._ws_server.sockets[0].getsockname()[1]
+            except OSError as e:
+                errors.append(e)
+            finally:
+                ready.set()
+
+        def run():
+            self._ws_loop = asyncio.new_event_loop()
+            self._ws_loop.run_until_complete(listen())
+            if not errors:
+                self._ws_loop.run_forever()
+            self._ws_loop.close()
+
+        self._spawn(run)
+        ready.wait()
+        if errors:
+            raise errors[0]
+
+    async def _ws_handler(self, websocket):
+        import asyncio
+
+        self._subscribers[websocket] = {"accounts": set(), "ledger": False}
+        try:
+            async for message in websocket:
+                try:
+                    request = json.loads(message)
+                except ValueError:
+                    await websocket.send(json.dumps({"error": "jsonInvalid", "status": "error", "type": "response"}))
+                    continue
+                command = request.get("command")
+                params = {k: v for k, v in request.items() if k not in ("command", "id", "api_version")}
+                if command in ("subscribe", "unsubscribe"):
+                    result = self._subscribe(websocket, params, command == "subscribe")
+                else:
+                    result = await asyncio.get_running_loop().run_in_executor(None, self._delayed_handle, command, params)
+                response = {"id": request.get("id"), "type": "response"}
+                if result.get("status") == "error":
+                    response.update(result)
+                else:
+                    response.update({"result": result, "status": "success"})
+                await websocket.send(json.dumps(response))
+        except Exception:
+            pass  # the client went away
+        finally:
+            self._subscribers.pop(websocket, None)
+
+    def _subscribe(self, websocket, params: dict, subscribe: bool) -> dict:
+        subscription = self._subscribers[websocket]
+        accounts = set(params.get("accounts") or [])
+        if subscribe:
+            subscription["accounts"] |= accounts
+            subscription["ledger"] |= "ledger" in (params.get("streams") or [])
+        else:
+            subscription["accounts"] -= accounts
+            subscription["ledger"] &= "ledger" not in (params.get("streams") or [])
+        with self._lock:
+            command = "subscribe" if subscribe else "unsubscribe"
+            self.requests[command] = self.requests.get(command, 0) + 1
+            if subscribe and subscription["ledger"]:
+                return {"fee_base": 10, "ledger_index": self.ledger_index, "ledger_time": int(time.time()) - RIPPLE_EPOCH,
+                        "reserve_base": 1_000_000, "reserve_inc": 200_000, "validated_ledgers": f"{FIRST_LEDGER}-{self.ledger_index}"}
+        return {}
+
+    def _publish(self, ledger_index: int, date: int, new: list[tuple[str, dict]]):
+        if self._ws_loop is None or not self._subscribers:
+            return
+        import asyncio
+
+        async def publish():
+            for websocket, subscription in list(self._subscribers.items()):
+                messages = []
+                for address, tx in new:
+                    involved = {tx["tx_json"]["Account"], tx["tx_json"]["Destination"]}
+                    if subscription["accounts"] & involved:
+                        messages.append({"type": "transaction", "engine_result": "tesSUCCESS", "engine_result_code": 0,
+                                         "close_time_iso": tx["close_time_iso"], "hash": tx["hash"],
+                                         "ledger_index": ledger_index, "meta": tx["meta"], "tx_json": tx["tx_json"],
+                                         "validated": True})
+                if subscription["ledger"]:
+                    messages.append({"type": "ledgerClosed", "ledger_index": ledger_index, "ledger_time": date,
+                                     "fee_base": 10, "txn_count": len(new), "validated_ledgers": f"{FIRST_LEDGER}-{ledger_index}"})
+                for message in messages:
+                    try:
+                        await websocket.send(json.dumps(message))
+                    except Exception:
+                        break
+
+        asyncio.run_coroutine_threadsafe(publish(), self._ws_loop).result()
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Run a mock rippled with synthetic account histories")
+    parser.add_argument("--accounts", type=int, default=1, help="number of synthetic accounts (default: 1)")
+    parser.add_argument("--transactions", type=int, default=10_000, help="transactions per account (default: 10000)")
+    parser.add_argument("--port", type=int, default=5005)
+    parser.add_argument("--ws-port", type=int, help="also serve WebSocket on this port")
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds added to every request")
+    parser.add_argument("--jitter", type=float, default=0.0, help="up to this many more random seconds per request")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of requests answered with tooBusy")
+    parser.add_argument("--http-error-rate", type=float, default=0.0, help="fraction of HTTP requests answered with a 503")
+    parser.add_argument("--page-size", type=int, default=200, help="account_tx page size when no limit is given")
+    parser.add_argument("--ledger-interval", type=float, default=4.0, help="seconds between ledgers, 0 to never close one")
+    args = parser.parse_args()
+
+    accounts = {f"rMockAccount{i:021d}": args.transactions for i in range(args.accounts)}
+    node = MockRippled(accounts, port=args.port, ws_port=args.ws_port, latency=args.latency, jitter=args.jitter,
+                       error_rate=args.error_rate, http_error_rate=args.http_error_rate, page_size=args.page_size,
+                       ledger_interval=args.ledger_interval).start()
+    print(f"🔹 JSON-RPC  : {node.url}")
+    if node.ws_url:
+        print(f"🔹 WebSocket : {node.ws_url}")
+    for address in accounts:
+        print(f"🔹 {address}: {args.transactions} transactions")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        node.stop()
@@ -0,0 +1,217 @@
+"""
+XRP price sources.
+
+A PriceProvider gives the current price and a daily series of closing prices.
+YahooPriceProvider fetches them with yfinance, FixturePriceProvider serves them from
+a local JSON file for tests and offline runs, and CachedPriceProvider wraps either
+with a TTL cache of the current price and an optional on-disk cache of daily closes,
+so a day's close is only ever fetched once.
+
+value_transactions() values every transaction at its own date with a single series
+fetch covering the whole history.
+"""
+import json
+import os
+import time
+from abc import ABC, abstractmethod
+from bisect import bisect_right
+from datetime import date, datetime, timedelta, timezone
+from typing import Iterable
+
+from xrpcli.transactions import RIPPLE_EPOCH, delivered_amount
+
+DEFAULT_SYMBOL = "XRP-USD"
+
+class PriceFetchError(RuntimeError):
+    """A price source could not be reached or gave an unusable answer"""
+
+class PriceProvider(ABC):
+    """Source of XRP prices"""
+
+    symbol: str = DEFAULT_SYMBOL
+
+    @abstractmethod
+    def current_price(self) -> float | None:
+        """None if the price is unavailable"""
+
+    @abstractmethod
+    def daily_prices(self, start: date, end: date) -> dict[date, float]:
+        """
+        Closing price for each day from start to end inclusive. Days without a price are
+        left out. Raises PriceFetchError if the source failed, rather than returning {}.
+        """
+
+class YahooPriceProvider(PriceProvider):
+    """Prices from Yahoo Finance"""
+
+    def __init__(self, symbol: str = DEFAULT_SYMBOL):
+        self.symbol = symbol
+
+    def _ticker(self):
+        # yfinance pulls in pandas, so only pay for it when a price is actually requested
+        import yfinance as yf
+        return yf.Ticker(self.symbol)
+
+    def current_price(self) -> float | None:
+        try:
+            # Get the latest market price
+            return float(self._ticker().history(period="1d")['Close'].iloc[-1])
+        except Exception as e:
+            print(f"❌ Failed to fetch XRP price: {e}")
+            return None
+
+    def daily_prices(self, start: date, end: date) -> dict[date, float]:
+        try:
+            # end is exclusive for yfinance
+            closes = self._ticker().history(start=start.isoformat(), end=(end + timedelta(days=1)).isoformat(),
+                                            interval="1d")['Close']
+        except Exception as e:
+            raise PriceFetchError(f"Failed to fetch XRP price history: {e}") from e
+        return {timestamp.date(): float(close) for timestamp, close in closes.items()}
+
+class FixturePriceProvider(PriceProvider):
+    """Fixed prices, for tests and offline runs. current defaults to the latest daily close."""
+
+    def __init__(self, daily: dict[date, float], current: float | None = None, symbol: str = DEFAULT_SYMBOL):
+        self.symbol = symbol
+        self.daily = dict(daily)
+        self.current = current if current is not None else (self.daily[max(self.daily)] if self.daily else None)
+
+    @classmethod
+    def from_file(cls, file_path: str) -> "FixturePriceProvider":
+        """Load {"symbol": ..., "current": ..., "daily": {"YYYY-MM-DD": close, ...}} from a JSON file"""
+        with open(file_path, "r", encoding="utf-8") as file:
+            fixture = json.load(file)
+        daily = {date.fromisoformat(day): float(close) for day, close in fixture.get("daily", {}).items()}
+        return cls(daily, fixture.get("current"), fixture.get("symbol", DEFAULT_SYMBOL))
+
+    def current_price(self) -> float | None:
+        return self.current
+
+    def daily_prices(self, start: date, end: date) -> dict[date, float]:
+        return {day: close for day, close in self.daily.items() if start <= day <= end}
+
+class CachedPriceProvider(PriceProvider):
+    """
+    Caches another provider. The current price is kept for ttl seconds. Daily closes
+    are kept for good, in memory and in cache_path if given; only the days missing
+    from the cache are fetched, in one request. Today's close is never cached since
+    it isn't final yet, and neither is a day outside the range the provider returned
+    prices for, since its absence may be a failed or partial fetch.
+    """
+
+    def __init__(self, provider: PriceProvider, ttl: float = 300, cache_path: str | None = None):
+        self.provider = provider
+        self.symbol = provider.symbol
+        self.ttl = ttl
+        self.cache_path = cache_path
+        self._current: tuple[float, float] | None = None  # price, fetched at
+        self._daily: dict[date, float | None] = {}
+        if cache_path and os.path.exists(cache_path):
+            self._load()
+
+    def _load(self):
+        with open(self.cache_path, "r", encoding="utf-8") as file:
+            cached = json.load(file).get(self.symbol, {})
+        self._daily = {date.fromisoformat(day): close for day, close in cached.get("daily", {}).items()}
+        if cached.get("current"):
+            self._current = tuple(cached["current"])
+
+    def _save(self):
+        cache = {}
+        if os.path.exists(self.cache_path):
+            with open(self.cache_path, "r", encoding="utf-8") as file:
+                cache = json.load(file)
+        cache[self.symbol] = {
+            "current": list(self._current) if self._current else None,
+            "daily": {day.isoformat(): close for day, close in sorted(self._daily.items())},
+        }
+        # write then rename so an interrupted run can't leave a truncated cache
+        tmp_path = f"{self.cache_path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as file:
+            json.dump(cache, file)
+        os.replace(tmp_path, self.cache_path)
+
+    def current_price(self) -> float | None:
+        if self._current and time.time() - self._current[1] < self.ttl:
+            return self._current[0]
+        price = self.provider.current_price()
+        if price is not None:
+            self._current = (price, time.time())
+            if self.cache_path:
+                self._save()
+        return price
+
+    def daily_prices(self, start: date, end: date) -> dict[date, float]:
+        today = datetime.now(timezone.utc).date()
+        days = [start + timedelta(days=i) for i in range((end - start).days + 1)]
+        missing = [day for day in days if day >= today or day not in self._daily]
+
+        fetched = {}
+        if missing:
+            # a PriceFetchError propagates before anything is recorded
+            fetched = self.provider.daily_prices(min(missing), max(missing))
+            # remember gaps between the days the provider returned too, so they aren't asked for again
+            first, last = min(fetched, default=None), max(fetched, default=None)
+            known = [day for day in missing if fetched and first <= day <= last and day < today]
+            for day in known:
+                self._daily[day] = fetched.get(day)
+            if self.cache_path and known:
+                self._save()
+
+        prices = {day: self._daily.get(day) for day in days if day < today}
+        prices.update({day: close for day, close in fetched.items() if day >= today and start <= day <= end})
+        return {day: close for day, close in prices.items() if close is not None}
+
+_price_provider: PriceProvider | None = None
+
+def get_price_provider() -> PriceProvider:
+    """The provider used by get_xrp_usd_price. Yahoo Finance with a 5 minute memory cache unless set."""
+    global _price_provider
+    if _price_provider is None:
+        _price_provider = CachedPriceProvider(YahooPriceProvider())
+    return _price_provider
+
+def set_price_provider(provider: PriceProvider):
+    global _price_provider
+    _price_provider = provider
+
+def transaction_date(tx: dict) -> date | None:
+    """UTC date of an account_tx entry"""
+    ripple_time = tx.get("tx_json", {}).get("date")
+    if ripple_time is None:
+        return None
+    return datetime.fromtimestamp(ripple_time + RIPPLE_EPOCH, timezone.utc).date()
+
+def value_transactions(transactions: Iterable[dict], provider: PriceProvider | None = None) -> list[float | None]:
+    """
+    USD value of each transaction's XRP amount at the close of its day, or the latest
+    earlier close if that day has none. None for transactions without an XRP amount
+    or a price. The prices for the whole range are fetched in one request; if that fails
+    the error is printed and every value is None. Partial payments are valued at what
+    they delivered.
+    """
+    provider = provider or get_price_provider()
+    transactions = list(transactions)
+    dates = [transaction_date(tx) for tx in transactions]
+    known = [day for day in dates if day is not None]
+    if not known:
+        return [None] * len(transactions)
+
+    # a week of slack before the first transaction to fall back on if its day is missing
+    try:
+        series = sorted(provider.daily_prices(min(known) - timedelta(days=7), max(known)).items())
+    except PriceFetchError as e:
+        print(f"❌ {e}")
+        return [None] * len(transactions)
+    days = [day for day, _ in series]
+
+    values = []
+    for tx, day in zip(transactions, dates):
+        amount = delivered_amount(tx)
+        i = bisect_right(days, day) - 1 if day is not None else -1
+        if not isinstance(amount, str) or i < 0:
+            values.append(None)
+        else:
+            values.append(int(amount) / 1_000_000 * series[i][1])
+    return values
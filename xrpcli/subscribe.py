@@ -0,0 +1,148 @@
+"""
+Live account transactions over a rippled WebSocket subscription.
+
+TransactionStream subscribes to the accounts of one or more configs (and to the
+ledger stream, which doubles as a heartbeat) and yields each validated transaction
+as it arrives, in the same shape account_tx returns, so it can go straight to
+parse_xrp_transaction. When the connection drops, or goes quiet for longer than
+`idle_timeout`, it reconnects with backoff, resubscribes and then fills the gap with
+one account_tx walk per account from the last ledger it saw. Transactions are
+deduplicated by hash, so the catch-up can overlap the live stream safely; pass the
+hashes of transactions already shown as known_hashes so they aren't repeated.
+
+xrpl's WebsocketClient doesn't notice the server closing the connection: iterating it
+blocks until `idle_timeout` passes without a message. So idle_timeout is also how long
+a dropped connection goes unnoticed. The ledger stream sends a message every 3-5
+seconds, so the default of 15 seconds only trips on a dead or stalled connection.
+
+    for tx in TransactionStream([config]):
+        parse_xrp_transaction(tx)
+"""
+import time
+from collections import deque
+from datetime import datetime
+from typing import Iterable, Iterator, Sequence
+
+from xrpcli.config import Config
+from xrpcli.transactions import RIPPLE_EPOCH, TransactionFetchError, iter_transactions
+
+DEFAULT_WEBSOCKET_URL = "wss://xrplcluster.com" # Alternative: "wss://s1.ripple.com"
+
+class TransactionStream:
+    def __init__(self, configs: Sequence[Config], url: str = DEFAULT_WEBSOCKET_URL, since_ledger: int | None = None,
+                 idle_timeout: float = 15.0, reconnect_delay: float = 1.0, max_reconnect_delay: float = 30.0,
+                 remember: int = 10_000, known_hashes: Iterable[str] = ()):
+        if not configs:
+            raise ValueError("A transaction stream needs at least one account")
+        self.configs = list(configs)
+        self.url = url
+        self.last_ledger = since_ledger
+        """Last validated ledger seen. The catch-up after a (re)connect starts here."""
+
+        self.idle_timeout = idle_timeout
+        """Seconds without any message (ledgers close every 3-5 s) before the connection is presumed dead.
+        Also how long it takes to notice the server closed it."""
+
+        self.reconnect_delay = reconnect_delay
+        self.max_reconnect_delay = max_reconnect_delay
+        self.connects = 0
+        self.caught_up = 0
+        """Transactions delivered by catch-up rather than the live stream"""
+
+        self.last_error: Exception | None = None
+        self._seen = set()
+        self._seen_order = deque(maxlen=remember)
+        for tx_hash in filter(None, known_hashes):
+            self._remember(tx_hash)
+
+    @property
+    def accounts(self) -> list[str]:
+        return list(dict.fromkeys(config.xrp_address for config in self.configs))
+
+    def __iter__(self) -> Iterator[dict]:
+        from xrpl.clients import WebsocketClient
+        from xrpl.models.requests import Subscribe, StreamParameter
+
+        delay = self.reconnect_delay
+        while True:
+            try:
+                with WebsocketClient(self.url, timeout=self.idle_timeout) as client:
+                    response = client.request(Subscribe(accounts=self.accounts, streams=[StreamParameter.LEDGER]))
+                    if not response.is_successful():
+                        raise ConnectionError(f"Subscribe failed: {response.result.get('error_message', response.result.get('error'))}")
+                    self.connects += 1
+                    delay = self.reconnect_delay
+
+                    # subscribed first, so anything validated during the catch-up arrives on the stream too
+                    if self.last_ledger is not None:
+                        for tx in self._catch_up():
+                            self.caught_up += 1
+                            yield tx
+                    self._advance(response.result.get("ledger_index"))
+
+                    for message in client:
+                        tx = self._handle(message)
+                        if tx is not None:
+                            yield tx
+            except (OSError, ConnectionError, TransactionFetchError) as e:
+                self.last_error = e
+            except Exception as e:
+                # websockets and xrpl have their own exception types for a dropped or refused connection
+                if type(e).__module__.split(".")[0] not in ("websockets", "xrpl"):
+                    raise
+                self.last_error = e
+            time.sleep(delay)
+            delay = min(self.max_reconnect_delay, delay * 2)
+
+    def _catch_up(self) -> Iterator[dict]:
+        # from the last ledger itself, not the one after: its transactions may not all have arrived before the drop
+        for config in self.configs:
+            for tx in iter_transactions(config, ledger_index_min=self.last_ledger, forward=True):
+                if tx.get("validated", True) and self._first_time(tx):
+                    self._advance(tx.get("ledger_index"))
+                    yield tx
+
+    def _handle(self, message: dict) -> dict | None:
+        if message.get("type") == "ledgerClosed":
+            self._advance(message.get("ledger_index"))
+        elif message.get("type") == "transaction" and message.get("validated", False):
+            tx = to_account_tx(message)
+            if self._first_time(tx):
+                self._advance(tx["ledger_index"])
+                return tx
+        return None
+
+    def _advance(self, ledger_index: int | None):
+        if ledger_index is not None and (self.last_ledger is None or ledger_index > self.last_ledger):
+            self.last_ledger = ledger_index
+
+    def _first_time(self, tx: dict) -> bool:
+        tx_hash = tx.get("hash") or tx.get("tx_json", {}).get("hash")
+        if tx_hash is None:
+            return True
+        if tx_hash in self._seen:
+            return False
+        self._remember(tx_hash)
+        return True
+
+    def _remember(self, tx_hash: str):
+        if len(self._seen_order) == self._seen_order.maxlen:
+            self._seen.discard(self._seen_order[0])
+        self._seen_order.append(tx_hash)
+        self._seen.add(tx_hash)
+
+def to_account_tx(message: dict) -> dict:
+    """A transaction stream message in the shape of an account_tx entry (API v1 or v2 messages)"""
+    tx_json = dict(message.get("tx_json") or message.get("transaction") or {})
+    ledger_index = message.get("ledger_index", tx_json.get("ledger_index"))
+    tx_json.setdefault("ledger_index", ledger_index)
+    if "date" not in tx_json and message.get("close_time_iso"):
+        close_time = datetime.fromisoformat(message["close_time_iso"].replace("Z", "+00:00"))
+        tx_json["date"] = int(close_time.timestamp()) - RIPPLE_EPOCH
+    return {
+        "tx_json": tx_json,
+        "meta": message.get("meta"),
+        "hash": message.get("hash", tx_json.get("hash")),
+        "ledger_index": ledger_index,
+        "validated": message.get("validated", False),
+    }
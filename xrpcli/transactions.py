@@ -1,7 +1,9 @@
+import queue
+import threading
+from dataclasses import dataclass
 from datetime import datetime
-from xrpl.models.requests import AccountTx
 from xrpcli.config import Config
-from typing import List
+from typing import Callable, Iterator, List
 
 # Lookup table for XRP Transaction Result Codes with correct explanations
 XRPL_RESULT_CODES = {
@@ -28,91 +30,250 @@ XRPL_RESULT_CODES = {
     "tejINVALID": "❌ Failed - Invalid transaction format"
 }
 
-def get_all_transactions(config: Config) -> List[dict]:
-    # Replace with your actual XRP Ledger address
-    account_address = config.xrp_address
+RIPPLE_EPOCH = 946684800
+"""Unix time of the Ripple epoch, 2000-01-01 00:00 UTC"""
 
-    # Pagination parameters
-    marker = None
+ACCOUNT_TX_MAX_LIMIT = 400
+"""Largest page size rippled accepts for account_tx from non-admin clients"""
+
+SHARD_BUFFER_PAGES = 4
+"""Pages a shard fetches ahead of the caller before it waits for them to be consumed"""
+
+class TransactionFetchError(RuntimeError):
+    """An account_tx request failed"""
+
+@dataclass
+class FetchProgress:
+    pages: int
+    """Pages received so far, across all shards"""
+
+    transactions: int
+    """Transactions yielded so far"""
+
+    ledger_index: int | None
+    """Ledger of the last transaction yielded"""
+
+    shard: int
+    """Shard the last page came from"""
+
+def get_all_transactions(config: Config) -> List[dict]:
+    """All transactions of the account, newest first. Prints an error and returns what it has if a request fails."""
     all_transactions = []
+    try:
+        for tx in iter_transactions(config, forward=False):
+            all_transactions.append(tx)
+    except TransactionFetchError as e:
+        print(f"Failed to retrieve transactions: {e}")
+
+    return all_transactions
+
+def iter_transactions(config: Config, ledger_index_min: int = -1, ledger_index_max: int = -1, forward: bool = True,
+                      limit: int = ACCOUNT_TX_MAX_LIMIT, shards: int = 1,
+                      progress: Callable[[FetchProgress], None] | None = None) -> Iterator[dict]:
+    """
+    Stream the account's transactions in ledger order (oldest first unless forward is False).
+
+    Pages are requested at the server's maximum page size. With shards > 1 the ledger
+    range is split into that many contiguous slices which are fetched concurrently, one
+    thread per shard. Transactions are still yielded strictly in ledger order: the
+    current shard is streamed as its pages arrive while later shards fetch at most
+    SHARD_BUFFER_PAGES pages ahead and then wait, so memory stays bounded.
+    -1 for ledger_index_min/max means the earliest/latest validated ledger the server has.
 
+    progress, if given, is called after each page is yielded. A failed request raises
+    TransactionFetchError.
+    """
+    if shards < 1:
+        raise ValueError(f"shards must be at least 1 but was {shards}")
     client = config.client()
 
-    while True:
-        # Create an AccountTx request with pagination
-        account_tx_request = AccountTx(
-            account=account_address,
-            ledger_index_min=0,  # Fetch from the earliest ledger
-            ledger_index_max=-1, # Up to the latest ledger
-            limit=10,            # Adjust limit per request
-            marker=marker        # Continue from the last point if paginating
-        )
-
-        # Send the request
-        response = client.request(account_tx_request)
-
-        if response.is_successful():
-            transactions = response.result.get("transactions", [])
-            all_transactions.extend(transactions)
-
-            # Check if there's more data to fetch
-            marker = response.result.get("marker")
-            if not marker:  # No more pages to fetch
-                break
-        else:
-            print(f"Failed to retrieve transactions: {response.result.get('error_message', 'Unknown error')}")
-            break
-    
-    return all_transactions
+    if shards == 1:
+        ranges = [(ledger_index_min, ledger_index_max)]
+    else:
+        ranges = _split_ledger_range(*resolve_ledger_range(config, ledger_index_min, ledger_index_max), shards)
+        if not forward:
+            ranges.reverse()
 
+    pages = 0
+    transactions = 0
+    for shard, page in _iter_pages(client, config.xrp_address, ranges, forward, limit):
+        pages += 1
+        for tx in page:
+            transactions += 1
+            yield tx
+        if progress:
+            progress(FetchProgress(pages=pages, transactions=transactions,
+                                   ledger_index=_ledger_index(page[-1]) if page else None, shard=shard))
 
-def parse_xrp_transaction(tx):
-    """Prints a human-readable summary of an XRP Ledger transaction."""
+def resolve_ledger_range(config: Config, ledger_index_min: int = -1, ledger_index_max: int = -1) -> tuple[int, int]:
+    """Replace -1 bounds with the actual ledger indexes the server will search for the account"""
+    result = _account_tx_page(config.client(), config.xrp_address, ledger_index_min, ledger_index_max, True, 1, None)
+    return result["ledger_index_min"], result["ledger_index_max"]
+
+def _account_tx_page(client, account: str, ledger_index_min: int, ledger_index_max: int, forward: bool, limit: int, marker) -> dict:
+    from xrpl.models.requests import AccountTx
+
+    # Create an AccountTx request with pagination
+    account_tx_request = AccountTx(
+        account=account,
+        ledger_index_min=ledger_index_min,
+        ledger_index_max=ledger_index_max,
+        forward=forward,
+        limit=limit,
+        marker=marker        # Continue from the last point if paginating
+    )
+
+    # Send the request
+    response = client.request(account_tx_request)
+    if not response.is_successful():
+        raise TransactionFetchError(response.result.get('error_message', response.result.get('error', 'Unknown error')))
+    return response.result
+
+def _iter_shard(client, account: str, ledger_range: tuple[int, int], forward: bool, limit: int,
+                stop: threading.Event | None = None) -> Iterator[list[dict]]:
+    marker = None
+    while stop is None or not stop.is_set():
+        result = _account_tx_page(client, account, *ledger_range, forward, limit, marker)
+        yield result.get("transactions", [])
+
+        # Check if there's more data to fetch
+        marker = result.get("marker")
+        if not marker:  # No more pages to fetch
+            return
+
+def _iter_pages(client, account: str, ranges: list[tuple[int, int]], forward: bool, limit: int) -> Iterator[tuple[int, list[dict]]]:
+    if len(ranges) == 1:
+        for page in _iter_shard(client, account, ranges[0], forward, limit):
+            yield 0, page
+        return
+
+    done = object()
+    stop = threading.Event()
+    queues = [queue.Queue(maxsize=SHARD_BUFFER_PAGES) for _ in ranges]
+
+    def put(shard: int, item) -> bool:
+        """Wait for room in the shard's queue, unless the stream is stopped"""
+        while not stop.is_set():
+            try:
+                queues[shard].put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                pass
+        return False
+
+    def fetch_shard(shard: int):
+        try:
+            for page in _iter_shard(client, account, ranges[shard], forward, limit, stop):
+                if not put(shard, page):
+                    return
+            put(shard, done)
+        except BaseException as e:
+            put(shard, e)
+
+    threads = [threading.Thread(target=fetch_shard, args=(shard,), daemon=True) for shard in range(len(ranges))]
+    for thread in threads:
+        thread.start()
+    try:
+        for shard, shard_queue in enumerate(queues):
+            while (page := shard_queue.get()) is not done:
+                if isinstance(page, BaseException):
+                    raise page
+                yield shard, page
+    finally:
+        # the caller stopped early or a shard failed, don't keep fetching the rest
+        stop.set()
+
+def _split_ledger_range(ledger_index_min: int, ledger_index_max: int, shards: int) -> list[tuple[int, int]]:
+    """Split [min, max] into up to `shards` contiguous ranges, in ascending order"""
+    span = ledger_index_max - ledger_index_min + 1
+    shards = max(1, min(shards, span))
+    bounds = [ledger_index_min + span * i // shards for i in range(shards + 1)]
+    return [(bounds[i], bounds[i + 1] - 1) for i in range(shards)]
+
+def _ledger_index(tx: dict) -> int | None:
+    return tx.get("ledger_index", tx.get("tx_json", {}).get("ledger_index"))
+
+
+def delivered_amount(tx: dict):
+    """
+    What a transaction delivered: meta's delivered_amount, which is less than Amount
+    for a partial payment. Amount (DeliverMax in API v2) only when there is no metadata,
+    or rippled reports "unavailable" (ledgers before 2014). None if nothing was delivered.
+    """
+    tx_json = tx.get("tx_json", {})
+    meta = tx.get("meta")
+    if isinstance(meta, dict):
+        delivered = meta.get("delivered_amount", meta.get("DeliveredAmount"))
+        if delivered != "unavailable":
+            return delivered
+    return tx_json.get("DeliverMax", tx_json.get("Amount"))
 
+def drops_to_xrp(drops) -> str:
+    """Format an amount in drops as XRP"""
+    return f"{int(drops) / 1_000_000:.6f}" if drops else "Unknown"
+
+def ripple_time_to_local(ripple_time) -> str:
+    """Format a Ripple epoch timestamp in the local timezone"""
+    if ripple_time:
+        local_time = datetime.fromtimestamp(ripple_time + RIPPLE_EPOCH).astimezone()  # Convert to local timezone
+        return local_time.strftime("%Y-%m-%d %H:%M:%S %Z")  # Include timezone name
+    return "Unknown"
+
+TRANSACTION_FIELDS = ("hash", "transaction_type", "result", "account", "destination", "amount", "fee", "ledger_index",
+                      "date", "sequence", "last_ledger_sequence")
+"""The fields of extract_transaction(), in output column order"""
+
+def extract_transaction(tx) -> dict:
+    """
+    The raw fields of an account_tx entry that the summary shows. Amounts stay in drops,
+    dates in Ripple time. amount is what was delivered, see delivered_amount().
+    """
     tx_json = tx['tx_json']
     meta = tx['meta']
-    
-    # Convert XRP values from drops to XRP
-    drops_to_xrp = lambda drops: f"{int(drops) / 1_000_000:.6f}" if drops else "Unknown"
-
-    # Convert Ripple epoch time to local timezone
-    def ripple_time_to_local(ripple_time):
-        if ripple_time:
-            unix_time = ripple_time + 946684800  # Ripple epoch starts at 2000-01-01
-            local_time = datetime.fromtimestamp(unix_time).astimezone()  # Convert to local timezone
-            return local_time.strftime("%Y-%m-%d %H:%M:%S %Z")  # Include timezone name
-        return "Unknown"
-    
+    return {
+        "hash": tx.get("hash", tx_json.get("hash")),
+        "transaction_type": tx_json.get("TransactionType", "Unknown"),
+        "result": meta.get("TransactionResult", "Unknown") if meta else None,
+        "account": tx_json.get("Account", "Unknown"),
+        "destination": tx_json.get("Destination", "Unknown"),
+        "amount": delivered_amount(tx),
+        "fee": tx_json.get("Fee", None),
+        "ledger_index": _ledger_index(tx),
+        "date": tx_json.get("date", None),
+        "sequence": tx_json.get("Sequence", "Unknown"),
+        "last_ledger_sequence": tx_json.get("LastLedgerSequence", "Unknown"),
+    }
+
+def format_transaction(fields: dict) -> str:
+    """The human-readable summary parse_xrp_transaction prints, from extract_transaction() fields."""
+
     # Determine transaction status
     status = "Unknown"
-    if meta:
-        transaction_result = meta.get("TransactionResult", "Unknown")
+    if fields["result"] is not None:
+        transaction_result = fields["result"]
         status = XRPL_RESULT_CODES.get(transaction_result, f"❌ Failed ({transaction_result})")
 
-    # Extract transaction details
-    account = tx_json.get("Account", "Unknown")
-    destination = tx_json.get("Destination", "Unknown")
-    amount = drops_to_xrp(tx_json.get("DeliverMax", tx_json.get("Amount", None)))  # Handle both fields
-    fee = drops_to_xrp(tx_json.get("Fee", None))
-    ledger_index = tx_json.get("ledger_index", "Unknown")
-    transaction_type = tx_json.get("TransactionType", "Unknown")
-    date = ripple_time_to_local(tx_json.get("date", None))
-    sequence = tx_json.get("Sequence", "Unknown")
-    last_ledger_sequence = tx_json.get("LastLedgerSequence", "Unknown")
-    
-    # Print transaction summary
-    print("=" * 50)
-    print(f"📜 XRP Transaction Summary")
-    print("=" * 50)
-    print(f"🔹 Transaction Type : {transaction_type}")
-    print(f"🔹 Status           : {status}")
-    print(f"🔹 Sender           : {account}")
-    print(f"🔹 Recipient        : {destination}")
-    print(f"🔹 Amount Sent      : {amount} XRP" if amount is not None else "🔹 Amount Sent      : Unknown")
-    print(f"🔹 Transaction Fee  : {fee} XRP" if fee is not None else "🔹 Transaction Fee  : Unknown")
-    print(f"🔹 Ledger Index     : {ledger_index}")
-    print(f"🔹 Transaction Date : {date}")
-    print(f"🔹 Sequence Number  : {sequence}")
-    print(f"🔹 Last Ledger Seq  : {last_ledger_sequence}")
-    print("=" * 50)
+    amount = drops_to_xrp(fields["amount"])
+    fee = drops_to_xrp(fields["fee"])
+    date = ripple_time_to_local(fields["date"])
+
+    return "\n".join([
+        "=" * 50,
+        "📜 XRP Transaction Summary",
+        "=" * 50,
+        f"🔹 Transaction Type : {fields['transaction_type']}",
+        f"🔹 Status           : {status}",
+        f"🔹 Sender           : {fields['account']}",
+        f"🔹 Recipient        : {fields['destination']}",
+        f"🔹 Amount Sent      : {amount} XRP" if amount is not None else "🔹 Amount Sent      : Unknown",
+        f"🔹 Transaction Fee  : {fee} XRP" if fee is not None else "🔹 Transaction Fee  : Unknown",
+        f"🔹 Ledger Index     : {fields['ledger_index'] if fields['ledger_index'] is not None else 'Unknown'}",
+        f"🔹 Transaction Date : {date}",
+        f"🔹 Sequence Number  : {fields['sequence']}",
+        f"🔹 Last Ledger Seq  : {fields['last_ledger_sequence']}",
+        "=" * 50,
+    ])
 
+def parse_xrp_transaction(tx):
+    """Prints a human-readable summary of an XRP Ledger transaction."""
+    print(format_transaction(extract_transaction(tx)))
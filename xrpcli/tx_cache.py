@@ -0,0 +1,114 @@
+import json
+import sqlite3
+from datetime import datetime
+from typing import Callable, List
+
+from xrpcli.config import Config
+from xrpcli.transactions import RIPPLE_EPOCH, FetchProgress, iter_transactions, resolve_ledger_range
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS transactions (
+    account      TEXT NOT NULL,
+    hash         TEXT NOT NULL,
+    ledger_index INTEGER NOT NULL,
+    date         INTEGER,
+    tx_type      TEXT,
+    counterparty TEXT,
+    result       TEXT,
+    tx           TEXT NOT NULL,
+    PRIMARY KEY (account, hash)
+);
+CREATE INDEX IF NOT EXISTS transactions_ledger ON transactions (account, ledger_index);
+CREATE INDEX IF NOT EXISTS transactions_date ON transactions (account, date);
+CREATE INDEX IF NOT EXISTS transactions_type ON transactions (account, tx_type);
+CREATE INDEX IF NOT EXISTS transactions_counterparty ON transactions (account, counterparty);
+
+CREATE TABLE IF NOT EXISTS checkpoints (
+    account      TEXT PRIMARY KEY,
+    ledger_index INTEGER NOT NULL
+);
+"""
+
+class TransactionCache:
+    """
+    Local SQLite store of account transactions.
+
+    sync() only fetches ledgers after the highest validated ledger already stored for
+    the account, so re-syncing a long lived account is a small delta instead of its
+    whole history. Queries by date, type and counterparty run against the local copy.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._db = sqlite3.connect(path)
+        self._db.executescript(_SCHEMA)
+
+    def checkpoint(self, account: str) -> int | None:
+        """Highest validated ledger fully synced for the account"""
+        row = self._db.execute("SELECT ledger_index FROM checkpoints WHERE account = ?", (account,)).fetchone()
+        return row[0] if row else None
+
+    def sync(self, config: Config, shards: int = 1, progress: Callable[[FetchProgress], None] | None = None) -> int:
+        """Fetch and store the account's transactions since the last sync. Returns how many were new."""
+        account = config.xrp_address
+        checkpoint = self.checkpoint(account)
+
+        # pin the upper bound so the checkpoint is exactly what was fetched
+        _, latest = resolve_ledger_range(config)
+        start = -1 if checkpoint is None else checkpoint + 1
+        if start > latest:
+            return 0
+
+        added = 0
+        with self._db:
+            for tx in iter_transactions(config, ledger_index_min=start, ledger_index_max=latest, shards=shards, progress=progress):
+                added += self._insert(account, tx)
+            self._db.execute("INSERT OR REPLACE INTO checkpoints (account, ledger_index) VALUES (?, ?)", (account, latest))
+        return added
+
+    def _insert(self, account: str, tx: dict) -> int:
+        tx_json = tx.get("tx_json", {})
+        sender = tx_json.get("Account")
+        counterparty = tx_json.get("Destination") if sender == account else sender
+        cursor = self._db.execute(
+            "INSERT OR IGNORE INTO transactions (account, hash, ledger_index, date, tx_type, counterparty, result, tx) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            (account, tx.get("hash", tx_json.get("hash")), tx.get("ledger_index", tx_json.get("ledger_index")),
+             tx_json.get("date"), tx_json.get("TransactionType"), counterparty,
+             (tx.get("meta") or {}).get("TransactionResult"), json.dumps(tx, separators=(",", ":"))))
+        return cursor.rowcount
+
+    def transactions(self, account: str, start: datetime | None = None, end: datetime | None = None,
+                     tx_type: str | None = None, counterparty: str | None = None, forward: bool = True) -> List[dict]:
+        """Stored transactions for the account in ledger order, optionally filtered. start is inclusive, end exclusive."""
+        clauses = ["account = ?"]
+        params = [account]
+        if start is not None:
+            clauses.append("date >= ?")
+            params.append(int(start.timestamp()) - RIPPLE_EPOCH)
+        if end is not None:
+            clauses.append("date < ?")
+            params.append(int(end.timestamp()) - RIPPLE_EPOCH)
+        if tx_type is not None:
+            clauses.append("tx_type = ?")
+            params.append(tx_type)
+        if counterparty is not None:
+            clauses.append("counterparty = ?")
+            params.append(counterparty)
+
+        order = "ASC" if forward else "DESC"
+        rows = self._db.execute(f"SELECT tx FROM transactions WHERE {' AND '.join(clauses)} "
+                                f"ORDER BY ledger_index {order}, rowid {order}", params)
+        return [json.loads(tx) for tx, in rows]
+
+    def count(self, account: str) -> int:
+        return self._db.execute("SELECT COUNT(*) FROM transactions WHERE account = ?", (account,)).fetchone()[0]
+
+    def close(self):
+        self._db.close()
+
+    def __enter__(self) -> "TransactionCache":
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
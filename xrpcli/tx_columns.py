@@ -0,0 +1,155 @@
+"""
+Columnar view of an account's transactions for fast summaries.
+
+to_columns() walks a batch of account_tx entries once and stores each field as a
+NumPy array: type, result code, sender, destination, amount and fee in drops,
+ledger index and Ripple timestamp. Strings (types, result codes, addresses) are
+stored as integer codes into small name tables, so the aggregates run as integer
+array operations and summarizing a long history takes milliseconds.
+
+Amounts are what was delivered (meta's delivered_amount), so a partial payment counts
+for what arrived rather than its Amount, and stay in integer drops throughout.
+Issued currency (non-XRP) amounts are recorded as 0 with is_xrp False.
+"""
+from dataclasses import dataclass
+from typing import Iterable
+
+import numpy as np
+
+from xrpcli.transactions import RIPPLE_EPOCH, delivered_amount
+
+SUCCESS = "tesSUCCESS"
+
+@dataclass
+class TransactionColumns:
+    account: str
+    """The account whose history this is. Flows are signed from its point of view."""
+
+    tx_type: np.ndarray
+    """int32 codes into tx_type_names"""
+
+    tx_type_names: np.ndarray
+    result: np.ndarray
+    """int32 codes into result_names. The name is empty if the entry had no metadata."""
+
+    result_names: np.ndarray
+    sender: np.ndarray
+    """int32 codes into addresses"""
+
+    destination: np.ndarray
+    """int32 codes into addresses. The address is empty for transactions without a Destination."""
+
+    addresses: np.ndarray
+    amount: np.ndarray
+    """int64 drops delivered (see delivered_amount), 0 if none or not XRP"""
+
+    is_xrp: np.ndarray
+    """True where amount is an XRP amount"""
+
+    fee: np.ndarray
+    """int64 drops"""
+
+    ledger_index: np.ndarray
+    date: np.ndarray
+    """int64 seconds since the Ripple epoch"""
+
+    def __len__(self) -> int:
+        return len(self.ledger_index)
+
+    @property
+    def dates(self) -> np.ndarray:
+        """Transaction times as datetime64[s] in UTC"""
+        return (self.date + RIPPLE_EPOCH).astype("datetime64[s]")
+
+    def _code(self, names: np.ndarray, name: str) -> int:
+        codes = np.flatnonzero(names == name)
+        return int(codes[0]) if len(codes) else -1
+
+    def _outgoing(self) -> np.ndarray:
+        return self.sender == self._code(self.addresses, self.account)
+
+    @property
+    def counterparty(self) -> np.ndarray:
+        """Address codes of the other side of each transaction: the destination of ours, the sender of theirs"""
+        return np.where(self._outgoing(), self.destination, self.sender)
+
+    def _xrp_payments(self) -> np.ndarray:
+        """Mask of successful XRP payments to or from the account"""
+        account = self._code(self.addresses, self.account)
+        return ((self.tx_type == self._code(self.tx_type_names, "Payment"))
+                & (self.result == self._code(self.result_names, SUCCESS)) & self.is_xrp
+                & ((self.sender == account) | (self.destination == account)))
+
+    def total_fees(self) -> int:
+        """Drops of fees the account paid. Fees are charged to the sender, whatever the result."""
+        return int(self.fee[self._outgoing()].sum())
+
+    def net_flow(self) -> np.ndarray:
+        """Signed drops per transaction: positive received, negative sent, 0 if not an XRP payment"""
+        signed = np.where(self._outgoing(), -self.amount, self.amount)
+        return np.where(self._xrp_payments(), signed, 0)
+
+    def net_flow_by_counterparty(self) -> dict[str, int]:
+        """Net drops received from (positive) or sent to (negative) each counterparty"""
+        mask = self._xrp_payments()
+        codes, sums = _group_sum(self.counterparty[mask], self.net_flow()[mask])
+        return dict(zip(self.addresses[codes].tolist(), sums.tolist()))
+
+    def volume_by_month(self) -> dict[str, int]:
+        """Drops moved in and out per calendar month (UTC), keyed like 2024-03"""
+        mask = self._xrp_payments()
+        months = self.dates[mask].astype("datetime64[M]")
+        months, sums = _group_sum(months.astype(np.int64), self.amount[mask])
+        return dict(zip(months.astype("datetime64[M]").astype(str).tolist(), sums.tolist()))
+
+    def count_by_type(self) -> dict[str, int]:
+        counts = np.bincount(self.tx_type, minlength=len(self.tx_type_names))
+        return dict(zip(self.tx_type_names.tolist(), counts.tolist()))
+
+def to_columns(account: str, transactions: Iterable[dict]) -> TransactionColumns:
+    """Columns for a batch of account_tx entries (as returned by get_all_transactions or iter_transactions)"""
+    tx_types, results, senders, destinations = [], [], [], []
+    amounts, is_xrp, fees, ledger_indexes, dates = [], [], [], [], []
+    # string fields are stored as codes, assigned in order of first appearance
+    tx_type_codes, result_codes, address_codes = {}, {}, {}
+
+    for tx in transactions:
+        tx_json = tx.get("tx_json", {})
+        meta = tx.get("meta") or {}
+        tx_types.append(tx_type_codes.setdefault(tx_json.get("TransactionType", ""), len(tx_type_codes)))
+        results.append(result_codes.setdefault(meta.get("TransactionResult", ""), len(result_codes)))
+        senders.append(address_codes.setdefault(tx_json.get("Account", ""), len(address_codes)))
+        destinations.append(address_codes.setdefault(tx_json.get("Destination", ""), len(address_codes)))
+
+        amount = delivered_amount(tx)
+        xrp = isinstance(amount, str)
+        amounts.append(int(amount) if xrp else 0)
+        is_xrp.append(xrp)
+
+        fees.append(int(tx_json.get("Fee", 0)))
+        ledger_indexes.append(tx.get("ledger_index", tx_json.get("ledger_index", 0)))
+        dates.append(tx_json.get("date", 0))
+
+    return TransactionColumns(
+        account=account,
+        tx_type=np.array(tx_types, dtype=np.int32),
+        tx_type_names=np.array(list(tx_type_codes), dtype=str),
+        result=np.array(results, dtype=np.int32),
+        result_names=np.array(list(result_codes), dtype=str),
+        sender=np.array(senders, dtype=np.int32),
+        destination=np.array(destinations, dtype=np.int32),
+        addresses=np.array(list(address_codes), dtype=str),
+        amount=np.array(amounts, dtype=np.int64),
+        is_xrp=np.array(is_xrp, dtype=bool),
+        fee=np.array(fees, dtype=np.int64),
+        ledger_index=np.array(ledger_indexes, dtype=np.int64),
+        date=np.array(dates, dtype=np.int64))
+
+def _group_sum(keys: np.ndarray, values: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """Sorted unique integer keys and the int64 sum of the values for each. Exact, unlike a float bincount."""
+    if not len(keys):
+        return keys, values
+    order = np.argsort(keys, kind="stable")
+    keys = keys[order]
+    starts = np.flatnonzero(np.r_[True, keys[1:] != keys[:-1]])
+    return keys[starts], np.add.reduceat(values[order], starts)
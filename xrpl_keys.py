@@ -1,50 +1,218 @@
-#import json
+import argparse
+import json
 import sys
-from dataclasses import asdict
+from contextlib import nullcontext, redirect_stdout
 
-from xrpl import CryptoAlgorithm
-from xrpl.core.keypairs import derive_classic_address, derive_keypair
-from xrpl.wallet import Wallet
-
-from xrpcli.transactions import get_all_transactions,parse_xrp_transaction
+from output_sinks import FORMATS, open_sink
+from xrpcli.transactions import TRANSACTION_FIELDS, extract_transaction, format_transaction, get_all_transactions
 from xrpcli.account import get_xrp_balance
-from xrpcli.config import Config, calculate_config, validate
+from xrpcli.config import (DEFAULT_CLIENT_URL, DEFAULT_CLIENT_URLS, calculate_config, calculate_configs, iter_seed_file,
+                           validate)
+from xrpcli.metrics import ClientMetrics
+from xrpcli.prices import (CachedPriceProvider, FixturePriceProvider, YahooPriceProvider, set_price_provider,
+                           value_transactions)
+from xrpcli.subscribe import DEFAULT_WEBSOCKET_URL, TransactionStream
+from xrpcli.tx_cache import TransactionCache
 from xrpcli.utils import get_xrp_fees, get_xrp_usd_price
 
-if len(sys.argv) != 2:
-    print(f"Usage: python {sys.argv[0]} shfMySeed")
-    sys.exit(1)
+parser = argparse.ArgumentParser(description="Show the transactions, balance and value of an XRP account")
+parser.add_argument("seed", nargs="?", help="your XRP seed (starting with 'shf')")
+parser.add_argument("--cache", metavar="PATH",
+                    help="keep the account's transactions in a local SQLite cache at PATH and only fetch new ledgers")
+parser.add_argument("--summary", action="store_true",
+                    help="print fee, counterparty and monthly totals instead of every transaction")
+parser.add_argument("--price-cache", metavar="PATH",
+                    help="keep daily XRP prices in a JSON file at PATH so each day is only fetched once")
+parser.add_argument("--price-fixture", metavar="PATH",
+                    help="read XRP prices from a local JSON fixture instead of Yahoo Finance")
+parser.add_argument("--historical-value", action="store_true",
+                    help="also show what each transaction was worth in USD on the day it happened")
+parser.add_argument("--node", metavar="URL", action="append",
+                    help="rippled JSON-RPC URL to use, repeat to fail over and hedge between several nodes "
+                         f"(default: {DEFAULT_CLIENT_URL}, public nodes: {', '.join(DEFAULT_CLIENT_URLS)})")
+parser.add_argument("--follow", action="store_true",
+                    help="keep running and print new transactions as they are validated (Ctrl-C to stop)")
+parser.add_argument("--ws-url", metavar="URL", default=DEFAULT_WEBSOCKET_URL,
+                    help=f"rippled WebSocket URL for --follow (default: {DEFAULT_WEBSOCKET_URL})")
+parser.add_argument("--fees", type=int, metavar="N",
+                    help="sample the fees N times, --fee-interval seconds apart, and show their rolling statistics "
+                         "and a recommended fee instead of one reading")
+parser.add_argument("--fee-interval", type=float, default=4.0, metavar="SECONDS",
+                    help="seconds between --fees samples (default: 4, about one ledger)")
+parser.add_argument("--profile", nargs="?", const="text", choices=("text", "json", "prometheus"),
+                    help="time every request and stage and print the breakdown at the end (default format: text)")
+parser.add_argument("--output-format", choices=FORMATS,
+                    help="how transactions (or --seeds results) are written (default: pretty, jsonl with --seeds). "
+                         "parquet and arrow need pyarrow and --output")
+parser.add_argument("--output", metavar="PATH", help="write the transactions (or --seeds results) to PATH instead of stdout")
+batch = parser.add_argument_group("batch mode", "derive the accounts of many seeds instead of showing one account")
+batch.add_argument("--seeds", metavar="PATH",
+                   help="file with one seed per line (- reads stdin); writes each seed's address and public key")
+batch.add_argument("--include-secrets", action="store_true",
+                   help="also write each seed and private key (default: public data only)")
+batch.add_argument("-j", "--jobs", type=int, help="number of worker processes (default: one per CPU)")
+batch.add_argument("--check", action="store_true",
+                   help="fully validate every derived config (sign, verify and re-derive the address)")
+args = parser.parse_args()
 
-# Your XRP seed (starting with 'shf')
-seed = sys.argv[1]
+if args.seeds is None and args.seed is None:
+    parser.error("a seed or --seeds is required")
+if args.jobs is not None and args.jobs < 1:
+    parser.error("--jobs must be at least 1")
+if args.fees is not None and args.fees < 1:
+    parser.error("--fees must be at least 1")
+
+def open_output(fmt, fields, to_row, to_text):
+    try:
+        return open_sink(fmt, args.output, fields, to_row, to_text)
+    except (RuntimeError, ValueError) as e:
+        parser.error(str(e))
+
+def derive_seed_file():
+    fields = ("index", "xrp_address", "public_key") + (("seed", "private_key") if args.include_secrets else ())
+
+    def to_row(result):
+        config = result.config
+        row = (result.index, config.xrp_address, config.public_key)
+        return row + (result.seed, config.private_key) if args.include_secrets else row
+
+    def to_text(result):
+        return "🔹 " + " ".join(map(str, to_row(result)))
+
+    total = failures = 0
+    with open_output(args.output_format or "jsonl", fields, to_row, to_text) as sink:
+        for result in calculate_configs(iter_seed_file(args.seeds), workers=args.jobs, check=args.check,
+                                        keep_seeds=args.include_secrets):
+            total += 1
+            if not result.ok:
+                failures += 1
+                print(f"❌ Seed {result.index + 1}: {result.error}", file=sys.stderr)
+                continue
+            sink.write(result)
+    if failures:
+        print(f"❌ {failures} of {total} seeds failed", file=sys.stderr)
+    return 1 if failures else 0
+
+if args.seeds:
+    sys.exit(derive_seed_file())
+
+# transactions go to the sink, one (tx, value at the time) pair per record
+historical = args.historical_value and not args.summary
+fields = TRANSACTION_FIELDS + (("value_usd",) if historical else ())
 
-# Derive private and public keys
-# public_key, private_key = derive_keypair(seed, algorithm=CryptoAlgorithm.SECP256K1)
+def transaction_row(item):
+    tx, value = item
+    extracted = extract_transaction(tx)
+    row = [extracted[name] for name in TRANSACTION_FIELDS]
+    return row + [value] if historical else row
 
-# Derive the XRP address from the public key
-# classic_address = derive_classic_address(public_key)
+def transaction_text(item):
+    tx, value = item
+    text = format_transaction(extract_transaction(tx))
+    return text + f"\n💲 Value at the time: 💲{value:.2f}" if value is not None else text
 
-# print("Private Key:", private_key)
-# print("Public Key:", public_key)
-# print("XRP Address:", classic_address)
+sink = open_output(args.output_format or "pretty", fields, transaction_row, transaction_text)
+# with structured records on stdout, stdout carries only them so they can be piped; everything else goes to stderr
+report = sys.stderr if (args.output_format or "pretty") != "pretty" and args.output in (None, "-") else sys.stdout
 
-# wallet = Wallet.from_seed(seed, algorithm=CryptoAlgorithm.SECP256K1)
+def reporting():
+    """Send what the xrpcli functions print to the report stream too"""
+    return redirect_stdout(report) if report is not sys.stdout else nullcontext()
 
-# print("XRP Address from Wallet:", wallet.address)
+metrics = ClientMetrics() if args.profile else None
+stage = metrics.stage if metrics else lambda name: nullcontext()
 
-config = validate(calculate_config(seed))
-#print("Config: ", json.dumps(asdict(config)))
+price_source = FixturePriceProvider.from_file(args.price_fixture) if args.price_fixture else YahooPriceProvider()
+set_price_provider(CachedPriceProvider(price_source, cache_path=args.price_cache))
+
+# Your XRP seed (starting with 'shf')
+seed = args.seed
+
+with stage("config"):
+    config = validate(calculate_config(seed))
+config.metrics = metrics
+config.client_urls = args.node
 
 # Print all of the transactions
-for tx in get_all_transactions(config):
-    parse_xrp_transaction(tx)
+with stage("fetch"), reporting():
+    if args.cache:
+        with TransactionCache(args.cache) as cache:
+            added = cache.sync(config)
+            transactions = cache.transactions(config.xrp_address, forward=False)
+        print(f"Synced {added} new transactions into {args.cache}", file=report)
+    else:
+        transactions = get_all_transactions(config)
+
+with stage("parse"):
+    if args.summary:
+        from xrpcli.tx_columns import to_columns
+
+        columns = to_columns(config.xrp_address, transactions)
+        print(f"📜 {len(columns)} transactions", file=report)
+        for tx_type, count in columns.count_by_type().items():
+            print(f"🔹 {tx_type:<20}: {count}", file=report)
+        print(f"🔹 Total Fees Paid     : {columns.total_fees() / 1_000_000:.6f} XRP", file=report)
+        print("🔹 Net Flow by Counterparty:", file=report)
+        for counterparty, flow in sorted(columns.net_flow_by_counterparty().items(), key=lambda item: item[1]):
+            print(f"   {counterparty:<35} {flow / 1_000_000:+.6f} XRP", file=report)
+        print("🔹 Volume by Month:", file=report)
+        for month, volume in columns.volume_by_month().items():
+            print(f"   {month}  {volume / 1_000_000:.6f} XRP", file=report)
+    else:
+        # one price series fetch for the whole history
+        with reporting():
+            values = value_transactions(transactions) if args.historical_value else [None] * len(transactions)
+        sink.write_many(zip(transactions, values))
+        sink.flush()
 
 # get and print the current balance and value given the current price for XRP
-balance = get_xrp_balance(config)
-print(f"Current XRP Balance: {balance}")
-dollars_per_xrp = get_xrp_usd_price()
-print(f"Current Account Value: 💲{balance * dollars_per_xrp} at 💲{dollars_per_xrp} per XRP")
+with stage("balance"), reporting():
+    balance = get_xrp_balance(config)
+print(f"Current XRP Balance: {balance}", file=report)
+with stage("price"), reporting():
+    dollars_per_xrp = get_xrp_usd_price()
+if balance is None or dollars_per_xrp is None:
+    # an unfunded account has no balance, and the price can be unavailable; both were reported already
+    print("Current Account Value: Unknown", file=report)
+else:
+    print(f"Current Account Value: 💲{balance * dollars_per_xrp} at 💲{dollars_per_xrp} per XRP", file=report)
 
 # print the current fees
-print(get_xrp_fees(config))
+with stage("fees"), reporting():
+    if args.fees:
+        from xrpcli.fees import FeeMonitor
+
+        monitor = FeeMonitor(config, interval=args.fee_interval, window=args.fees)
+        if monitor.sample_many(args.fees):
+            print(f"📊 XRP Transaction Fees over {len(monitor.open_ledger_fee)} samples:", file=report)
+            for name, stats in monitor.stats().items():
+                print(f"🔹 {name:<16}: " + "  ".join(f"{key} {value:g}" for key, value in stats.items()), file=report)
+            print(f"🔹 Recommended Fee : {monitor.recommended_fee()} drops", file=report)
+        if monitor.errors:
+            print(f"❌ {monitor.errors} of {args.fees} fee samples failed: {monitor.last_error}", file=report)
+    else:
+        print(get_xrp_fees(config), file=report)
+
+if args.follow:
+    # start from the newest ledger already shown so nothing validated since then is missed,
+    # without repeating the transactions of that ledger that were already shown
+    since_ledger = max((tx.get("ledger_index", 0) for tx in transactions), default=None)
+    stream = TransactionStream([config], url=args.ws_url, since_ledger=since_ledger,
+                               known_hashes=[tx.get("hash") for tx in transactions if tx.get("ledger_index") == since_ledger])
+    print(f"👀 Following {config.xrp_address} on {args.ws_url}", file=report)
+    try:
+        for tx in stream:
+            sink.write((tx, None))
+            sink.flush()
+    except KeyboardInterrupt:
+        print(f"Stopped after {stream.connects} connections, last ledger {stream.last_ledger}", file=report)
+
+if metrics:
+    if args.profile == "json":
+        print(json.dumps(metrics.to_json(), indent=2), file=report)
+    elif args.profile == "prometheus":
+        print(metrics.to_prometheus(), end="", file=report)
+    else:
+        print(metrics.report(), file=report)
 
+sink.close()